@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.processamento import executar, localizar_marcadores, campos_confianca, ATRIBUICAO_MODO, MODOS_ATRIBUICAO
+from app.medidas import nomes_frontal, nomes_sagital
+from app.lote import preparar_item, CAMPOS_SAGITAL
+from app.upload import UPLOAD_MAX_BYTES, identificar_formato
+from app.metricas import histograma_etapas
+
+router = APIRouter()
+
+NOMES = {"frontal": nomes_frontal, "sagital": nomes_sagital}
+
+
+# ---------------------------
+# Prévia ao vivo: a câmera envia frames e recebe só as coordenadas dos marcadores
+# ---------------------------
+# Cada conexão processa um frame por vez. Frames que chegam enquanto o anterior está
+# no pool substituem o que estava esperando (o mais recente vence): um worker lento
+# descarta frames em vez de acumular fila e atrasar a prévia.
+class UltimoFrame:
+    def __init__(self):
+        self.frame = None  # (número do frame, bytes, instante de chegada)
+        self.recebidos = 0
+        self.descartados = 0
+        self._evento = asyncio.Event()
+
+    def colocar(self, contents):
+        if self.frame is not None:
+            self.descartados += 1
+        self.recebidos += 1
+        self.frame = (self.recebidos, contents, time.perf_counter())
+        self._evento.set()
+
+    async def retirar(self):
+        await self._evento.wait()
+        self._evento.clear()
+        frame, self.frame = self.frame, None
+        return frame
+
+
+def configurar(parametros):
+    """
+    vista + referência e atribuicao opcionais; sem referência completa a prévia envia só
+    os pontos. Uma referência enviada mas inválida (ex.: referencia_pixels=0) é ValueError.
+    """
+    vista = parametros.get("vista", "frontal")
+    if vista not in ("frontal", "sagital"):
+        raise ValueError(f"Vista inválida: {vista}")
+    atribuicao = parametros.get("atribuicao") or ATRIBUICAO_MODO
+    if atribuicao not in MODOS_ATRIBUICAO:
+        raise ValueError(f"atribuicao deve ser um de: {', '.join(MODOS_ATRIBUICAO)}")
+    campos = ("referencia_pixels",) if vista == "frontal" else CAMPOS_SAGITAL
+    if any(parametros.get(c) in (None, "") for c in campos):
+        medir, args = None, ()
+    else:
+        _, medir, args = preparar_item(parametros)
+    return {"vista": vista, "medir": medir, "args": args, "atribuicao": atribuicao}
+
+
+def validar_frame(contents):
+    if len(contents) > UPLOAD_MAX_BYTES:
+        return "Frame maior que o limite de upload"
+    if identificar_formato(contents[:16]) is None:
+        return "Frame não é uma imagem suportada (JPEG, PNG, WebP, BMP ou TIFF)"
+    return None
+
+
+def _mensagem_frame(numero, vista, analise, medir, args):
+    mensagem = {"frame": numero, "vista": vista, "pontos": analise["pontos"]}
+    mensagem.update(campos_confianca(analise, NOMES[vista]))
+    if medir is not None:
+        medidas = medir(analise, *args)
+        mensagem["medidas"] = {k: v for k, v in medidas.items() if k not in ("pontos_detectados", "confianca", "marcadores_incertos")}
+    return mensagem
+
+
+async def _processar_frames(enviar, ultimo, config):
+    while True:
+        numero, contents, chegada = await ultimo.retirar()
+        # A configuração pode mudar enquanto o frame está no pool: usa a do início
+        vista, medir, args = config["vista"], config["medir"], config["args"]
+        # Um frame que falha vira erro daquele frame; a prévia segue com os próximos
+        try:
+            analise = await executar(localizar_marcadores, contents, vista, config["atribuicao"])
+            mensagem = None if analise is None else _mensagem_frame(numero, vista, analise, medir, args)
+        except Exception as e:
+            print(f"❌ Erro no frame {numero} da prévia ao vivo:", e)
+            await enviar({"frame": numero, "error": f"Erro ao processar frame: {e}"})
+            continue
+        if mensagem is None:
+            await enviar({"frame": numero, "error": "Erro ao processar imagem"})
+            continue
+
+        latencia = time.perf_counter() - chegada
+        mensagem["latencia_ms"] = round(latencia * 1000, 1)
+        mensagem["descartados"] = ultimo.descartados
+        histograma_etapas.observar(latencia, rota="/ws/preview", etapa="frame")
+        await enviar(mensagem)
+
+
+# ---------------------------
+# WebSocket: /ws/preview?vista=frontal&referencia_pixels=250
+# - mensagens binárias: frames (JPEG/PNG/WebP...)
+# - mensagens de texto: JSON com nova configuração (mesmos campos da query)
+# ---------------------------
+@router.websocket("/ws/preview")
+async def preview(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        config = configurar(dict(websocket.query_params))
+    except ValueError as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    trava = asyncio.Lock()
+
+    async def enviar(mensagem):
+        async with trava:
+            await websocket.send_json(mensagem)
+
+    ultimo = UltimoFrame()
+    tarefa = asyncio.create_task(_processar_frames(enviar, ultimo, config))
+    try:
+        while True:
+            mensagem = await websocket.receive()
+            if mensagem["type"] == "websocket.disconnect":
+                break
+            if mensagem.get("bytes") is not None:
+                erro = validar_frame(mensagem["bytes"])
+                if erro:
+                    await enviar({"error": erro})
+                else:
+                    ultimo.colocar(mensagem["bytes"])
+            elif mensagem.get("text"):
+                try:
+                    config.update(configurar(json.loads(mensagem["text"])))
+                    await enviar({"config": {"vista": config["vista"], "medidas": config["medir"] is not None}})
+                except (ValueError, TypeError, AttributeError) as e:
+                    await enviar({"error": f"Configuração inválida: {e}"})
+            if tarefa.done():
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        tarefa.cancel()
+        try:
+            await tarefa
+        except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            pass
+        except Exception as e:
+            print("❌ Erro na prévia ao vivo:", e)
@@ -0,0 +1,230 @@
+import os
+
+import cv2
+import numpy as np
+
+from app.medidas import VISTAS
+
+# ---------------------------
+# Atribuição dos candidatos ao modelo anatômico da vista
+# ---------------------------
+# Em vez de rotular pela ordem vertical (onde um blob a mais desloca todos os rótulos
+# seguintes), cada vista tem um modelo com a posição esperada de cada ponto (medidas.py,
+# VISTAS[vista]["modelo"]) e a atribuição procura a transformação (posição, escala e,
+# na sagital, espelhamento) que melhor encaixa o modelo nos candidatos:
+#
+# 1) hipóteses: pares de candidatos fazem o papel de um ponto de cima e um de baixo do
+#    modelo, o que fixa posição e escala; pares incoerentes na horizontal são descartados;
+# 2) índice espacial: uma transformada de distância numa grade reduzida dá, para qualquer
+#    posição, a distância ao candidato mais próximo; todas as hipóteses são pontuadas de
+#    uma vez (custo quadrático truncado por ponto do modelo) com uma consulta na grade;
+# 3) a melhor hipótese é refinada: atribuição um-para-um gulosa, ajuste da transformação
+#    por mínimos quadrados nos pontos atribuídos e nova atribuição.
+#
+# Cada ponto recebe uma confiança em [0, 1]: alta quando o candidato está perto da
+# posição prevista e não há outro candidato livre competindo por ela. Pontos sem
+# candidato ficam None com confiança 0.
+
+# Desvio aceito entre a posição prevista e o candidato, em frações do comprimento do corpo
+ATRIBUICAO_TOLERANCIA = float(os.environ.get("ATRIBUICAO_TOLERANCIA", 0.04))
+# Confiança mínima para um ponto ser considerado confiável (marcadores_incertos)
+ATRIBUICAO_CONFIANCA_MIN = float(os.environ.get("ATRIBUICAO_CONFIANCA_MIN", 0.5))
+# Candidatos usados para formar hipóteses (os de raio mais típico); o encaixe usa todos
+ATRIBUICAO_MAX_ANCORAS = int(os.environ.get("ATRIBUICAO_MAX_ANCORAS", 100))
+
+# Lado maior da grade da transformada de distância
+_LADO_GRADE = 256
+# Comprimento mínimo do corpo, em frações do lado maior da imagem
+_COMPRIMENTO_MIN = 0.15
+# Pares do modelo usados como âncora precisam estar separados ao menos isto na vertical
+_SEPARACAO_ANCORAS = 0.3
+# Hipóteses demais passam antes por uma triagem com _PONTOS_TRIAGEM pontos do modelo
+_MAX_HIPOTESES_COMPLETAS = 2000
+_PONTOS_TRIAGEM = 4
+# Mínimo de pontos atribuídos para a transformação ser considerada encontrada
+_MINIMO_ATRIBUIDOS = 3
+
+
+class Modelo:
+    def __init__(self, vista):
+        definicao = VISTAS[vista]
+        self.vista = vista
+        self.uv = np.array(definicao["modelo"], np.float64)
+        self.espelhos = (1.0, -1.0) if definicao.get("espelhavel") else (1.0,)
+        u, v = self.uv.T
+        self.ancoras = np.array(
+            [(i, j) for i in range(len(v)) for j in range(len(v)) if v[j] - v[i] >= _SEPARACAO_ANCORAS],
+            np.intp,
+        )
+
+    def __len__(self):
+        return len(self.uv)
+
+    def prever(self, x0, y0, s, m):
+        """Posições previstas (..., L, 2) para transformações com formato (...)."""
+        u, v = self.uv.T
+        x0, y0, s, m = (np.asarray(a, np.float64)[..., None] for a in (x0, y0, s, m))
+        return np.stack([x0 + m * s * u, y0 + s * v], axis=-1)
+
+
+MODELOS = {vista: Modelo(vista) for vista in ("frontal", "sagital")}
+
+
+def _grade_distancias(pontos, forma):
+    """Transformada de distância ao candidato mais próximo, numa grade reduzida (px da imagem)."""
+    h, w = forma
+    fator = max(1, int(np.ceil(max(h, w) / _LADO_GRADE)))
+    gh, gw = -(-h // fator), -(-w // fator)
+    grade = np.full((gh, gw), 255, np.uint8)
+    gx = np.clip((pontos[:, 0] // fator).astype(np.intp), 0, gw - 1)
+    gy = np.clip((pontos[:, 1] // fator).astype(np.intp), 0, gh - 1)
+    grade[gy, gx] = 0
+    return cv2.distanceTransform(grade, cv2.DIST_L2, 3) * fator, fator
+
+
+def _hipoteses(modelo, pontos, raios, forma):
+    """(x0, y0, s, m) de cada hipótese formada por um par de candidatos âncora."""
+    n = len(pontos)
+    if n > ATRIBUICAO_MAX_ANCORAS:
+        # Marcadores têm todos o mesmo tamanho: prefere os de raio mais próximo da mediana
+        tipicos = np.argsort(np.abs(np.log(raios / np.median(raios))), kind="stable")
+        indices = tipicos[:ATRIBUICAO_MAX_ANCORAS]
+    else:
+        indices = np.arange(n)
+
+    a, b = np.meshgrid(indices, indices, indexing="ij")
+    a, b = a.ravel(), b.ravel()
+    comprimento_min = _COMPRIMENTO_MIN * max(forma)
+    validos = pontos[b, 1] - pontos[a, 1] >= comprimento_min * _SEPARACAO_ANCORAS
+    # Raios muito diferentes: dificilmente são dois marcadores
+    validos &= np.abs(np.log(raios[a] / raios[b])) <= np.log(1.6)
+    a, b = a[validos], b[validos]
+
+    u, v = modelo.uv.T
+    ki, kj = modelo.ancoras.T
+    # Todas as combinações (par de candidatos, par do modelo)
+    xa, ya = pontos[a, 0][:, None], pontos[a, 1][:, None]
+    xb, yb = pontos[b, 0][:, None], pontos[b, 1][:, None]
+    s = (yb - ya) / (v[kj] - v[ki])
+    x0s, y0s, ss, ms = [], [], [], []
+    for m in modelo.espelhos:
+        x0 = xa - m * s * u[ki]
+        residuo = xb - (x0 + m * s * u[kj])
+        ok = (s >= comprimento_min) & (np.abs(residuo) <= 2 * ATRIBUICAO_TOLERANCIA * s)
+        # Centro do par: a hipótese não depende de qual dos dois fixou a posição horizontal
+        x0s.append((x0 + residuo / 2)[ok])
+        y0s.append((ya - s * v[ki])[ok])
+        ss.append(s[ok])
+        ms.append(np.full(int(ok.sum()), m))
+    return np.concatenate(x0s), np.concatenate(y0s), np.concatenate(ss), np.concatenate(ms)
+
+
+def _pontuar(modelo, hipoteses, distancias, fator, pontos_modelo=None):
+    """
+    Custo de cada hipótese: soma de min((d / tolerância)², 1) sobre os pontos do modelo
+    (ou só sobre pontos_modelo, para uma triagem mais barata).
+    """
+    x0, y0, s, m = (np.asarray(a, np.float32)[:, None] for a in hipoteses)
+    uv = modelo.uv if pontos_modelo is None else modelo.uv[pontos_modelo]
+    u, v = uv.astype(np.float32).T
+    gh, gw = distancias.shape
+    gx = ((x0 + m * s * u) / fator).astype(np.intp)
+    gy = ((y0 + s * v) / fator).astype(np.intp)
+    dentro = (gx >= 0) & (gx < gw) & (gy >= 0) & (gy < gh)
+    d = distancias[np.clip(gy, 0, gh - 1), np.clip(gx, 0, gw - 1)]
+    erro = (d / (ATRIBUICAO_TOLERANCIA * s)) ** 2
+    erro[~dentro] = 1.0
+    return np.minimum(erro, 1.0, out=erro).sum(axis=1)
+
+
+def _melhor_hipotese(modelo, hipoteses, distancias, fator):
+    """Triagem com poucos pontos do modelo espalhados; custo completo só para as melhores."""
+    n = len(hipoteses[0])
+    if n > _MAX_HIPOTESES_COMPLETAS:
+        triagem = np.unique(np.linspace(0, len(modelo) - 1, _PONTOS_TRIAGEM).round().astype(np.intp))
+        custo = _pontuar(modelo, hipoteses, distancias, fator, triagem)
+        finalistas = np.argpartition(custo, _MAX_HIPOTESES_COMPLETAS)[:_MAX_HIPOTESES_COMPLETAS]
+    else:
+        finalistas = np.arange(n)
+    custo = _pontuar(modelo, [h[finalistas] for h in hipoteses], distancias, fator)
+    return int(finalistas[np.argmin(custo)])
+
+
+def _atribuir(previstos, pontos, limite):
+    """Um-para-um guloso: pares (ponto do modelo, candidato) em ordem de distância, até o limite."""
+    d = np.hypot(previstos[:, None, 0] - pontos[None, :, 0], previstos[:, None, 1] - pontos[None, :, 1])
+    atribuicao = np.full(len(previstos), -1, np.intp)
+    usados = np.zeros(len(pontos), bool)
+    for k in np.argsort(d, axis=None, kind="stable"):
+        i, j = divmod(int(k), len(pontos))
+        if d[i, j] > limite:
+            break
+        if atribuicao[i] < 0 and not usados[j]:
+            atribuicao[i] = j
+            usados[j] = True
+    return atribuicao, d
+
+
+def _ajustar(modelo, pontos, atribuicao, m):
+    """Mínimos quadrados de (x0, y0, s) com o espelhamento m fixo."""
+    i = np.flatnonzero(atribuicao >= 0)
+    u, v = modelo.uv[i].T
+    alvo = pontos[atribuicao[i]]
+    uns, zeros = np.ones(len(i)), np.zeros(len(i))
+    # x = x0 + m*s*u ; y = y0 + s*v
+    a = np.concatenate([np.stack([uns, zeros, m * u], 1), np.stack([zeros, uns, v], 1)])
+    (x0, y0, s), *_ = np.linalg.lstsq(a, np.concatenate([alvo[:, 0], alvo[:, 1]]), rcond=None)
+    return x0, y0, s
+
+
+def atribuir_marcadores(candidatos, vista, forma):
+    """
+    candidatos: [(x, y, raio)] em pixels; forma: (altura, largura) da imagem.
+    Retorna (pontos, confiancas) na ordem do modelo da vista; pontos sem candidato
+    ficam None, ou (None, None) se nenhuma transformação encaixar.
+    """
+    modelo = MODELOS[vista]
+    if len(candidatos) < 2:
+        return None, None
+    dados = np.asarray(candidatos, np.float64)
+    pontos, raios = dados[:, :2], np.maximum(dados[:, 2], 1.0)
+
+    x0, y0, s, m = hipoteses = _hipoteses(modelo, pontos, raios, forma)
+    if not len(s):
+        return None, None
+    distancias, fator = _grade_distancias(pontos, forma)
+    melhor = _melhor_hipotese(modelo, hipoteses, distancias, fator)
+    x0, y0, s, m = x0[melhor], y0[melhor], s[melhor], m[melhor]
+
+    for _ in range(2):
+        tolerancia = ATRIBUICAO_TOLERANCIA * s
+        previstos = modelo.prever(x0, y0, s, m)
+        atribuicao, d = _atribuir(previstos, pontos, 3 * tolerancia)
+        if (atribuicao >= 0).sum() < _MINIMO_ATRIBUIDOS:
+            return None, None
+        x0, y0, s = _ajustar(modelo, pontos, atribuicao, m)
+
+    tolerancia = ATRIBUICAO_TOLERANCIA * s
+    previstos = modelo.prever(x0, y0, s, m)
+    atribuicao, d = _atribuir(previstos, pontos, 3 * tolerancia)
+
+    # Confiança: proximidade do candidato escolhido x ausência de concorrente livre
+    livres = np.ones(len(pontos), bool)
+    livres[atribuicao[atribuicao >= 0]] = False
+    saida_pontos, confiancas = [], []
+    for i, j in enumerate(atribuicao):
+        if j < 0:
+            saida_pontos.append(None)
+            confiancas.append(0.0)
+            continue
+        perto = np.exp(-0.5 * (d[i, j] / tolerancia) ** 2)
+        concorrente = d[i, livres].min() if livres.any() else np.inf
+        isolado = 1 - np.exp(-0.5 * (concorrente / tolerancia) ** 2)
+        saida_pontos.append((int(pontos[j, 0]), int(pontos[j, 1])))
+        confiancas.append(round(float(perto * isolado), 3))
+    return saida_pontos, confiancas
+
+
+def marcadores_incertos(confiancas, nomes):
+    """Nomes dos pontos com confiança abaixo de ATRIBUICAO_CONFIANCA_MIN."""
+    return [nome for nome, c in zip(nomes, confiancas) if c < ATRIBUICAO_CONFIANCA_MIN]
@@ -1,84 +1,18 @@
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 import pymysql
-import os
+from app.banco import get_connection, executar_db, interpretar_data, interpretar_json
+from app.fotos import guardar_fotos, FotoInvalida, CAMPOS_FOTO
 
 pymysql.install_as_MySQLdb()
 router = APIRouter()
 
-# ✅ NOVA FUNÇÃO DE CONEXÃO (ÚNICA ALTERAÇÃO)
-def get_connection():
-    """Conecta ao banco usando variáveis de ambiente"""
-    try:
-        # Primeiro tenta variáveis de ambiente do Azure App Service
-        host = os.environ.get('DB_HOST')
-        user = os.environ.get('DB_USER')
-        password = os.environ.get('DB_PASSWORD')
-        database = os.environ.get('DB_NAME')
-        port = int(os.environ.get('DB_PORT', 3306))
-        
-        if all([host, user, password, database]):
-            # Conecta ao Azure
-            return pymysql.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                port=port,
-                ssl={'check_hostname': False}
-            )
-        else:
-            # Fallback para desenvolvimento local (.env)
-            from dotenv import load_dotenv
-            load_dotenv()
-            
-            return pymysql.connect(
-                host=os.getenv('LOCAL_DB_HOST', 'localhost'),
-                user=os.getenv('LOCAL_DB_USER', 'root'),
-                password=os.getenv('LOCAL_DB_PASSWORD', 'admin'),
-                database=os.getenv('LOCAL_DB_NAME', 'alignme')
-            )
-    except Exception as e:
-        print(f"❌ Erro na conexão: {e}")
-        raise
-
-# ✅ Função para criar a tabela automaticamente
-def criar_tabela():
-    try:
-        # ✅ ALTERADO: Usa a nova função get_connection()
-        conn = get_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS avaliacao_medica (
-                id_avaliacao INTEGER AUTO_INCREMENT PRIMARY KEY,
-                id_paciente INTEGER NOT NULL,
-                foto_frontal LONGTEXT,
-                foto_sagital LONGTEXT,
-                medidas_frontal TEXT,
-                medidas_sagital TEXT,
-                angulos_sagital TEXT,
-                altura DOUBLE,
-                resultado_avaliacao TEXT,
-                data_avaliacao TEXT NOT NULL
-            )
-            """)
-        conn.commit()
-        print("✅ Tabela 'avaliacao_medica' verificada/criada com sucesso.")
-    except Exception as e:
-        print("❌ Erro ao criar/verificar tabela:", e)
-    finally:
-        if conn.open:
-            conn.close()
-
-
-criar_tabela()
-
-
 @router.post("/cadastrar-avaliacao")
 async def cadastrar_avaliacao(request: Request):
     try:
         data = await request.json()
-        print("📦 Dados recebidos no backend:", data)
+        # As fotos têm vários MB em base64: ficam fora do log
+        print("📦 Dados recebidos no backend:", {k: v for k, v in data.items() if k not in CAMPOS_FOTO})
     except Exception as e:
         print("❌ Erro ao ler JSON:", e)
         raise HTTPException(status_code=400, detail="JSON inválido")
@@ -86,12 +20,13 @@ async def cadastrar_avaliacao(request: Request):
     id_paciente = data.get("id_paciente")
     foto_frontal = data.get("foto_frontal")
     foto_sagital = data.get("foto_sagital")
-    medidas_frontal = data.get("medidas_frontal")
-    medidas_sagital = data.get("medidas_sagital")
+    # Medidas e ângulos vão para colunas JSON: aceita objeto ou texto JSON
+    medidas_frontal = interpretar_json(data.get("medidas_frontal"))
+    medidas_sagital = interpretar_json(data.get("medidas_sagital"))
     altura = data.get("altura")
     resultado = data.get("resultado_avaliacao")
     data_avaliacao = data.get("data_avaliacao")
-    angulos_sagital = data.get("angulos_sagital")
+    angulos_sagital = interpretar_json(data.get("angulos_sagital"))
 
     # ✅ Converte altura para float se possível
     try:
@@ -107,32 +42,30 @@ async def cadastrar_avaliacao(request: Request):
             detail="Campos obrigatórios: id_paciente, foto_frontal, foto_sagital, data_avaliacao"
         )
 
-    # ✅ Inserção no banco de dados
     try:
-        # ✅ ALTERADO: Usa a nova função get_connection()
-        conn = get_connection()
-        
-        with conn.cursor() as cursor:
-           cursor.execute("""
-                INSERT INTO avaliacao_medica (
-                    id_paciente, foto_frontal, foto_sagital,
-                    medidas_frontal, medidas_sagital, angulos_sagital,
-                    altura, resultado_avaliacao, data_avaliacao
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                id_paciente,
-                foto_frontal,
-                foto_sagital,
-                medidas_frontal,
-                medidas_sagital,
-                angulos_sagital,   # ← NOVO
-                altura,
-                resultado,
-                data_avaliacao
-            ))
+        data_avaliacao = interpretar_data(data_avaliacao, com_hora=True)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="data_avaliacao inválida")
 
-        conn.commit()
+    # ✅ Fotos vão para o armazenamento de blobs; a tabela guarda só as referências
+    try:
+        foto_frontal, foto_sagital = await executar_db(guardar_fotos, foto_frontal, foto_sagital)
+    except FotoInvalida as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # ✅ Inserção no banco de dados
+    try:
+        await executar_db(inserir_avaliacao, (
+            id_paciente,
+            foto_frontal,
+            foto_sagital,
+            medidas_frontal,
+            medidas_sagital,
+            angulos_sagital,   # ← NOVO
+            altura,
+            resultado,
+            data_avaliacao
+        ))
         print("✅ Avaliação cadastrada com sucesso no banco!")
         return JSONResponse(content={"mensagem": "Avaliação cadastrada com sucesso!"})
 
@@ -140,10 +73,26 @@ async def cadastrar_avaliacao(request: Request):
         print("❌ Erro do MySQL:", err)
         raise HTTPException(status_code=500, detail=f"Erro MySQL: {err}")
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("❌ Erro inesperado:", e)
         raise HTTPException(status_code=500, detail=f"Erro interno: {e}")
 
+
+# Inserção (roda no executor do banco, fora do event loop)
+def inserir_avaliacao(valores):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO avaliacao_medica (
+                    id_paciente, foto_frontal, foto_sagital,
+                    medidas_frontal, medidas_sagital, angulos_sagital,
+                    altura, resultado_avaliacao, data_avaliacao
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, valores)
+        conn.commit()
     finally:
-        if conn.open:
-            conn.close()
\ No newline at end of file
+        conn.close()
@@ -0,0 +1,518 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as hora, timezone
+import ast
+import asyncio
+import base64
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+from fastapi import APIRouter, HTTPException, status
+import orjson
+import pymysql
+from pymysql.constants import SERVER_STATUS
+from app.metricas import etapa, Histograma, registrar_coletor, CursorCronometrado, SSDictCursorCronometrado
+
+pymysql.install_as_MySQLdb()
+router = APIRouter()
+
+# ---------------------------
+# Conexão com o banco (Azure pelas variáveis DB_*, senão MySQL local pelo .env)
+# ---------------------------
+def parametros_conexao():
+    host = os.environ.get('DB_HOST')
+    user = os.environ.get('DB_USER')
+    password = os.environ.get('DB_PASSWORD')
+    database = os.environ.get('DB_NAME')
+    port = int(os.environ.get('DB_PORT', 3306))
+
+    if all([host, user, password, database]):
+        # Azure App Service
+        return {
+            "host": host,
+            "user": user,
+            "password": password,
+            "database": database,
+            "port": port,
+            "ssl": {'check_hostname': False},
+        }
+
+    # Fallback para desenvolvimento local (.env)
+    from dotenv import load_dotenv
+    load_dotenv()
+    return {
+        "host": os.getenv('LOCAL_DB_HOST', 'localhost'),
+        "user": os.getenv('LOCAL_DB_USER', 'root'),
+        "password": os.getenv('LOCAL_DB_PASSWORD', 'admin'),
+        "database": os.getenv('LOCAL_DB_NAME', 'tccalignme'),
+        "port": int(os.getenv('LOCAL_DB_PORT', 3306)),
+    }
+
+
+def conectar():
+    """Abre uma conexão nova (usada pelo pool; pymysql.connect pode ser trocado em testes)."""
+    try:
+        return pymysql.connect(**parametros_conexao(), cursorclass=CursorCronometrado)
+    except Exception as e:
+        print(f"❌ Erro na conexão: {e}")
+        raise
+
+
+# ---------------------------
+# Pool de conexões
+# ---------------------------
+# Abrir uma conexão TLS com o Azure custa vários round-trips; o pool mantém até
+# DB_POOL_TAMANHO conexões abertas e as reaproveita entre requisições.
+# - Quem pede uma conexão com o pool cheio espera até DB_POOL_TIMEOUT segundos (503 depois).
+# - Conexões paradas há mais de DB_POOL_PING_APOS segundos recebem um ping antes de voltar
+#   ao uso (o servidor ou o gateway derrubam conexões ociosas); se falhar, abre outra.
+# - Conexões com mais de DB_POOL_RECICLAR segundos de vida são fechadas e trocadas.
+# - Na devolução, uma transação aberta (inclusive a de um SELECT) é desfeita, para a
+#   próxima requisição não ler um snapshot antigo nem herdar escrita pela metade.
+DB_POOL_TAMANHO = int(os.environ.get("DB_POOL_TAMANHO", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+DB_POOL_PING_APOS = float(os.environ.get("DB_POOL_PING_APOS", 30))
+DB_POOL_RECICLAR = float(os.environ.get("DB_POOL_RECICLAR", 1800))
+
+
+class PoolEsgotado(Exception):
+    pass
+
+
+class ConexaoDoPool:
+    """
+    Conexão emprestada do pool: repassa tudo à conexão do pymysql, mas close() a
+    devolve ao pool em vez de fechá-la. Se for esquecida sem close(), a vaga é
+    liberada quando o objeto é coletado.
+    """
+
+    def __init__(self, pool, conn, criada_em, cursorclass):
+        self._pool = pool
+        self._conn = conn
+        self._criada_em = criada_em
+        self._cursorclass = cursorclass
+
+    def cursor(self, cursor=None):
+        return self._conn.cursor(cursor or self._cursorclass)
+
+    @property
+    def open(self):
+        return self._conn is not None and self._conn.open
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.devolver(conn, self._criada_em)
+
+    def descartar(self):
+        """Fecha a conexão em vez de devolvê-la (ex.: SSCursor abandonado no meio do resultado)."""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.devolver(conn, self._criada_em, descartar=True)
+
+    def __getattr__(self, nome):
+        if self._conn is None:
+            raise pymysql.err.InterfaceError("Conexão já devolvida ao pool")
+        return getattr(self._conn, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if self._conn is not None:
+            self._pool.devolver(self._conn, self._criada_em, descartar=True)
+            self._conn = None
+
+
+class PoolConexoes:
+    def __init__(self, criar, tamanho=10, timeout=5.0, ping_apos=30.0, reciclar=1800.0):
+        self.criar = criar
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.ping_apos = ping_apos
+        self.reciclar = reciclar
+        self._ociosas = deque()  # (conexão, criada_em, devolvida_em); a mais recente no fim
+        self._em_uso = 0
+        self._esperando = 0
+        self._cond = threading.Condition()
+        self.criadas = 0
+        self.recicladas = 0
+        self.falhas_ping = 0
+        self.descartadas = 0
+        self.esgotamentos = 0
+        self.espera = Histograma(
+            "alignme_db_pool_espera_segundos", "Espera por uma conexão livre no pool.",
+            buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+        )
+
+    def obter(self, cursorclass=CursorCronometrado):
+        inicio = time.perf_counter()
+        limite = time.monotonic() + self.timeout
+        with self._cond:
+            self._esperando += 1
+            try:
+                while self._em_uso >= self.tamanho:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self.esgotamentos += 1
+                        raise PoolEsgotado(f"Nenhuma conexão livre em {self.timeout:g} s")
+                    self._cond.wait(restante)
+            finally:
+                self._esperando -= 1
+            self._em_uso += 1
+            ociosa = self._ociosas.pop() if self._ociosas else None
+        self.espera.observar(time.perf_counter() - inicio, pool="mysql")
+
+        try:
+            conn, criada_em = self._validar(ociosa) if ociosa else (None, None)
+            if conn is None:
+                conn, criada_em = self.criar(), time.monotonic()
+                self._contar("criadas")
+        except BaseException:
+            self._liberar_vaga()
+            raise
+        return ConexaoDoPool(self, conn, criada_em, cursorclass)
+
+    def _validar(self, ociosa):
+        """Conexão ociosa pronta para uso, ou (None, None) se precisar abrir outra."""
+        conn, criada_em, devolvida_em = ociosa
+        agora = time.monotonic()
+        if agora - criada_em > self.reciclar:
+            self._contar("recicladas")
+            self._fechar(conn)
+            return None, None
+        if agora - devolvida_em > self.ping_apos:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._contar("falhas_ping")
+                self._fechar(conn)
+                return None, None
+        return conn, criada_em
+
+    def devolver(self, conn, criada_em, descartar=False):
+        if not descartar and conn.open:
+            try:
+                if getattr(conn, "server_status", 0) & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    conn.rollback()
+            except Exception:
+                descartar = True
+        else:
+            descartar = True
+
+        if descartar:
+            self._fechar(conn)
+        with self._cond:
+            if descartar:
+                self.descartadas += 1
+            else:
+                self._ociosas.append((conn, criada_em, time.monotonic()))
+            self._em_uso -= 1
+            self._cond.notify()
+
+    def _contar(self, contador):
+        with self._cond:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def _liberar_vaga(self):
+        with self._cond:
+            self._em_uso -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _fechar(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def fechar_ociosas(self):
+        with self._cond:
+            ociosas, self._ociosas = list(self._ociosas), deque()
+        for conn, _, _ in ociosas:
+            self._fechar(conn)
+
+    def estatisticas(self):
+        with self._cond:
+            return {
+                "tamanho": self.tamanho,
+                "em_uso": self._em_uso,
+                "ociosas": len(self._ociosas),
+                "esperando": self._esperando,
+                "criadas": self.criadas,
+                "recicladas": self.recicladas,
+                "falhas_ping": self.falhas_ping,
+                "descartadas": self.descartadas,
+                "esgotamentos": self.esgotamentos,
+            }
+
+
+pool = PoolConexoes(
+    conectar,
+    tamanho=DB_POOL_TAMANHO,
+    timeout=DB_POOL_TIMEOUT,
+    ping_apos=DB_POOL_PING_APOS,
+    reciclar=DB_POOL_RECICLAR,
+)
+
+
+@etapa("db_conexao")
+def get_connection(cursorclass=CursorCronometrado):
+    """
+    Conexão do pool; close() (ou o fim do bloco with) a devolve. Com o pool esgotado
+    levanta HTTPException 503 com Retry-After: as rotas que tratam erros do banco com
+    `except Exception` a repassam antes (`except HTTPException: raise`), sem virar 500.
+    """
+    try:
+        return pool.obter(cursorclass)
+    except PoolEsgotado as e:
+        print(f"❌ Pool de conexões esgotado: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados ocupado, tente novamente",
+            headers={"Retry-After": "1"},
+        )
+
+
+# ---------------------------
+# Acesso ao banco fora do event loop
+# ---------------------------
+# O pymysql bloqueia a thread durante a consulta. As rotas async passam o trabalho com o
+# banco (e o bcrypt, que também é lento) para executar_db, que roda numa thread de um
+# executor com DB_THREADS threads. Com DB_THREADS igual ao tamanho do pool, toda thread
+# ocupada tem uma conexão disponível: o excesso de requisições espera na fila do executor
+# sem prender threads nem o event loop. O contexto (cronômetro da requisição) acompanha
+# a função, então db_conexao/db_consulta continuam no Server-Timing.
+DB_THREADS = int(os.environ.get("DB_THREADS", DB_POOL_TAMANHO))
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="banco")
+    return _executor
+
+
+def encerrar_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+    pool.fechar_ociosas()
+
+
+async def executar_db(fn, *args, **kwargs):
+    """Executa fn(*args, **kwargs) numa thread do executor do banco, com o contexto atual."""
+    loop = asyncio.get_running_loop()
+    contexto = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(contexto.run, fn, *args, **kwargs))
+
+
+# ---------------------------
+# Listagens em streaming (NDJSON) com cursor do servidor
+# ---------------------------
+# Com SSCursor o MySQL envia as linhas conforme são lidas, em vez de o pymysql carregar o
+# resultado inteiro: cada lote de DB_STREAM_LOTE linhas é lido numa thread do executor,
+# vira NDJSON (uma linha JSON por registro) e já sai para o cliente. A memória fica
+# constante e o primeiro byte sai logo. A conexão fica presa à transmissão até o fim;
+# se o cliente desistir no meio, ela é fechada (o resto do resultado não é lido).
+DB_STREAM_LOTE = int(os.environ.get("DB_STREAM_LOTE", 500))
+# Cliente lento: o servidor espera até este tempo (s) para enviar cada pacote. Vale só
+# durante a transmissão: no fim do resultado a sessão volta ao padrão do servidor antes de a
+# conexão voltar ao pool (uma transmissão interrompida descarta a conexão).
+DB_STREAM_TIMEOUT = int(os.environ.get("DB_STREAM_TIMEOUT", 600))
+
+
+def _abrir_stream(query, args):
+    conn = get_connection(SSDictCursorCronometrado)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION net_write_timeout = %s", (DB_STREAM_TIMEOUT,))
+        cursor.execute(query, args)
+    except BaseException:
+        conn.descartar()
+        raise
+    return conn, cursor
+
+
+def _lote_ndjson(cursor, lote):
+    linhas = cursor.fetchmany(lote)
+    if not linhas:
+        cursor.execute("SET SESSION net_write_timeout = DEFAULT")
+    return b"".join(orjson.dumps(linha, option=orjson.OPT_APPEND_NEWLINE) for linha in linhas)
+
+
+async def transmitir_ndjson(query, args=None, lote=None):
+    """
+    Executa a consulta e devolve um gerador assíncrono de blocos NDJSON para um
+    StreamingResponse. Erros ao conectar ou consultar (ex.: 503) saem daqui, antes de
+    a resposta começar.
+    """
+    conn, cursor = await executar_db(_abrir_stream, query, args)
+    return _gerar_ndjson(conn, cursor, lote or DB_STREAM_LOTE)
+
+
+async def _gerar_ndjson(conn, cursor, lote):
+    futuro, completo = None, False
+    try:
+        while True:
+            futuro = get_executor().submit(contextvars.copy_context().run, _lote_ndjson, cursor, lote)
+            bloco = await asyncio.wrap_future(futuro)
+            if not bloco:
+                completo = True
+                return
+            yield bloco
+    finally:
+        if completo:
+            conn.close()
+        elif futuro is None:
+            conn.descartar()
+        else:
+            # Um lote ainda pode estar sendo lido na thread: fecha quando ele terminar
+            futuro.add_done_callback(lambda _: conn.descartar())
+
+
+# ---------------------------
+# Paginação por chave (keyset)
+# ---------------------------
+# Em vez de OFFSET (que lê e descarta todas as linhas anteriores), a próxima página começa
+# depois da chave de ordenação da última linha devolvida: "WHERE (data, id) < (...)" usa o
+# índice e custa o mesmo na primeira página e na centésima. O cursor entregue ao cliente
+# é essa chave em JSON, codificada em base64 url-safe; o cliente só o devolve.
+def codificar_cursor(*valores):
+    texto = json.dumps([v if isinstance(v, (int, float)) or v is None else str(v) for v in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, quantidade):
+    """Valores da chave guardados no cursor; ValueError se ele não veio de codificar_cursor."""
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise ValueError("Cursor inválido")
+    # Só valores simples, como codificar_cursor gera: uma lista ou objeto iria para o SQL
+    if not all(v is None or isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in valores):
+        raise ValueError("Cursor inválido")
+    return valores
+
+
+LISTAGEM_PAGINA = int(os.environ.get("LISTAGEM_PAGINA", 50))
+LISTAGEM_PAGINA_MAX = int(os.environ.get("LISTAGEM_PAGINA_MAX", 500))
+
+
+def limite_pagina(limite, padrao, maximo):
+    """Tamanho de página pedido, entre 1 e `maximo` (padrão quando ausente)."""
+    if limite is None:
+        return padrao
+    if limite < 1:
+        raise ValueError("limite deve ser maior ou igual a 1")
+    return min(limite, maximo)
+
+
+# ---------------------------
+# Datas (colunas DATE/DATETIME)
+# ---------------------------
+# O frontend envia ISO ("1990-05-17", "2025-02-01T13:45:00.000Z"); cadastros antigos
+# também têm "17/05/1990" ou "01/02/2025, 13:45:00" (toLocaleString do navegador).
+# Horários com fuso são guardados em UTC, sem o fuso.
+_FORMATOS_DATA = ("%d/%m/%Y", "%d-%m-%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y, %H:%M:%S")
+
+
+def interpretar_data(valor, com_hora=False):
+    """date (ou datetime, com_hora=True) a partir do texto; ValueError se não reconhecer."""
+    if isinstance(valor, datetime):
+        d = valor
+    elif isinstance(valor, date):
+        d = datetime.combine(valor, hora())
+    else:
+        texto = str(valor).strip()
+        try:
+            d = datetime.fromisoformat(texto.replace("Z", "+00:00"))
+        except ValueError:
+            for formato in _FORMATOS_DATA:
+                try:
+                    d = datetime.strptime(texto, formato)
+                    break
+                except ValueError:
+                    pass
+            else:
+                raise ValueError(f"Data inválida: {valor!r}")
+    if d.tzinfo is not None:
+        d = d.astimezone(timezone.utc).replace(tzinfo=None)
+    return d if com_hora else d.date()
+
+
+# ---------------------------
+# JSON (colunas de medidas)
+# ---------------------------
+# As medidas ficam em colunas JSON. Linhas gravadas antes disso podem ter texto em repr
+# Python ("{'a': 1}", lido antes com eval): ler_json aceita os dois, sem executar nada
+# (ast.literal_eval), e devolve o texto como está se não for nenhum dos dois.
+def ler_json(texto):
+    if texto is None or texto == "":
+        return None
+    try:
+        return orjson.loads(texto)
+    except orjson.JSONDecodeError:
+        pass
+    try:
+        return ast.literal_eval(texto)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return texto
+
+
+def interpretar_json(valor):
+    """Texto JSON para gravar numa coluna JSON (objeto, texto JSON ou repr Python)."""
+    if isinstance(valor, (str, bytes)):
+        valor = ler_json(valor)
+    if valor is None:
+        return None
+    try:
+        return orjson.dumps(valor, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    except TypeError:  # ex.: set vindo de um repr antigo
+        return orjson.dumps(str(valor)).decode()
+
+
+def modo_listagem(accept, formato=None, limite=None, cursor=None):
+    """
+    Modo das listagens de cadastro: "ndjson" (formato=ndjson ou Accept
+    application/x-ndjson), "pagina" (com limite ou cursor) ou "completa" (lista inteira,
+    como antes, para os clientes atuais).
+    """
+    if formato not in (None, "json", "ndjson"):
+        raise HTTPException(status_code=400, detail="formato deve ser json ou ndjson")
+    if formato == "ndjson" or (formato is None and "application/x-ndjson" in (accept or "")):
+        return "ndjson"
+    if limite is not None or cursor is not None:
+        return "pagina"
+    return "completa"
+
+
+@router.get("/banco/pool/estatisticas")
+def estatisticas_pool():
+    return pool.estatisticas()
+
+
+@registrar_coletor
+def metricas_pool():
+    e = pool.estatisticas()
+    linhas = []
+    for nome, tipo in (
+        ("tamanho", "gauge"), ("em_uso", "gauge"), ("ociosas", "gauge"), ("esperando", "gauge"),
+        ("criadas", "counter"), ("recicladas", "counter"), ("falhas_ping", "counter"),
+        ("descartadas", "counter"), ("esgotamentos", "counter"),
+    ):
+        metrica = f"alignme_db_pool_{nome}" + ("_total" if tipo == "counter" else "")
+        linhas += [f"# TYPE {metrica} {tipo}", f"{metrica} {e[nome]}"]
+    return linhas + pool.espera.exportar()
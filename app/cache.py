@@ -0,0 +1,168 @@
+from collections import OrderedDict
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+from fastapi import APIRouter
+from app.processamento import executar, analisar_frontal, analisar_sagital, campos_imagem, MODO_DETECCAO, SAIDA_PADRAO
+from app.metricas import etapa, cronometro_atual, registrar_coletor
+
+router = APIRouter()
+
+
+# ---------------------------
+# Cache LRU com limite de itens, de bytes e validade (TTL)
+# ---------------------------
+# ttl=None: sem validade (sai só por LRU); ttl <= 0: nada é guardado (cache desligado).
+class CacheLRU:
+    def __init__(self, max_itens=256, max_bytes=None, ttl=None):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave -> (expira_em, tamanho, valor)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] is not None and item[0] <= time.monotonic():
+                self._remover(chave)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[2]
+
+    def set(self, chave, valor, tamanho=0):
+        if self.max_bytes is not None and tamanho > self.max_bytes:
+            return
+        if self.ttl is not None and self.ttl <= 0:
+            return
+        expira_em = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (expira_em, tamanho, valor)
+            self._bytes += tamanho
+            while self._itens and (
+                len(self._itens) > self.max_itens
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remover(next(iter(self._itens)))
+                self.evictions += 1
+
+    def delete(self, chave):
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "max_itens": self.max_itens,
+                "max_bytes": self.max_bytes,
+                "ttl_segundos": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0,
+            }
+
+
+# ---------------------------
+# Cache das análises de imagem (pontos detectados + imagem anotada), por hash do arquivo.
+# As medidas dependem da referência e são recalculadas a cada requisição a partir dos pontos.
+# ---------------------------
+CACHE_ANALISES_MAX_ITENS = int(os.environ.get("CACHE_ANALISES_MAX_ITENS", 128))
+CACHE_ANALISES_MAX_MB = int(os.environ.get("CACHE_ANALISES_MAX_MB", 256))
+CACHE_ANALISES_TTL = int(os.environ.get("CACHE_ANALISES_TTL", 1800))
+
+cache_analises = CacheLRU(
+    max_itens=CACHE_ANALISES_MAX_ITENS,
+    max_bytes=CACHE_ANALISES_MAX_MB * 1024 * 1024,
+    ttl=CACHE_ANALISES_TTL,
+)
+
+_ANALISADORES = {
+    "frontal": analisar_frontal,
+    "sagital": analisar_sagital,
+}
+
+
+def hash_imagem(contents):
+    return hashlib.sha256(contents).hexdigest()
+
+
+async def analisar_imagem(vista, contents, saida=None):
+    """analisar_frontal/analisar_sagital no pool, reaproveitando o resultado de uploads idênticos."""
+    saida = saida or SAIDA_PADRAO
+    # hashlib libera o GIL em buffers grandes: calcula fora do event loop
+    with etapa("hash"):
+        digest = await asyncio.to_thread(hash_imagem, contents)
+    chave = (digest, vista, tuple(sorted(saida.items())), MODO_DETECCAO)
+
+    analise = cache_analises.get(chave)
+    if analise is not None:
+        return analise
+
+    fn = _ANALISADORES[vista]
+    with etapa("pool"):
+        if vista == "frontal":
+            analise = await executar(fn, contents, False, saida)
+        else:
+            analise = await executar(fn, contents, saida)
+
+    if analise is not None:
+        registrar_tempos_pool(analise.pop("tempos", {}))
+        tamanho = sum(len(v) for v in campos_imagem(analise).values()) + 16 * len(analise["pontos"])
+        cache_analises.set(chave, analise, tamanho=tamanho)
+    return analise
+
+
+def registrar_tempos_pool(tempos):
+    """Junta ao cronômetro da requisição as etapas medidas dentro do worker."""
+    crono = cronometro_atual()
+    if crono is not None:
+        crono.mesclar(tempos)
+
+
+@router.get("/cache-analises/estatisticas")
+def estatisticas_cache_analises():
+    return cache_analises.estatisticas()
+
+
+@registrar_coletor
+def metricas_cache_analises():
+    e = cache_analises.estatisticas()
+    return [
+        "# TYPE alignme_cache_analises_hits_total counter",
+        f"alignme_cache_analises_hits_total {e['hits']}",
+        "# TYPE alignme_cache_analises_misses_total counter",
+        f"alignme_cache_analises_misses_total {e['misses']}",
+        "# TYPE alignme_cache_analises_evictions_total counter",
+        f"alignme_cache_analises_evictions_total {e['evictions']}",
+        "# TYPE alignme_cache_analises_itens gauge",
+        f"alignme_cache_analises_itens {e['itens']}",
+        "# TYPE alignme_cache_analises_bytes gauge",
+        f"alignme_cache_analises_bytes {e['bytes']}",
+    ]
@@ -0,0 +1,202 @@
+import os
+import threading
+
+from fastapi import APIRouter
+from app.banco import executar_db
+from app.cache import CacheLRU
+from app.metricas import registrar_coletor
+
+router = APIRouter()
+
+# ---------------------------
+# Cache das listagens de cadastro (pacientes, médicos)
+# ---------------------------
+# As listas só mudam quando alguém cadastra; até lá, a mesma consulta ao Azure se repete
+# a cada carregamento de página. listagem_em_cache guarda o corpo JSON já serializado
+# de cada consulta (lista inteira ou página) e as rotas de cadastro chamam
+# invalidar_listagem depois de gravar.
+#
+# A invalidação é por geração: cada lista tem um contador que entra na chave do cache,
+# e invalidar só o incrementa. As entradas antigas deixam de ser lidas e saem por LRU ou
+# TTL. Uma consulta que começou antes de um cadastro grava na geração antiga, então nunca
+# é servida como atual.
+#
+# Backends (CACHE_LISTAGENS_BACKEND):
+# - "memoria" (padrão): CacheLRU do processo, limitado em itens, bytes e TTL. Com vários
+#   workers, um cadastro só invalida o cache do worker que o recebeu; nos outros a lista
+#   pode ficar até CACHE_LISTAGENS_TTL segundos desatualizada.
+# - "redis": compartilhado entre workers e instâncias na rede local (pacote redis, não
+#   incluído no requirements.txt). O limite de memória é o maxmemory do servidor.
+#
+# CACHE_LISTAGENS=0 desliga o cache (toda listagem vai ao banco); CACHE_LISTAGENS_TTL=0 também
+# não guarda nada, mas ainda conta os misses.
+CACHE_LISTAGENS = os.environ.get("CACHE_LISTAGENS", "1") != "0"
+CACHE_LISTAGENS_BACKEND = os.environ.get("CACHE_LISTAGENS_BACKEND", "memoria")
+CACHE_LISTAGENS_TTL = int(os.environ.get("CACHE_LISTAGENS_TTL", 60))
+CACHE_LISTAGENS_MAX_ITENS = int(os.environ.get("CACHE_LISTAGENS_MAX_ITENS", 256))
+CACHE_LISTAGENS_MAX_MB = int(os.environ.get("CACHE_LISTAGENS_MAX_MB", 32))
+CACHE_LISTAGENS_REDIS_URL = os.environ.get("CACHE_LISTAGENS_REDIS_URL", "redis://localhost:6379/0")
+
+LISTAS = ("pacientes", "medicos")
+
+
+class CacheListagensMemoria:
+    bloqueante = False  # chamado direto no event loop
+
+    def __init__(self):
+        self._cache = CacheLRU(
+            max_itens=CACHE_LISTAGENS_MAX_ITENS,
+            max_bytes=CACHE_LISTAGENS_MAX_MB * 1024 * 1024,
+            ttl=CACHE_LISTAGENS_TTL,
+        )
+        self._geracoes = dict.fromkeys(LISTAS, 0)
+        self._lock = threading.Lock()
+
+    def geracao(self, lista):
+        return self._geracoes[lista]
+
+    def invalidar(self, lista):
+        with self._lock:
+            self._geracoes[lista] += 1
+
+    def get(self, chave):
+        return self._cache.get(chave)
+
+    def set(self, chave, corpo):
+        self._cache.set(chave, corpo, tamanho=len(corpo))
+
+    def estatisticas(self):
+        e = self._cache.estatisticas()
+        return {k: e[k] for k in ("itens", "bytes", "max_itens", "max_bytes", "evictions")}
+
+
+class CacheListagensRedis:
+    bloqueante = True  # E/S de rede: chamado numa thread do executor do banco
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_LISTAGENS_BACKEND=redis precisa do pacote redis (pip install redis)")
+        self._redis = redis.Redis.from_url(CACHE_LISTAGENS_REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._max_bytes = CACHE_LISTAGENS_MAX_MB * 1024 * 1024
+
+    def geracao(self, lista):
+        return int(self._redis.get(f"alignme:listagens:geracao:{lista}") or 0)
+
+    def invalidar(self, lista):
+        self._redis.incr(f"alignme:listagens:geracao:{lista}")
+
+    def get(self, chave):
+        return self._redis.get(chave)
+
+    def set(self, chave, corpo):
+        if CACHE_LISTAGENS_TTL > 0 and len(corpo) <= self._max_bytes:
+            self._redis.set(chave, corpo, ex=CACHE_LISTAGENS_TTL)
+
+    def estatisticas(self):
+        return {"url": CACHE_LISTAGENS_REDIS_URL.rpartition("@")[2]}  # sem a senha
+
+
+BACKENDS = {
+    "memoria": CacheListagensMemoria,
+    "redis": CacheListagensRedis,
+}
+
+_cache = None
+_contadores = {lista: dict.fromkeys(("hits", "misses", "invalidacoes", "erros"), 0) for lista in LISTAS}
+_lock_contadores = threading.Lock()
+
+
+def get_cache_listagens():
+    global _cache
+    if _cache is None:
+        if CACHE_LISTAGENS_BACKEND not in BACKENDS:
+            raise RuntimeError(f"CACHE_LISTAGENS_BACKEND desconhecido: {CACHE_LISTAGENS_BACKEND}")
+        _cache = BACKENDS[CACHE_LISTAGENS_BACKEND]()
+    return _cache
+
+
+def _contar(lista, contador):
+    with _lock_contadores:
+        _contadores[lista][contador] += 1
+
+
+async def _chamar(lista, fn, *args):
+    """Operação no cache; uma falha do backend vira miss (a listagem segue pelo banco)."""
+    try:
+        if get_cache_listagens().bloqueante:
+            return await executar_db(fn, *args)
+        return fn(*args)
+    except Exception as e:
+        print(f"⚠️ Cache de listagens indisponível: {e}")
+        _contar(lista, "erros")
+        return None
+
+
+async def listagem_em_cache(lista, gerar, *args):
+    """Corpo JSON (bytes) de gerar(*args), lido do cache ou gerado no executor do banco."""
+    if not CACHE_LISTAGENS:
+        return await executar_db(gerar, *args)
+    cache = get_cache_listagens()
+    geracao = await _chamar(lista, cache.geracao, lista)
+    if geracao is None:
+        _contar(lista, "misses")
+        return await executar_db(gerar, *args)
+
+    chave = f"alignme:listagens:{lista}:{geracao}:{args!r}"
+    corpo = await _chamar(lista, cache.get, chave)
+    if corpo is not None:
+        _contar(lista, "hits")
+        return corpo
+
+    _contar(lista, "misses")
+    corpo = await executar_db(gerar, *args)
+    await _chamar(lista, cache.set, chave, corpo)
+    return corpo
+
+
+async def invalidar_listagem(lista):
+    if not CACHE_LISTAGENS:
+        return
+    _contar(lista, "invalidacoes")
+    await _chamar(lista, get_cache_listagens().invalidar, lista)
+
+
+def _estatisticas_listas():
+    with _lock_contadores:
+        listas = {lista: dict(c) for lista, c in _contadores.items()}
+    for c in listas.values():
+        consultas = c["hits"] + c["misses"]
+        c["hit_rate"] = round(c["hits"] / consultas, 4) if consultas else 0.0
+    return listas
+
+
+@router.get("/cache-listagens/estatisticas")
+def estatisticas_cache_listagens():
+    return {
+        "ativo": CACHE_LISTAGENS,
+        "backend": CACHE_LISTAGENS_BACKEND,
+        "ttl_segundos": CACHE_LISTAGENS_TTL,
+        **get_cache_listagens().estatisticas(),
+        "listas": _estatisticas_listas(),
+    }
+
+
+@registrar_coletor
+def metricas_cache_listagens():
+    listas = _estatisticas_listas()
+    linhas = []
+    for contador in ("hits", "misses", "invalidacoes", "erros"):
+        metrica = f"alignme_cache_listagens_{contador}_total"
+        linhas.append(f"# TYPE {metrica} counter")
+        linhas += [f'{metrica}{{lista="{lista}"}} {c[contador]}' for lista, c in listas.items()]
+    if isinstance(_cache, CacheListagensMemoria):
+        e = _cache.estatisticas()
+        linhas += [
+            "# TYPE alignme_cache_listagens_itens gauge",
+            f"alignme_cache_listagens_itens {e['itens']}",
+            "# TYPE alignme_cache_listagens_bytes gauge",
+            f"alignme_cache_listagens_bytes {e['bytes']}",
+        ]
+    return linhas
@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# ---------------------------
+# Malha (grade de referência)
+# ---------------------------
+# A malha só depende do tamanho da imagem, do espaçamento e da espessura: as linhas e
+# colunas que ela cobre são calculadas uma vez por combinação e reaproveitadas. Aplicá-la
+# é uma atribuição vetorizada em vez de uma chamada cv2.line por linha da grade.
+@lru_cache(maxsize=32)
+def _faixas_malha(h, w, spacing, thickness):
+    # Desenha as linhas numa tira de 1 px: o resultado são exatamente as linhas/colunas
+    # que cv2.line pintaria na imagem inteira (as pontas arredondadas caem fora da imagem)
+    tira_h = np.zeros((h, 1), np.uint8)
+    for y in range(0, h, spacing):
+        cv2.line(tira_h, (0, y), (w, y), 255, thickness)
+    tira_v = np.zeros((1, w), np.uint8)
+    for x in range(0, w, spacing):
+        cv2.line(tira_v, (x, 0), (x, h), 255, thickness)
+    linhas = np.flatnonzero(tira_h[:, 0])
+    colunas = np.flatnonzero(tira_v[0])
+    linhas.flags.writeable = False
+    colunas.flags.writeable = False
+    return linhas, colunas
+
+
+def desenhar_malha(img, spacing=50, color=(200, 200, 200), thickness=1):
+    h, w = img.shape[:2]
+    linhas, colunas = _faixas_malha(h, w, spacing, thickness)
+    img[linhas, :] = color
+    img[:, colunas] = color
+    return img
+
+
+# ---------------------------
+# Pontos, rótulos e conexões (desenhados direto na imagem, sem cópia)
+# ---------------------------
+def desenhar_linhas_com_conexoes(img, pontos, nomes, conexoes):
+    for idx, ponto in enumerate(pontos):
+        if ponto is None:  # ponto do modelo não encontrado
+            continue
+        x, y = ponto
+        cv2.circle(img, (x, y), 8, (0, 255, 0), -1)
+        if idx < len(nomes):
+            cv2.putText(img, nomes[idx], (x + 10, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2, cv2.LINE_AA)
+    for i, j in conexoes:
+        if i < len(pontos) and j < len(pontos) and pontos[i] is not None and pontos[j] is not None:
+            cv2.line(img, pontos[i], pontos[j], (0, 255, 255), 2)
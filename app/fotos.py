@@ -0,0 +1,292 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from app.upload import identificar_formato
+
+router = APIRouter()
+
+# ---------------------------
+# Armazenamento das fotos das avaliações, endereçado pelo conteúdo
+# ---------------------------
+# As fotos chegam em base64 e ficavam inteiras em colunas LONGTEXT. Agora os bytes
+# decodificados vão para um armazenamento de blobs com chave = SHA-256 do conteúdo, e a
+# coluna guarda só a referência "sha256:<hex>" (71 caracteres). A mesma foto enviada
+# duas vezes vira um único arquivo.
+#
+# O backend é escolhido por FOTOS_BACKEND entre os registrados em BACKENDS; um backend
+# implementa guardar(dados) -> chave, existe(chave), tamanho(chave) e
+# ler_blocos(chave, tamanho_bloco), e opcionalmente verificar_persistente(), chamado antes
+# da migração. "local" (padrão) grava em FOTOS_DIR e também serve de substituto em
+# desenvolvimento e testes.
+#
+# Depois da migração o banco só guarda as referências: perder FOTOS_DIR é perder as
+# fotos. Por isso o caminho é absoluto (um relativo mudaria com o diretório de onde o
+# uvicorn é iniciado; o padrão fica dentro do projeto, não do diretório atual).
+FOTOS_BACKEND = os.environ.get("FOTOS_BACKEND", "local")
+FOTOS_DIR = os.path.abspath(os.environ.get(
+    "FOTOS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dados", "fotos"),
+))
+# Sistemas de arquivos que não sobrevivem ao contêiner/reinício: a migração recusa gravar neles
+SISTEMAS_EFEMEROS = ("tmpfs", "ramfs", "overlay", "aufs")
+FOTOS_BLOCO_BYTES = 256 * 1024
+
+PREFIXO_REFERENCIA = "sha256:"
+_CHAVE = re.compile(r"[0-9a-f]{64}")
+# Colunas de avaliacao_medica que guardam fotos
+CAMPOS_FOTO = ("foto_frontal", "foto_sagital")
+
+_TIPOS_MIDIA = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "bmp": "image/bmp",
+    "tiff": "image/tiff",
+}
+
+
+class FotoInvalida(ValueError):
+    pass
+
+
+class ArmazenamentoLocal:
+    """Blobs em arquivos raiz/ab/cd/<chave>; a gravação é atômica (temporário + rename)."""
+
+    def __init__(self, raiz=None):
+        self.raiz = raiz or FOTOS_DIR
+
+    def _caminho(self, chave):
+        return os.path.join(self.raiz, chave[:2], chave[2:4], chave)
+
+    def guardar(self, dados):
+        chave = hashlib.sha256(dados).hexdigest()
+        caminho = self._caminho(chave)
+        if os.path.exists(caminho):  # mesmo conteúdo: nada a gravar
+            return chave
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return chave
+
+    def existe(self, chave):
+        return os.path.exists(self._caminho(chave))
+
+    def tamanho(self, chave):
+        return os.path.getsize(self._caminho(chave))
+
+    def ler_blocos(self, chave, tamanho_bloco=FOTOS_BLOCO_BYTES):
+        with open(self._caminho(chave), "rb") as f:
+            while True:
+                bloco = f.read(tamanho_bloco)
+                if not bloco:
+                    return
+                yield bloco
+
+    def verificar_persistente(self):
+        """RuntimeError se a raiz não foi configurada ou está num sistema de arquivos efêmero."""
+        if "FOTOS_DIR" not in os.environ and self.raiz == FOTOS_DIR:
+            raise RuntimeError(
+                "Defina FOTOS_DIR apontando para um diretório persistente antes de migrar "
+                f"(padrão atual: {self.raiz})"
+            )
+        tipo = sistema_de_arquivos(self.raiz)
+        if tipo in SISTEMAS_EFEMEROS:
+            raise RuntimeError(
+                f"{self.raiz} está num sistema de arquivos {tipo}, que se perde com o contêiner: "
+                "monte um volume persistente em FOTOS_DIR"
+            )
+
+
+def sistema_de_arquivos(caminho, montagens="/proc/mounts"):
+    """Tipo do sistema de arquivos onde caminho (ou o ancestral existente) está; None se desconhecido."""
+    caminho = os.path.realpath(caminho)
+    try:
+        with open(montagens) as f:
+            pontos = [linha.split()[1:3] for linha in f if len(linha.split()) >= 3]
+    except OSError:
+        return None
+    melhor = None
+    for ponto, tipo in pontos:
+        ponto = ponto.replace("\\040", " ")
+        if caminho == ponto or caminho.startswith(ponto.rstrip("/") + "/"):
+            if melhor is None or len(ponto) > len(melhor[0]):
+                melhor = (ponto, tipo)
+    return melhor[1] if melhor else None
+
+
+BACKENDS = {
+    "local": ArmazenamentoLocal,
+}
+
+_armazenamento = None
+
+
+def get_armazenamento():
+    global _armazenamento
+    if _armazenamento is None:
+        if FOTOS_BACKEND not in BACKENDS:
+            raise RuntimeError(f"FOTOS_BACKEND desconhecido: {FOTOS_BACKEND}")
+        _armazenamento = BACKENDS[FOTOS_BACKEND]()
+    return _armazenamento
+
+
+# ---------------------------
+# Referências nas colunas de foto
+# ---------------------------
+def e_referencia(valor):
+    return isinstance(valor, str) and valor.startswith(PREFIXO_REFERENCIA)
+
+
+def chave_da_referencia(valor):
+    return valor[len(PREFIXO_REFERENCIA):]
+
+
+def decodificar_foto(valor):
+    """base64 puro ou data URL ("data:image/jpeg;base64,...") -> bytes."""
+    if valor.startswith("data:"):
+        valor = valor.partition(",")[2]
+    try:
+        dados = base64.b64decode(valor)
+    except (binascii.Error, ValueError):
+        raise FotoInvalida("Foto não está em base64")
+    if not dados:
+        raise FotoInvalida("Foto vazia")
+    return dados
+
+
+def guardar_foto(valor):
+    """Grava a foto (base64) no armazenamento e devolve a referência para a coluna."""
+    if not valor or e_referencia(valor):
+        return valor
+    return PREFIXO_REFERENCIA + get_armazenamento().guardar(decodificar_foto(valor))
+
+
+def guardar_fotos(*valores):
+    return [guardar_foto(v) for v in valores]
+
+
+def foto_base64(valor):
+    """Conteúdo em base64 de uma coluna de foto (referência ou base64 antigo)."""
+    if not e_referencia(valor):
+        return valor
+    return base64.b64encode(b"".join(get_armazenamento().ler_blocos(chave_da_referencia(valor)))).decode("ascii")
+
+
+# ---------------------------
+# Download: GET /fotos/{chave} (streaming, em blocos)
+# ---------------------------
+# A chave é o hash do conteúdo: a resposta nunca muda e pode ficar em cache para sempre.
+@router.get("/fotos/{chave}")
+def baixar_foto(chave: str, request: Request):
+    if _CHAVE.fullmatch(chave) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    return resposta_foto(chave, request)
+
+
+def resposta_foto(chave, request):
+    armazenamento = get_armazenamento()
+    if not armazenamento.existe(chave):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+
+    cabecalhos = {"ETag": f'"{chave}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == cabecalhos["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+
+    blocos = armazenamento.ler_blocos(chave)
+    primeiro = next(blocos, b"")
+    cabecalhos["Content-Length"] = str(armazenamento.tamanho(chave))
+
+    def gerar():
+        yield primeiro
+        yield from blocos
+
+    return StreamingResponse(gerar(), media_type=tipo_midia(primeiro), headers=cabecalhos)
+
+
+def tipo_midia(dados):
+    return _TIPOS_MIDIA.get(identificar_formato(dados[:16]), "application/octet-stream")
+
+
+def url_foto(valor):
+    """URL de download de uma referência; None para colunas vazias ou ainda em base64."""
+    return f"/fotos/{chave_da_referencia(valor)}" if e_referencia(valor) else None
+
+
+# ---------------------------
+# Migração das linhas antigas (base64 nas colunas) para o armazenamento
+# ---------------------------
+# Uso: python -m app.fotos migrar [--lote 20]
+# Percorre avaliacao_medica por id, em lotes pequenos (cada linha pode ter vários MB),
+# grava as fotos no armazenamento e troca as colunas pelas referências. Pode ser
+# interrompida e executada de novo: linhas já migradas são puladas e blobs repetidos
+# não são regravados. Depois, OPTIMIZE TABLE avaliacao_medica devolve o espaço ao disco.
+def migrar_fotos(lote=20, log=print):
+    from app.banco import get_connection
+    from app.metricas import DictCursorCronometrado
+
+    armazenamento = get_armazenamento()
+    if hasattr(armazenamento, "verificar_persistente"):
+        armazenamento.verificar_persistente()
+    log(f"Armazenamento: {FOTOS_BACKEND} ({getattr(armazenamento, 'raiz', '-')})")
+    ultimo_id, migradas = 0, 0
+    while True:
+        conn = get_connection(DictCursorCronometrado)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id_avaliacao, foto_frontal, foto_sagital
+                FROM avaliacao_medica
+                WHERE id_avaliacao > %s
+                  AND (foto_frontal NOT LIKE 'sha256:%%' OR foto_sagital NOT LIKE 'sha256:%%')
+                ORDER BY id_avaliacao
+                LIMIT %s
+            """, (ultimo_id, lote))
+            linhas = cursor.fetchall()
+            if not linhas:
+                break
+            for linha in linhas:
+                try:
+                    novos = {c: guardar_foto(linha[c]) for c in CAMPOS_FOTO if linha[c] and not e_referencia(linha[c])}
+                except FotoInvalida as e:
+                    log(f"⚠️ Avaliação {linha['id_avaliacao']} mantida como está: {e}")
+                    continue
+                if novos:
+                    atribuicoes = ", ".join(f"{c} = %s" for c in novos)
+                    cursor.execute(
+                        f"UPDATE avaliacao_medica SET {atribuicoes} WHERE id_avaliacao = %s",
+                        (*novos.values(), linha["id_avaliacao"]),
+                    )
+                    migradas += 1
+            conn.commit()
+            ultimo_id = linhas[-1]["id_avaliacao"]
+            log(f"… {migradas} avaliações migradas (até id {ultimo_id})")
+        finally:
+            conn.close()
+    log(f"✅ Migração concluída: {migradas} avaliações")
+    return migradas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Armazenamento das fotos das avaliações")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    migrar = sub.add_parser("migrar", help="move as fotos em base64 do banco para o armazenamento")
+    migrar.add_argument("--lote", type=int, default=20)
+    args = parser.parse_args()
+    try:
+        migrar_fotos(args.lote)
+    except RuntimeError as e:
+        parser.exit(1, f"❌ {e}\n")
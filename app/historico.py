@@ -1,55 +1,39 @@
+import asyncio
+import os
+
 from fastapi import APIRouter, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 import pymysql
-import os  # ← ADICIONADO
-import json  # ← ADICIONADO para substituir eval()
+from app.metricas import DictCursorCronometrado, etapa
+from app.banco import (
+    get_connection, executar_db, codificar_cursor, decodificar_cursor, limite_pagina, ler_json,
+)
+from app.fotos import (
+    foto_base64, decodificar_foto, e_referencia, chave_da_referencia, url_foto,
+    resposta_foto, tipo_midia, CAMPOS_FOTO, FotoInvalida,
+)
 
 pymysql.install_as_MySQLdb()
 router = APIRouter()
 
-# ✅ MESMA FUNÇÃO DE CONEXÃO DOS OUTROS ARQUIVOS
-def get_connection():
-    """Conecta ao banco usando variáveis de ambiente"""
+# As respostas do histórico são serializadas com orjson direto para bytes, sem o
+# jsonable_encoder do FastAPI percorrer cada medida (datas saem em ISO, como antes)
+@router.get("/historico/{id_paciente}")
+async def listar_avaliacoes(id_paciente: int):
     try:
-        # Primeiro tenta variáveis de ambiente do Azure App Service
-        host = os.environ.get('DB_HOST')
-        user = os.environ.get('DB_USER')
-        password = os.environ.get('DB_PASSWORD')
-        database = os.environ.get('DB_NAME')
-        port = int(os.environ.get('DB_PORT', 3306))
-        
-        if all([host, user, password, database]):
-            # Conecta ao Azure
-            return pymysql.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                port=port,
-                ssl={'check_hostname': False},
-                cursorclass=pymysql.cursors.DictCursor
-            )
-        else:
-            # Fallback para desenvolvimento local (.env)
-            from dotenv import load_dotenv
-            load_dotenv()
-            
-            return pymysql.connect(
-                host=os.getenv('LOCAL_DB_HOST', 'localhost'),
-                user=os.getenv('LOCAL_DB_USER', 'root'),
-                password=os.getenv('LOCAL_DB_PASSWORD', 'admin'),
-                database=os.getenv('LOCAL_DB_NAME', 'tccalignme'),
-                cursorclass=pymysql.cursors.DictCursor
-            )
-    except Exception as e:
-        print(f"❌ Erro na conexão: {e}")
+        avaliacoes = await executar_db(consultar_avaliacoes, id_paciente)
+    except HTTPException:
         raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    with etapa("resposta"):
+        return ORJSONResponse(avaliacoes)
 
-@router.get("/historico/{id_paciente}")
-async def listar_avaliacoes(id_paciente: int):
+
+# Consulta (roda no executor do banco, fora do event loop)
+def consultar_avaliacoes(id_paciente):
+    conn = get_connection(DictCursorCronometrado)
     try:
-        # ✅ ALTERADO: usa a nova função get_connection()
-        conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             SELECT 
@@ -69,22 +53,138 @@ async def listar_avaliacoes(id_paciente: int):
             ORDER BY data_avaliacao DESC
         """, (id_paciente,))
         resultados = cursor.fetchall()
+    finally:
+        conn.close()
+
+    for r in resultados:
+        # Fotos guardadas como referência voltam em base64, como antes (também em GET /fotos/{chave})
+        for campo in CAMPOS_FOTO:
+            r[campo] = foto_base64(r[campo])
+        converter_medidas(r)
+
+    return resultados
+
+
+# Medidas (colunas JSON) -> objetos; linhas anteriores à migração 4 também são lidas
+def converter_medidas(r):
+    for campo in ("medidas_frontal", "medidas_sagital", "angulos_sagital"):
+        r[campo] = ler_json(r[campo])
+
+
+# ---------------------------
+# Histórico resumido e paginado (sem as fotos)
+# ---------------------------
+# GET /historico/{id} devolve todas as avaliações com as duas fotos em base64: o tamanho
+# da resposta cresce com a vida inteira do paciente. O resumo devolve uma página de
+# avaliações (mais recentes primeiro) só com dados e medidas, e a URL de cada foto, que
+# o cliente baixa quando for exibi-la. A página seguinte vem do cursor "proximo"
+# (paginação por chave em data_avaliacao, com id_avaliacao para desempatar).
+HISTORICO_PAGINA = int(os.environ.get("HISTORICO_PAGINA", 20))
+HISTORICO_PAGINA_MAX = int(os.environ.get("HISTORICO_PAGINA_MAX", 100))
+
+_VISTAS_FOTO = {"frontal": "foto_frontal", "sagital": "foto_sagital"}
+
+
+@router.get("/historico/{id_paciente}/resumo")
+async def resumir_avaliacoes(id_paciente: int, limite: int = None, cursor: str = None):
+    try:
+        limite = limite_pagina(limite, HISTORICO_PAGINA, HISTORICO_PAGINA_MAX)
+        apos = decodificar_cursor(cursor, 2) if cursor else None
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    try:
+        resumo = await executar_db(consultar_resumo, id_paciente, limite, apos)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    with etapa("resposta"):
+        return ORJSONResponse(resumo)
+
+
+# Consulta (roda no executor do banco, fora do event loop)
+def consultar_resumo(id_paciente, limite, apos=None):
+    # Das colunas de foto só sai a referência ('base64' nas linhas antigas): o conteúdo
+    # não atravessa a rede
+    filtro, parametros = "", [id_paciente]
+    if apos is not None:
+        filtro = "AND (data_avaliacao < %s OR (data_avaliacao = %s AND id_avaliacao < %s))"
+        parametros += [apos[0], apos[0], apos[1]]
+    conn = get_connection(DictCursorCronometrado)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT
+            id_avaliacao,
+            id_paciente,
+            CASE WHEN foto_frontal LIKE 'sha256:%%' THEN foto_frontal WHEN foto_frontal <> '' THEN 'base64' END AS foto_frontal,
+            CASE WHEN foto_sagital LIKE 'sha256:%%' THEN foto_sagital WHEN foto_sagital <> '' THEN 'base64' END AS foto_sagital,
+            medidas_frontal,
+            medidas_sagital,
+            angulos_sagital,
+            altura,
+            resultado_avaliacao,
+            data_avaliacao
+            FROM avaliacao_medica
+            WHERE id_paciente = %s {filtro}
+            ORDER BY data_avaliacao DESC, id_avaliacao DESC
+            LIMIT %s
+        """, (*parametros, limite + 1))
+        resultados = cursor.fetchall()
+    finally:
         conn.close()
 
-        # Converter medidas JSON para objeto
-        for r in resultados:
-            try:
-                if r["medidas_frontal"]:
-                    r["medidas_frontal"] = eval(r["medidas_frontal"])  # ou json.loads()
-                if r["medidas_sagital"]:
-                    r["medidas_sagital"] = eval(r["medidas_sagital"])
-                if r["angulos_sagital"]:
-                    r["angulos_sagital"] = eval(r["angulos_sagital"])
-            except Exception:
-                r["medidas_frontal"] = []
-                r["medidas_sagital"] = []
-
-        return resultados
+    proximo = None
+    if len(resultados) > limite:
+        resultados = resultados[:limite]
+        ultimo = resultados[-1]
+        proximo = codificar_cursor(ultimo["data_avaliacao"], ultimo["id_avaliacao"])
+
+    for r in resultados:
+        r["fotos"] = {
+            vista: url_foto(r[campo]) or (f"/avaliacoes/{r['id_avaliacao']}/fotos/{vista}" if r[campo] else None)
+            for vista, campo in _VISTAS_FOTO.items()
+        }
+        for campo in CAMPOS_FOTO:
+            del r[campo]
+        converter_medidas(r)
+
+    return {"avaliacoes": resultados, "proximo": proximo}
 
+
+# ---------------------------
+# Foto de uma avaliação (para as URLs do resumo)
+# ---------------------------
+# Referências vão para o armazenamento (mesma resposta de GET /fotos/{chave}); linhas
+# ainda não migradas têm o base64 decodificado aqui.
+@router.get("/avaliacoes/{id_avaliacao}/fotos/{vista}")
+async def baixar_foto_avaliacao(id_avaliacao: int, vista: str, request: Request):
+    if vista not in _VISTAS_FOTO:
+        return JSONResponse(content={"error": "vista deve ser frontal ou sagital"}, status_code=400)
+    try:
+        valor = await executar_db(consultar_foto, id_avaliacao, _VISTAS_FOTO[vista])
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    if not valor:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    if e_referencia(valor):
+        # existe/tamanho/primeiro bloco leem o armazenamento: fora do event loop
+        return await asyncio.to_thread(resposta_foto, chave_da_referencia(valor), request)
+    try:
+        dados = await executar_db(decodificar_foto, valor)
+    except FotoInvalida as e:
+        return JSONResponse(content={"error": f"Foto gravada está corrompida: {e}"}, status_code=422)
+    return Response(content=dados, media_type=tipo_midia(dados))
+
+
+def consultar_foto(id_avaliacao, coluna):
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT {coluna} FROM avaliacao_medica WHERE id_avaliacao = %s", (id_avaliacao,))
+            linha = cursor.fetchone()
+    finally:
+        conn.close()
+    return linha[0] if linha else None
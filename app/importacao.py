@@ -0,0 +1,246 @@
+import asyncio
+import csv
+import io
+import os
+import re
+
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException
+from fastapi.responses import JSONResponse
+import orjson
+import pymysql
+from app.banco import get_connection, executar_db, interpretar_data
+from app.pacientes import normalizar_cpf, validar_cpfs
+from app.cache_listagens import invalidar_listagem
+from app.upload import ler_upload
+from app.metricas import etapa
+
+router = APIRouter()
+
+# ---------------------------
+# Importação de pacientes em lote (CSV ou JSONL)
+# ---------------------------
+# Para cadastrar uma clínica inteira sem milhares de POST /cadastrar-paciente:
+# 1. o arquivo é lido e cada registro conferido (campos obrigatórios, data, números);
+# 2. os CPFs são validados todos de uma vez (validar_cpfs, em NumPy) e os repetidos no
+#    próprio arquivo são recusados;
+# 3. os válidos entram em transações de IMPORTACAO_LOTE linhas, cada uma com um único
+#    executemany (o pymysql o transforma num INSERT de várias linhas). CPFs já
+#    cadastrados são separados antes; se mesmo assim um lote falhar (cadastro
+#    simultâneo), ele é desfeito e refeito linha a linha para apontar qual falhou.
+# A resposta diz quantos entraram e traz o erro de cada linha recusada.
+IMPORTACAO_MAX_MB = float(os.environ.get("IMPORTACAO_MAX_MB", 20))
+IMPORTACAO_LOTE = int(os.environ.get("IMPORTACAO_LOTE", 500))
+IMPORTACAO_MAX_ERROS = int(os.environ.get("IMPORTACAO_MAX_ERROS", 1000))
+
+COLUNAS = (
+    "cpf", "nome", "data_nascimento", "peso", "raca", "profissao",
+    "telefone", "tipo_corporal", "idade", "sexo",
+)
+OBRIGATORIOS = ("cpf", "nome", "data_nascimento")
+
+_INSERT = f"INSERT INTO pessoa ({', '.join(COLUNAS)}) VALUES ({', '.join(['%s'] * len(COLUNAS))})"
+
+
+def formato_do_arquivo(file: UploadFile):
+    nome = (file.filename or "").lower()
+    tipo = file.content_type or ""
+    if nome.endswith(".csv") or "csv" in tipo:
+        return "csv"
+    if nome.endswith((".jsonl", ".ndjson")) or "ndjson" in tipo or "jsonl" in tipo:
+        return "jsonl"
+    return None
+
+
+def ler_registros(conteudo, formato):
+    """Gera (número da linha, registro) de cada registro; registro é dict ou mensagem de erro."""
+    texto = bytes(conteudo).decode("utf-8-sig")  # planilhas do Excel vêm com BOM
+    if formato == "jsonl":
+        for numero, linha in enumerate(texto.splitlines(), 1):
+            if not linha.strip():
+                continue
+            try:
+                registro = orjson.loads(linha)
+            except orjson.JSONDecodeError:
+                yield numero, "JSON inválido"
+                continue
+            yield numero, registro if isinstance(registro, dict) else "Cada linha deve ser um objeto JSON"
+        return
+
+    # CSV com cabeçalho; o Excel em português separa por ";"
+    primeira = texto.partition("\n")[0]
+    leitor = csv.DictReader(io.StringIO(texto, newline=""), delimiter=";" if primeira.count(";") > primeira.count(",") else ",")
+    leitor.fieldnames = [(c or "").strip().lower() for c in leitor.fieldnames or ()]
+    for registro in leitor:
+        yield leitor.line_num, registro
+
+
+def _valor(registro, campo):
+    valor = registro.get(campo)
+    if isinstance(valor, str):
+        valor = valor.strip()
+    return None if valor in ("", None) else valor
+
+
+def preparar_registro(registro):
+    """Valores das COLUNAS prontos para o INSERT; ValueError com o motivo se inválido."""
+    valores = {c: _valor(registro, c) for c in COLUNAS}
+    # No JSONL um campo pode vir como lista ou objeto: não há como gravá-lo numa coluna
+    compostos = [c for c, v in valores.items() if isinstance(v, (dict, list))]
+    if compostos:
+        raise ValueError("Campos devem ser texto ou número: " + ", ".join(compostos))
+    faltando = [c for c in OBRIGATORIOS if valores[c] is None]
+    if faltando:
+        raise ValueError("Campos obrigatórios faltando: " + ", ".join(faltando))
+    valores["cpf"] = normalizar_cpf(valores["cpf"])
+    try:
+        valores["data_nascimento"] = interpretar_data(valores["data_nascimento"])
+    except ValueError:
+        raise ValueError("data_nascimento inválida")
+    try:
+        if valores["peso"] is not None:
+            valores["peso"] = float(str(valores["peso"]).replace(",", "."))
+        if valores["idade"] is not None:
+            valores["idade"] = int(valores["idade"])
+    except (ValueError, TypeError):
+        raise ValueError("peso ou idade não numérico")
+    return valores
+
+
+def _erro(linha, cpf, mensagem):
+    return {"linha": linha, "cpf": cpf, "error": mensagem}
+
+
+def _mensagem_integridade(erro):
+    """Só a chave única do CPF (1062 em pessoa.cpf) é "CPF já cadastrado"; o resto vem do driver."""
+    codigo = erro.args[0] if erro.args else None
+    mensagem = erro.args[-1] if erro.args else str(erro)
+    if codigo == 1062 and re.search(r"for key '(pessoa\.)?cpf'", str(mensagem)):
+        return "CPF já cadastrado"
+    return f"Valor recusado pelo banco: {mensagem}"
+
+
+def validar_importacao(conteudo, formato):
+    """(registros válidos como (linha, valores), erros) do arquivo inteiro."""
+    preparados, erros = [], []
+    total = 0
+    for linha, registro in ler_registros(conteudo, formato):
+        total += 1
+        if isinstance(registro, str):
+            erros.append(_erro(linha, None, registro))
+            continue
+        try:
+            preparados.append((linha, preparar_registro(registro)))
+        except (ValueError, TypeError) as e:
+            cpf = _valor(registro, "cpf")
+            erros.append(_erro(linha, cpf if isinstance(cpf, (str, int)) else None, str(e)))
+
+    validos = validar_cpfs([v["cpf"] for _, v in preparados])
+    registros, primeira_linha = [], {}
+    for (linha, valores), valido in zip(preparados, validos):
+        cpf = valores["cpf"]
+        if not valido:
+            erros.append(_erro(linha, cpf, "CPF inválido"))
+        elif cpf in primeira_linha:
+            erros.append(_erro(linha, cpf, f"CPF repetido no arquivo (linha {primeira_linha[cpf]})"))
+        else:
+            primeira_linha[cpf] = linha
+            registros.append((linha, valores))
+    return total, registros, erros
+
+
+# Inserção (roda no executor do banco, fora do event loop)
+def inserir_pacientes(registros, lote=None):
+    """
+    Insere em transações de `lote` linhas. Retorna (inseridos, erros, falha). Se o banco
+    cair no meio (conexão perdida, pool esgotado), os lotes já confirmados ficam: as
+    linhas restantes entram em erros como não importadas e falha traz o motivo. Sem
+    nenhuma linha confirmada o erro sobe normalmente (ex.: 503 do pool).
+    """
+    lote = lote or IMPORTACAO_LOTE
+    inseridos, erros = [], []
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        for inicio in range(0, len(registros), lote):
+            pedaco = registros[inicio:inicio + lote]
+            cursor.execute(
+                f"SELECT cpf FROM pessoa WHERE cpf IN ({', '.join(['%s'] * len(pedaco))})",
+                [v["cpf"] for _, v in pedaco],
+            )
+            existentes = {linha[0] for linha in cursor.fetchall()}
+            novos = []
+            for linha, valores in pedaco:
+                if valores["cpf"] in existentes:
+                    erros.append(_erro(linha, valores["cpf"], "CPF já cadastrado"))
+                else:
+                    novos.append((linha, valores))
+            if not novos:
+                continue
+            try:
+                cursor.executemany(_INSERT, [tuple(v[c] for c in COLUNAS) for _, v in novos])
+                conn.commit()
+                inseridos.extend(linha for linha, _ in novos)
+            except (pymysql.IntegrityError, pymysql.DataError):
+                conn.rollback()
+                for linha, valores in novos:
+                    try:
+                        cursor.execute(_INSERT, tuple(valores[c] for c in COLUNAS))
+                        conn.commit()
+                        inseridos.append(linha)
+                    except pymysql.IntegrityError as e:
+                        conn.rollback()
+                        erros.append(_erro(linha, valores["cpf"], _mensagem_integridade(e)))
+                    except pymysql.DataError as e:
+                        conn.rollback()
+                        erros.append(_erro(linha, valores["cpf"], f"Valor recusado pelo banco: {e.args[-1]}"))
+    except (pymysql.MySQLError, HTTPException) as e:
+        if not inseridos:
+            raise
+        falha = e.detail if isinstance(e, HTTPException) else f"Erro no banco: {e.args[-1] if e.args else e}"
+        resolvidas = set(inseridos).union(erro["linha"] for erro in erros)
+        erros.extend(
+            _erro(linha, valores["cpf"], f"Não importado: {falha}")
+            for linha, valores in registros if linha not in resolvidas
+        )
+        return len(inseridos), erros, falha
+    finally:
+        if conn is not None:
+            conn.close()
+    return len(inseridos), erros, None
+
+
+@router.post("/importar-pacientes")
+async def importar_pacientes(
+    file: UploadFile = File(...),
+    formato: str = Form(None),  # csv | jsonl (padrão: pela extensão ou Content-Type do arquivo)
+):
+    formato = formato or formato_do_arquivo(file)
+    if formato not in ("csv", "jsonl"):
+        return JSONResponse(content={"error": "formato deve ser csv ou jsonl"}, status_code=400)
+
+    with etapa("upload"):
+        conteudo = await ler_upload(file, int(IMPORTACAO_MAX_MB * 1024 * 1024), tipo="texto")
+    with etapa("validacao"):
+        try:
+            total, registros, erros = await asyncio.to_thread(validar_importacao, conteudo, formato)
+        except UnicodeDecodeError:
+            return JSONResponse(content={"error": "O arquivo deve estar em UTF-8"}, status_code=400)
+    inseridos = None
+    try:
+        with etapa("insercao"):
+            inseridos, erros_banco, falha = await executar_db(inserir_pacientes, registros)
+    finally:
+        # Sem o resultado (erro ou requisição cancelada) não dá para saber se algum lote entrou
+        if inseridos != 0:
+            await invalidar_listagem("pacientes")
+
+    erros = sorted(erros + erros_banco, key=lambda e: e["linha"])
+    return {
+        "total": total,
+        "inseridos": inseridos,
+        "recusados": len(erros),
+        "erros": erros[:IMPORTACAO_MAX_ERROS],
+        "erros_omitidos": max(len(erros) - IMPORTACAO_MAX_ERROS, 0),
+        "erro_banco": falha,
+    }
@@ -1,49 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Request
 from fastapi.responses import JSONResponse
 import pymysql
+from app.banco import get_connection, executar_db
 pymysql.install_as_MySQLdb()
 from pydantic import BaseModel
 import bcrypt
-import os  # ← ADICIONADO
 
 router = APIRouter()
 
-# ✅ MESMA FUNÇÃO DE CONEXÃO DO OUTRO ARQUIVO
-def get_connection():
-    """Conecta ao banco usando variáveis de ambiente"""
-    try:
-        # Primeiro tenta variáveis de ambiente do Azure App Service
-        host = os.environ.get('DB_HOST')
-        user = os.environ.get('DB_USER')
-        password = os.environ.get('DB_PASSWORD')
-        database = os.environ.get('DB_NAME')
-        port = int(os.environ.get('DB_PORT', 3306))
-        
-        if all([host, user, password, database]):
-            # Conecta ao Azure
-            return pymysql.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                port=port,
-                ssl={'check_hostname': False}
-            )
-        else:
-            # Fallback para desenvolvimento local (.env)
-            from dotenv import load_dotenv
-            load_dotenv()
-            
-            return pymysql.connect(
-                host=os.getenv('LOCAL_DB_HOST', 'localhost'),
-                user=os.getenv('LOCAL_DB_USER', 'root'),
-                password=os.getenv('LOCAL_DB_PASSWORD', 'admin'),
-                database=os.getenv('LOCAL_DB_NAME', 'tccalignme')
-            )
-    except Exception as e:
-        print(f"❌ Erro na conexão: {e}")
-        raise
-
 class LoginInput(BaseModel):
     email: str
     senha: str
@@ -70,38 +34,47 @@ async def login(request: Request):
         )
 
     try:
-        # ✅ ALTERADO: usa a nova função get_connection()
-        conn = get_connection()
+        nome = await executar_db(verificar_login, email, senha)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+    if nome is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="E-mail ou senha inválidos"
+        )
+
+    return JSONResponse(content={
+        "mensagem": "Login realizado com sucesso",
+        "nome": nome,
+        "token": "fake-token-123"
+    })
+
+
+# Consulta + bcrypt (rodam no executor do banco, fora do event loop)
+def verificar_login(email, senha):
+    """Nome do médico se e-mail e senha conferem, senão None."""
+    conn = get_connection()
+    try:
         cursor = conn.cursor()
         # Buscar só pelo email (sem senha)
         cursor.execute("SELECT nome, senha FROM medico WHERE email = %s", (email,))
         usuario = cursor.fetchone()
+    finally:
         conn.close()
 
-        if not usuario:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="E-mail ou senha inválidos"
-            )
-        
-        nome, senha_hash = usuario
-        senha_hash_bytes = senha_hash.encode('utf-8')
+    if not usuario:
+        return None
 
-        # Verifica senha
-        if bcrypt.checkpw(senha.encode('utf-8'), senha_hash_bytes):
-            return JSONResponse(content={
-                "mensagem": "Login realizado com sucesso",
-                "nome": nome,
-                "token": "fake-token-123"
-            })
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="E-mail ou senha inválidos"
-            )
+    nome, senha_hash = usuario
+    senha_hash_bytes = senha_hash.encode('utf-8')
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
\ No newline at end of file
+    # Verifica senha
+    if bcrypt.checkpw(senha.encode('utf-8'), senha_hash_bytes):
+        return nome
+    return None
@@ -0,0 +1,133 @@
+from typing import List
+import asyncio
+import json
+import math
+
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.processamento import medir_frontal, medir_sagital
+from app.cache import analisar_imagem
+from app.upload import ler_upload
+from app.respostas import opcoes_saida, separar_imagem
+from app.metricas import etapa
+
+router = APIRouter()
+
+CAMPOS_SAGITAL = ("ref_x1", "ref_y1", "ref_x2", "ref_y2", "referencia_metros")
+
+
+# ---------------------------
+# Valida os parâmetros de cada item e monta a função de medida correspondente
+# ---------------------------
+def _positivo(item, campo):
+    # As escalas dividem por estes valores: 0, negativo ou NaN não têm medida possível
+    valor = float(item[campo])
+    if not (math.isfinite(valor) and valor > 0):
+        raise ValueError(f"{campo} deve ser um número maior que 0")
+    return valor
+
+
+def preparar_item(item):
+    vista = item.get("vista", "frontal")
+    if vista == "frontal":
+        if item.get("referencia_pixels") in (None, ""):
+            raise ValueError("Campo obrigatório para vista frontal: referencia_pixels")
+        return vista, medir_frontal, (_positivo(item, "referencia_pixels"),)
+    if vista == "sagital":
+        faltando = [c for c in CAMPOS_SAGITAL if item.get(c) in (None, "")]
+        if faltando:
+            raise ValueError("Campos obrigatórios para vista sagital: " + ", ".join(faltando))
+        x1, y1, x2, y2 = (float(item[c]) for c in CAMPOS_SAGITAL[:4])
+        if (x1, y1) == (x2, y2):
+            raise ValueError("Os pontos de referência (ref_x1, ref_y1) e (ref_x2, ref_y2) devem ser diferentes")
+        return vista, medir_sagital, (x1, y1, x2, y2, _positivo(item, "referencia_metros"))
+    raise ValueError(f"Vista inválida: {vista}")
+
+
+async def processar_item(indice, arquivo, item, contents, modo="json", saida=None):
+    linha = {"indice": indice, "arquivo": arquivo, "vista": item.get("vista", "frontal")}
+    if isinstance(contents, HTTPException):
+        linha["error"] = contents.detail
+        return linha
+    try:
+        vista, medir, args = preparar_item(item)
+        analise = await analisar_imagem(vista, contents, saida)
+        if analise is None:
+            linha["error"] = "Erro ao processar imagem"
+        else:
+            linha["resultado"] = await separar_imagem(medir(analise, *args), modo, saida["formato"])
+    except (ValueError, TypeError) as e:
+        linha["error"] = str(e)
+    except HTTPException as e:  # ex.: armazenamento das imagens do modo url indisponível
+        linha["error"] = e.detail
+    except Exception as e:
+        print(f"❌ Erro no item {indice} do lote:", e)
+        linha["error"] = f"Erro interno: {e}"
+    return linha
+
+
+# ---------------------------
+# Rota de lote: várias fotos, cada uma com sua vista e referência.
+# Resposta em NDJSON, uma linha por imagem na ordem em que terminam.
+# ---------------------------
+@router.post("/process-image-lote")
+async def process_image_lote(
+    files: List[UploadFile] = File(...),
+    # Lista JSON com um objeto por arquivo, na mesma ordem. Ex.:
+    # [{"vista": "frontal", "referencia_pixels": 250},
+    #  {"vista": "sagital", "ref_x1": 0, "ref_y1": 0, "ref_x2": 0, "ref_y2": 400, "referencia_metros": 1}]
+    itens: str = Form(...),
+    # json (padrão, imagem em base64) | url (image_url em /resultado-imagem/{token})
+    resposta: str = Form("json"),
+    formato_imagem: str = Form("jpeg"),
+    # Opções da imagem de saída, iguais às de /process-image (valem para todos os itens)
+    imagem: bool = Form(True),
+    qualidade: int = Form(None),
+    lado_max: int = Form(None),
+    miniatura: int = Form(None),
+    atribuicao: str = Form(None),
+):
+    if resposta not in ("json", "url"):
+        return JSONResponse(content={"error": "resposta deve ser 'json' ou 'url' no lote"}, status_code=400)
+    saida = opcoes_saida(resposta, formato_imagem, imagem, qualidade, lado_max, miniatura, atribuicao)
+
+    try:
+        itens = json.loads(itens)
+    except ValueError:
+        return JSONResponse(content={"error": "Campo 'itens' não é um JSON válido"}, status_code=400)
+
+    if not isinstance(itens, list) or not all(isinstance(i, dict) for i in itens):
+        return JSONResponse(content={"error": "Campo 'itens' deve ser uma lista de objetos"}, status_code=400)
+
+    if len(itens) != len(files):
+        return JSONResponse(
+            content={"error": f"{len(files)} arquivos enviados para {len(itens)} itens"},
+            status_code=400,
+        )
+
+    # Lê tudo antes de responder: os uploads não ficam disponíveis durante o streaming.
+    # Arquivos recusados (grandes demais ou que não são imagem) viram erro só do seu item.
+    conteudos = []
+    with etapa("upload"):
+        for f in files:
+            try:
+                conteudos.append(await ler_upload(f))
+            except HTTPException as e:
+                conteudos.append(e)
+    nomes_arquivos = [f.filename for f in files]
+
+    async def gerar():
+        tarefas = [
+            asyncio.ensure_future(processar_item(i, nomes_arquivos[i], itens[i], conteudos[i], resposta, saida))
+            for i in range(len(itens))
+        ]
+        try:
+            for proxima in asyncio.as_completed(tarefas):
+                linha = await proxima
+                yield json.dumps(linha, ensure_ascii=False) + "\n"
+        finally:
+            # Cliente desconectou: não deixa tarefas órfãs
+            for t in tarefas:
+                t.cancel()
+
+    return StreamingResponse(gerar(), media_type="application/x-ndjson")
@@ -1,49 +1,18 @@
 from fastapi import APIRouter, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+import orjson
 import pymysql
 import bcrypt
 import re
-import os  # ← ADICIONADO
+from app.banco import (
+    get_connection, executar_db, interpretar_data, transmitir_ndjson, modo_listagem,
+    limite_pagina, codificar_cursor, decodificar_cursor, LISTAGEM_PAGINA, LISTAGEM_PAGINA_MAX,
+)
+from app.cache_listagens import listagem_em_cache, invalidar_listagem
 
 pymysql.install_as_MySQLdb()
 router = APIRouter()
 
-# ✅ NOVA FUNÇÃO DE CONEXÃO (ÚNICA ALTERAÇÃO)
-def get_connection():
-    """Conecta ao banco usando variáveis de ambiente"""
-    try:
-        # Primeiro tenta variáveis de ambiente do Azure App Service
-        host = os.environ.get('DB_HOST')
-        user = os.environ.get('DB_USER')
-        password = os.environ.get('DB_PASSWORD')
-        database = os.environ.get('DB_NAME')
-        port = int(os.environ.get('DB_PORT', 3306))
-        
-        if all([host, user, password, database]):
-            # Conecta ao Azure
-            return pymysql.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                port=port,
-                ssl={'check_hostname': False}
-            )
-        else:
-            # Fallback para desenvolvimento local (.env)
-            from dotenv import load_dotenv
-            load_dotenv()
-            
-            return pymysql.connect(
-                host=os.getenv('LOCAL_DB_HOST', 'localhost'),
-                user=os.getenv('LOCAL_DB_USER', 'root'),
-                password=os.getenv('LOCAL_DB_PASSWORD', 'admin'),
-                database=os.getenv('LOCAL_DB_NAME', 'tccalignme')
-            )
-    except Exception as e:
-        print(f"❌ Erro na conexão: {e}")
-        raise
-
 # ✅ RESTANTE DO CÓDIGO PERMANECE EXATAMENTE IGUAL
 # Validação de CPF
 def validar_cpf(cpf: str) -> bool:
@@ -71,29 +40,6 @@ def validar_senha(senha: str) -> bool:
         re.search(r"[@$!%*#?&]", senha)
     )
 
-# Cria a tabela MEDICO caso não exista
-def criar_tabela():
-    conn = get_connection()  # ← ALTERADO: usa nova função
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS medico (
-            id_medico INTEGER AUTO_INCREMENT PRIMARY KEY,
-            cpf VARCHAR(11) NOT NULL UNIQUE,
-            nome TEXT NOT NULL,
-            data_nascimento TEXT NOT NULL,
-            especialidade TEXT,
-            telefone TEXT,
-            crm TEXT NOT NULL,
-            sexo TEXT,
-            email TEXT,
-            senha TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-criar_tabela()
-
 @router.post("/cadastrar-medico")
 async def cadastrar_medico(request: Request):
     try:
@@ -111,7 +57,7 @@ async def cadastrar_medico(request: Request):
     telefone = data.get("telefone")
     crm = data.get("crm")
     sexo = data.get("sexo")
-    email = data.get("email")
+    email = data.get("email") or None  # vazio vira NULL (o índice único aceita vários NULL)
     senha_hash = data.get("senha")
 
     if not cpf or not nome or not data_nascimento or not crm or not senha_hash:
@@ -126,50 +72,114 @@ async def cadastrar_medico(request: Request):
             detail="CPF inválido"
         )
 
+    try:
+        data_nascimento = interpretar_data(data_nascimento)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_nascimento inválida"
+        )
+
     if not validar_senha(senha_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A senha deve conter no mínimo 8 caracteres, incluindo letra maiúscula, minúscula, número e caractere especial."
         )
 
-    senha = bcrypt.hashpw(senha_hash.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
     try:
-        conn = get_connection()  # ← ALTERADO: usa nova função
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO medico (
-                cpf, nome, data_nascimento, especialidade,
-                telefone, crm, sexo, email, senha
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
+        await executar_db(inserir_medico, senha_hash, (
             cpf, nome, data_nascimento, especialidade,
-            telefone, crm, sexo, email, senha
+            telefone, crm, sexo, email
         ))
-
-        conn.commit()
-        conn.close()
+        await invalidar_listagem("medicos")
 
         return JSONResponse(content={"mensagem": "Médico cadastrado com sucesso!"})
 
     except pymysql.IntegrityError as e:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail="CPF já cadastrado"
+            detail="Email já cadastrado" if "uq_medico_email" in str(e) else "CPF já cadastrado"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+
+# Consultas (rodam no executor do banco, fora do event loop; o bcrypt também é lento)
+def inserir_medico(senha, valores):
+    senha = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO medico (
+                cpf, nome, data_nascimento, especialidade,
+                telefone, crm, sexo, email, senha
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (*valores, senha))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def consultar_medicos():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id_medico, nome, data_nascimento, especialidade, sexo FROM medico")
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def consultar_pagina_medicos(limite, apos_id):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id_medico, nome, data_nascimento, especialidade, sexo FROM medico
+            WHERE id_medico > %s ORDER BY id_medico LIMIT %s
+        """, (apos_id, limite + 1))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def _medico(p):
+    return {"id_medico": p[0], "nome": p[1], "data_nascimento": p[2], "especialidade": p[3], "sexo": p[4]}
+
+
+def listagem_medicos(limite=None, apos_id=0):
+    """Corpo JSON da lista inteira (limite None) ou de uma página; vai para o cache."""
+    if limite is None:
+        return orjson.dumps([_medico(p) for p in consultar_medicos()])
+    medicos = consultar_pagina_medicos(limite, apos_id)
+    proximo = codificar_cursor(medicos[limite - 1][0]) if len(medicos) > limite else None
+    return orjson.dumps({"medicos": [_medico(p) for p in medicos[:limite]], "proximo": proximo})
+
+
+# Mesmos modos de /listar-pacientes: lista inteira, página (limite/cursor) ou NDJSON
 @router.get("/listar-medicos")
-def listar_medicos():
-    conn = get_connection()  # ← ALTERADO: usa nova função
-    cursor = conn.cursor()
-    cursor.execute("SELECT id_medico, nome, data_nascimento, especialidade, sexo FROM medico")
-    medicos = cursor.fetchall()
-    conn.close()
-
-    return [{"id_medico": p[0], "nome": p[1], "data_nascimento": p[2], "especialidade": p[3], "sexo": p[4]} for p in medicos]
\ No newline at end of file
+async def listar_medicos(request: Request, limite: int = None, cursor: str = None, formato: str = None):
+    modo = modo_listagem(request.headers.get("accept"), formato, limite, cursor)
+    if modo == "ndjson":
+        linhas = await transmitir_ndjson(
+            "SELECT id_medico, nome, data_nascimento, especialidade, sexo FROM medico ORDER BY id_medico"
+        )
+        return StreamingResponse(linhas, media_type="application/x-ndjson")
+
+    args = ()
+    if modo == "pagina":
+        try:
+            args = (
+                limite_pagina(limite, LISTAGEM_PAGINA, LISTAGEM_PAGINA_MAX),
+                decodificar_cursor(cursor, 1)[0] if cursor else 0,
+            )
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+    corpo = await listagem_em_cache("medicos", listagem_medicos, *args)
+    return Response(content=corpo, media_type="application/json")
@@ -0,0 +1,283 @@
+import numpy as np
+
+
+
+# ---------------------------
+# Vista frontal
+# ---------------------------
+nomes_frontal = [
+    "ACD", "ACE", "EAD", "EAE", "PERD", "PERE",
+    "TFD", "TFE", "ELFD", "ELFE", "CFD", "CFE",
+    "MLD", "MLE"
+]
+
+conexoes_frontal = [
+    (0, 2),
+    (1, 3),
+    (2, 3),
+    (0, 1),
+    (6, 8),
+    (7, 9),
+    (8, 10),
+    (9, 11),
+    (10, 12),
+    (11, 13),
+    (2, 6),
+    (3, 7),
+    (0, 4),
+    (1, 5),
+]
+
+descricoes_conexoes_frontal = {
+    (0, 2): "Acrômio Direito - Espinha ilíaca ântero-superior direita.",
+    (1, 3): "Acrômio Esquerdo - Espinha ilíaca ântero-superior esquerda.",
+    (2, 3): "Espinha ilíaca ântero-superior esquerda - Espinha ilíaca ântero-superior direita.",
+    (0, 1): "Acrômio direito - Acrômio esquerdo",
+    (6, 8): "Trocânter maior do fêmur direito - Epicôndilo lateral do fêmur direito",
+    (7, 9): "Trocânter maior do fêmur esquerdo - Epicôndilo lateral do fêmur esquerdo",
+    (8, 10): "Epicôndilo lateral do fêmur direito - Cabeça da fíbula direita.",
+    (9, 11): "Epicôndilo lateral do fêmur esquerdo - Cabeça da fíbula esquerda.",
+    (10, 12): "Cabeça da fíbula direita - Maléolo lateral direito.",
+    (11, 13): "Cabeça da fíbula esquerda - Maléolo lateral esquerdo.",
+    (2, 6): "Espinha ilíaca ântero-superior direita - Trocânter maior do fêmur direito.",
+    (3, 7): "Espinha ilíaca ântero-superior esquerda - Trocânter maior do fêmur esquerdo.",
+    (0, 4): "Acrômio direito - Cabeça do rádio direito.",
+    (1, 5): "Acrômio esquerdo - Cabeça do rádio esquerdo.",
+}
+
+# ---------------------------
+# Vista sagital
+# ---------------------------
+nomes_sagital = [
+    "PEC7", "ACD", "PET7", "ELUD", "CUD", "PEL4", "PERD",
+    "EAD", "CCX", "TFD", "ELFD", "CFD", "MLD"
+]
+
+conexoes_sagital = [
+    (0, 1), (0, 2), (1, 3), (6, 4), (2, 5),
+    (5, 7), (7, 9), (9, 10), (10, 11),
+    (5, 8), (11, 12)
+]
+
+descricoes_conexoes_sagital = {
+    (0, 1): "Processo espinhoso C7 - Acrômio direito.",
+    (0, 2): "Processo espinhoso C7 - Processo espinhoso T5.",
+    (1, 3): "Acrômio direito - Epicôndilo lateral da ulna direito.",
+    (6, 4): "Cabeça da Ulna direita - Processo estilóide do rádio direito.",
+    (2, 5): "Processo espinhoso T7 - Processo espinhoso L4.",
+    (5, 7): "Processo espinhoso L4 - Espinha ilíaca ântero-superior direita..",
+    (8, 9): "Espinha ilíaca ântero-superior direita - Trocânter maior do fêmur direito.",
+    (9, 10): "Trocânter maior do fêmur direito - Epicôndilo lateral do fêmur direito.",
+    (10, 11): "Epicôndilo lateral do fêmur direito - Cabeça da fíbula direita.",
+    (5, 8): "Processo espinhoso L4 - Coccix",
+    (11, 12): "Cabeça da fíbula direita - Maléolo lateral direito.",
+}
+
+
+# ---------------------------
+# Definição declarativa das medidas de cada vista
+# ---------------------------
+# conexoes/descricoes: segmentos medidos (distância em cm)
+# angulos: ângulo no vértice "indices"[1] formado por "indices"[0]-[1]-[2];
+#   "pontos" é o rótulo devolvido na resposta
+# minimo_pontos_angulos: quantos pontos precisam ter sido detectados para calcular os ângulos
+# pares_bilaterais: landmarks direito/esquerdo comparados em altura e inclinação
+# segmentos_bilaterais: segmentos direito/esquerdo comparados em comprimento
+# modelo: posição esperada de cada ponto, (u, v) em frações do comprimento do corpo
+#   (v: 0 no primeiro ponto, 1 no último; u: horizontal a partir do eixo do corpo,
+#   negativo à esquerda da imagem). Segue a ordem dos índices, que é a ordem vertical.
+#   espelhavel: o modelo também vale espelhado (vista sagital de qualquer lado).
+VISTAS = {
+    "frontal": {
+        "nomes": nomes_frontal,
+        "conexoes": conexoes_frontal,
+        "descricoes": descricoes_conexoes_frontal,
+        "angulos": [],
+        "minimo_pontos_angulos": 0,
+        "pares_bilaterais": [
+            (0, 1, "Acrômios"),
+            (2, 3, "Espinhas ilíacas ântero-superiores"),
+            (4, 5, "Cabeças do rádio"),
+            (6, 7, "Trocânteres maiores do fêmur"),
+            (8, 9, "Epicôndilos laterais do fêmur"),
+            (10, 11, "Cabeças da fíbula"),
+            (12, 13, "Maléolos laterais"),
+        ],
+        "segmentos_bilaterais": [
+            ((0, 2), (1, 3)),
+            ((2, 6), (3, 7)),
+            ((6, 8), (7, 9)),
+            ((8, 10), (9, 11)),
+            ((10, 12), (11, 13)),
+            ((0, 4), (1, 5)),
+        ],
+        "modelo": [
+            (-0.13, 0.00), (0.13, 0.00),  # ACD, ACE
+            (-0.08, 0.24), (0.08, 0.24),  # EAD, EAE
+            (-0.16, 0.30), (0.16, 0.30),  # PERD, PERE
+            (-0.11, 0.37), (0.11, 0.37),  # TFD, TFE
+            (-0.07, 0.66), (0.07, 0.66),  # ELFD, ELFE
+            (-0.07, 0.72), (0.07, 0.72),  # CFD, CFE
+            (-0.06, 1.00), (0.06, 1.00),  # MLD, MLE
+        ],
+        "espelhavel": False,
+    },
+    "sagital": {
+        "nomes": nomes_sagital,
+        "conexoes": conexoes_sagital,
+        "descricoes": descricoes_conexoes_sagital,
+        # Índices e rótulos mantidos como o frontend já os recebe
+        "angulos": [
+            {"nome": "PET7 - PEL4 - EAD", "pontos": ("2", "5", "7"), "indices": (6, 5, 8)},
+            {"nome": "PET7 - PEL4 - CCX", "pontos": ("2", "5", "8"), "indices": (2, 5, 7)},
+        ],
+        "minimo_pontos_angulos": 9,
+        "pares_bilaterais": [],
+        "segmentos_bilaterais": [],
+        "modelo": [
+            (-0.06, 0.00),  # PEC7
+            (0.00, 0.03),   # ACD
+            (-0.08, 0.13),  # PET7
+            (0.00, 0.24),   # ELUD
+            (0.03, 0.30),   # CUD
+            (-0.07, 0.33),  # PEL4
+            (0.06, 0.36),   # PERD
+            (0.07, 0.40),   # EAD
+            (-0.08, 0.44),  # CCX
+            (0.00, 0.47),   # TFD
+            (0.01, 0.72),   # ELFD
+            (-0.01, 0.76),  # CFD
+            (0.00, 1.00),   # MLD
+        ],
+        "espelhavel": True,
+    },
+}
+
+
+# ---------------------------
+# Medidor: a definição compilada em arrays de índices
+# ---------------------------
+class Medidor:
+    """
+    Calcula todas as distâncias, ângulos e assimetrias de uma vista numa passada NumPy.
+
+    medir_lote recebe vários conjuntos de pontos empilhados (B, N, 2), com NaN onde o
+    ponto não foi detectado (None nas listas de pontos); medir devolve o formato das
+    respostas das rotas.
+    """
+
+    def __init__(self, vista):
+        definicao = VISTAS[vista]
+        nomes = definicao["nomes"]
+        conexoes = definicao["conexoes"]
+
+        def nome(i):
+            return nomes[i] if i < len(nomes) else f"P{i}"
+
+        self.seg = np.array(conexoes, dtype=np.intp).reshape(-1, 2)
+        self.seg_rotulos = [
+            (nome(i), nome(j), definicao["descricoes"].get((i, j), "Ligação anatômica padrão"))
+            for i, j in conexoes
+        ]
+
+        self.ang = np.array([a["indices"] for a in definicao["angulos"]], dtype=np.intp).reshape(-1, 3)
+        self.ang_rotulos = [(a["nome"], a["pontos"]) for a in definicao["angulos"]]
+        self.minimo_pontos_angulos = definicao["minimo_pontos_angulos"]
+
+        pares = definicao["pares_bilaterais"]
+        self.par = np.array([(i, j) for i, j, _ in pares], dtype=np.intp).reshape(-1, 2)
+        self.par_rotulos = [(nome(i), nome(j), descricao) for i, j, descricao in pares]
+
+        posicao = {c: k for k, c in enumerate(conexoes)}
+        bilaterais = definicao["segmentos_bilaterais"]
+        self.seg_par = np.array([(posicao[d], posicao[e]) for d, e in bilaterais], dtype=np.intp).reshape(-1, 2)
+        self.seg_par_rotulos = [(f"{nome(d[0])}-{nome(d[1])}", f"{nome(e[0])}-{nome(e[1])}") for d, e in bilaterais]
+
+        indices = [self.seg, self.ang, self.par]
+        self.n_pontos = max([len(nomes)] + [int(a.max()) + 1 for a in indices if a.size])
+
+    def empilhar(self, conjuntos):
+        """Lista de listas de pontos (tamanhos variados) -> array (B, n_pontos, 2) com NaN."""
+        pontos = np.full((len(conjuntos), self.n_pontos, 2), np.nan)
+        for b, conjunto in enumerate(conjuntos):
+            # None marca um ponto do modelo que não foi encontrado (fica NaN)
+            for i, ponto in enumerate(conjunto[:self.n_pontos]):
+                if ponto is not None:
+                    pontos[b, i] = ponto
+        return pontos
+
+    def medir_lote(self, pontos, escalas_cm_por_pixel):
+        pontos = np.asarray(pontos, dtype=np.float64)
+        escalas = np.asarray(escalas_cm_por_pixel, dtype=np.float64).reshape(-1, 1)
+
+        # Distâncias (B, S)
+        delta = pontos[:, self.seg[:, 1]] - pontos[:, self.seg[:, 0]]
+        dist_px = np.sqrt((delta ** 2).sum(axis=-1))
+        distancias_cm = np.round(dist_px * escalas, 2)
+
+        # Ângulos (B, A)
+        ba = pontos[:, self.ang[:, 0]] - pontos[:, self.ang[:, 1]]
+        bc = pontos[:, self.ang[:, 2]] - pontos[:, self.ang[:, 1]]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cos_ang = (ba * bc).sum(axis=-1) / (np.sqrt((ba ** 2).sum(axis=-1)) * np.sqrt((bc ** 2).sum(axis=-1)))
+        angulos_graus = np.round(np.degrees(np.arccos(np.clip(cos_ang, -1.0, 1.0))), 2)
+
+        # Assimetrias de nível (B, P): diferença de altura direita - esquerda e inclinação da reta
+        direito = pontos[:, self.par[:, 0]]
+        esquerdo = pontos[:, self.par[:, 1]]
+        diferenca_altura_cm = np.round((direito[..., 1] - esquerdo[..., 1]) * escalas, 2)
+        inclinacao_graus = np.round(np.degrees(np.arctan2(
+            direito[..., 1] - esquerdo[..., 1], esquerdo[..., 0] - direito[..., 0]
+        )), 2)
+
+        # Assimetrias de comprimento (B, Q): segmento direito - esquerdo
+        diferenca_segmentos_cm = np.round(
+            (dist_px[:, self.seg_par[:, 0]] - dist_px[:, self.seg_par[:, 1]]) * escalas, 2
+        )
+
+        return {
+            "distancias_cm": distancias_cm,
+            "angulos_graus": angulos_graus,
+            "diferenca_altura_cm": diferenca_altura_cm,
+            "inclinacao_graus": inclinacao_graus,
+            "diferenca_segmentos_cm": diferenca_segmentos_cm,
+        }
+
+    def medir(self, pontos, escala_cm_por_pixel):
+        m = self.medir_lote(self.empilhar([pontos]), [escala_cm_por_pixel])
+        m = {k: v[0].tolist() for k, v in m.items()}
+
+        distancias = [
+            {"ponto1": p1, "ponto2": p2, "descricao": descricao, "distancia_cm": d}
+            for (p1, p2, descricao), d in zip(self.seg_rotulos, m["distancias_cm"])
+            if not np.isnan(d)
+        ]
+
+        angulos = []
+        if sum(p is not None for p in pontos) >= self.minimo_pontos_angulos:
+            angulos = [
+                {"nome": nome, "pontos": rotulo, "angulo_graus": a}
+                for (nome, rotulo), a in zip(self.ang_rotulos, m["angulos_graus"])
+                if not np.isnan(a)
+            ]
+
+        niveis = [
+            {"pontos": [p1, p2], "descricao": descricao, "diferenca_altura_cm": dif, "inclinacao_graus": inc}
+            for (p1, p2, descricao), dif, inc in zip(self.par_rotulos, m["diferenca_altura_cm"], m["inclinacao_graus"])
+            if not np.isnan(dif)
+        ]
+        segmentos = [
+            {"segmentos": [s1, s2], "diferenca_cm": dif}
+            for (s1, s2), dif in zip(self.seg_par_rotulos, m["diferenca_segmentos_cm"])
+            if not np.isnan(dif)
+        ]
+
+        return {
+            "distancias": distancias,
+            "angulos": angulos,
+            "assimetrias": {"niveis": niveis, "segmentos": segmentos},
+        }
+
+
+medidor_frontal = Medidor("frontal")
+medidor_sagital = Medidor("sagital")
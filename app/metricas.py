@@ -0,0 +1,191 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import functools
+import threading
+import time
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+import pymysql.cursors
+
+router = APIRouter()
+
+# ---------------------------
+# Cronômetro de etapas da requisição
+# ---------------------------
+# Cada requisição (e cada execução de pipeline no pool) tem o seu Cronometro numa
+# ContextVar. etapa("nome") soma o tempo do bloco nele; sem cronômetro ativo é só um
+# perf_counter a menos, então pode ficar no código das rotas e do pipeline.
+class Cronometro:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.tempos = {}  # etapa -> segundos (na ordem em que aparecem)
+
+    def adicionar(self, nome, segundos):
+        self.tempos[nome] = self.tempos.get(nome, 0.0) + segundos
+
+    def mesclar(self, tempos):
+        for nome, segundos in tempos.items():
+            self.adicionar(nome, segundos)
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self):
+        partes = [f"{nome};dur={segundos * 1000:.1f}" for nome, segundos in self.tempos.items()]
+        partes.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(partes)
+
+
+_cronometro = ContextVar("cronometro", default=None)
+
+
+def cronometro_atual():
+    return _cronometro.get()
+
+
+def iniciar_cronometro():
+    crono = Cronometro()
+    return crono, _cronometro.set(crono)
+
+
+def encerrar_cronometro(token):
+    _cronometro.reset(token)
+
+
+@contextmanager
+def etapa(nome):
+    """Bloco cronometrado; também serve de decorador (ex.: @etapa("db_conexao"))."""
+    crono = _cronometro.get()
+    if crono is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        crono.adicionar(nome, time.perf_counter() - inicio)
+
+
+def cronometrar_pipeline(fn):
+    """
+    Para funções executadas no pool: cronometra as etapas dentro do processo/thread
+    do worker e devolve os tempos no campo "tempos" do resultado.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        crono, token = iniciar_cronometro()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            encerrar_cronometro(token)
+        if result is not None:
+            result["tempos"] = crono.tempos
+        return result
+    return wrapper
+
+
+# ---------------------------
+# Cursores do banco que somam o tempo das consultas na etapa "db_consulta".
+# Usados como cursorclass nas conexões (executemany chama execute por baixo).
+# ---------------------------
+class _ConsultaCronometrada:
+    def execute(self, query, args=None):
+        with etapa("db_consulta"):
+            return super().execute(query, args)
+
+
+class CursorCronometrado(_ConsultaCronometrada, pymysql.cursors.Cursor):
+    pass
+
+
+class DictCursorCronometrado(_ConsultaCronometrada, pymysql.cursors.DictCursor):
+    pass
+
+
+# Cursor do servidor (sem buffer): as linhas chegam conforme fetchmany as pede
+class SSDictCursorCronometrado(_ConsultaCronometrada, pymysql.cursors.SSDictCursor):
+    pass
+
+
+# ---------------------------
+# Histogramas (formato Prometheus)
+# ---------------------------
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, buckets=BUCKETS):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = buckets
+        self._series = {}  # labels (tupla ordenada) -> [contagens por bucket..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, **labels):
+        chave = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0] * (len(self.buckets) + 1) + [0.0]
+            serie[i] += 1
+            serie[-1] += valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for chave, serie in sorted(series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in chave)
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), serie[:-1]):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f'{self.nome}_bucket{{{labels},le="{le}"}} {acumulado}')
+            linhas.append(f"{self.nome}_sum{{{labels}}} {serie[-1]:.6f}")
+            linhas.append(f"{self.nome}_count{{{labels}}} {acumulado}")
+        return linhas
+
+
+histograma_requisicoes = Histograma(
+    "alignme_requisicao_segundos", "Duração total das requisições por rota, método e status."
+)
+histograma_etapas = Histograma(
+    "alignme_etapa_segundos", "Duração de cada etapa das requisições por rota."
+)
+
+# Outros módulos registram funções que devolvem linhas extras (ex.: estatísticas de cache)
+_coletores = []
+
+
+def registrar_coletor(fn):
+    _coletores.append(fn)
+    return fn
+
+
+# ---------------------------
+# Middleware: cronometra a requisição, envia Server-Timing e alimenta os histogramas
+# ---------------------------
+async def medir_requisicao(request: Request, call_next):
+    crono, token = iniciar_cronometro()
+    try:
+        response = await call_next(request)
+    finally:
+        encerrar_cronometro(token)
+
+    rota = getattr(request.scope.get("route"), "path", "desconhecida")
+    response.headers["Server-Timing"] = crono.server_timing()
+    histograma_requisicoes.observar(crono.total(), rota=rota, metodo=request.method, status=response.status_code)
+    for nome, segundos in crono.tempos.items():
+        histograma_etapas.observar(segundos, rota=rota, etapa=nome)
+    return response
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    linhas = histograma_requisicoes.exportar() + histograma_etapas.exportar()
+    for coletor in _coletores:
+        linhas.extend(coletor())
+    return PlainTextResponse("\n".join(linhas) + "\n", media_type="text/plain; version=0.0.4")
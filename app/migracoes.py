@@ -0,0 +1,342 @@
+import os
+
+from fastapi import APIRouter, HTTPException
+import pymysql
+from app.banco import get_connection, interpretar_data, interpretar_json
+from app.metricas import registrar_coletor
+
+router = APIRouter()
+
+# ---------------------------
+# Migrações versionadas do esquema
+# ---------------------------
+# Cada módulo criava a sua tabela na importação (criar_tabela), sem índices e com datas
+# em TEXT. Agora o esquema evolui por MIGRACOES, uma lista de (versão, descrição, passos)
+# aplicada em ordem; schema_migracoes guarda as versões já aplicadas, então cada uma roda
+# uma única vez por banco. Um passo é um comando SQL ou uma função que recebe o cursor
+# (para conversões que precisam de Python).
+#
+# Roda na inicialização do app (DB_MIGRAR_AO_INICIAR=0 desliga) ou por
+# `python -m app.migracoes`. Vários processos subindo juntos não aplicam a mesma versão
+# duas vezes: quem chega primeiro segura o lock "alignme_migracoes" (GET_LOCK) até o fim.
+#
+# No MySQL, ALTER/CREATE não participam de transação: uma versão interrompida no meio
+# fica sem registro e é refeita na próxima execução, por isso os passos toleram ser
+# repetidos (IF NOT EXISTS, checagem de colunas e índices existentes).
+#
+# Na inicialização, só um banco inacessível deixa o app subir sem migrar (as rotas de
+# imagem não dependem dele). Uma migração que falha (ErroMigracao, erro de SQL) impede
+# o app de subir: o código das versões novas não roda sobre o esquema antigo. A versão do
+# esquema fica em /metrics (alignme_schema_versao) e em GET /banco/esquema.
+DB_MIGRAR_AO_INICIAR = os.environ.get("DB_MIGRAR_AO_INICIAR", "1") != "0"
+DB_MIGRAR_LOCK_TIMEOUT = int(os.environ.get("DB_MIGRAR_LOCK_TIMEOUT", 60))
+
+_LOCK = "alignme_migracoes"
+
+
+class ErroMigracao(Exception):
+    pass
+
+
+# ---------------------------
+# Funções auxiliares dos passos
+# ---------------------------
+def _coluna(cursor, tabela, coluna):
+    """Tipo da coluna (ex.: 'text', 'date') ou None se ela não existe."""
+    cursor.execute("""
+        SELECT DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (tabela, coluna))
+    linha = cursor.fetchone()
+    if linha is None:
+        return None
+    tipo = linha[0].decode() if isinstance(linha[0], bytes) else linha[0]
+    return tipo.lower()
+
+
+def _indice_existe(cursor, tabela, indice):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+    """, (tabela, indice))
+    return cursor.fetchone() is not None
+
+
+def criar_indice(tabela, indice, definicao):
+    def passo(cursor):
+        if not _indice_existe(cursor, tabela, indice):
+            cursor.execute(f"CREATE {definicao.format(indice=indice)}")
+    return passo
+
+
+def converter_coluna(tabela, chave, coluna, tipo, converter, nula=False):
+    """
+    Troca o tipo de uma coluna de texto convertendo os valores em Python. Se converter
+    levantar ValueError em alguma linha, nada é alterado e o erro lista as linhas a corrigir.
+    """
+    temporaria = f"{coluna}_tipada"
+
+    def passo(cursor):
+        if _coluna(cursor, tabela, coluna) == tipo.lower():
+            return
+        cursor.execute(f"SELECT {chave}, {coluna} FROM {tabela}")
+        convertidas, invalidas = [], []
+        for id_, valor in cursor.fetchall():
+            if valor is None and nula:
+                continue
+            try:
+                convertidas.append((converter(valor), id_))
+            except ValueError:
+                invalidas.append(id_)
+        if invalidas:
+            raise ErroMigracao(
+                f"{tabela}.{coluna}: valores não reconhecidos nas linhas {chave} = {invalidas[:20]}"
+                f"{' …' if len(invalidas) > 20 else ''}; corrija-os e rode a migração de novo"
+            )
+        if _coluna(cursor, tabela, temporaria) is None:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {temporaria} {tipo} NULL AFTER {coluna}")
+        cursor.executemany(f"UPDATE {tabela} SET {temporaria} = %s WHERE {chave} = %s", convertidas)
+        cursor.execute(f"""
+            ALTER TABLE {tabela}
+                DROP COLUMN {coluna},
+                CHANGE COLUMN {temporaria} {coluna} {tipo} {'NULL' if nula else 'NOT NULL'}
+        """)
+    return passo
+
+
+def converter_datas(tabela, chave, coluna, tipo):
+    """Datas em texto -> DATE/DATETIME NOT NULL (formatos de interpretar_data)."""
+    com_hora = tipo == "DATETIME"
+    return converter_coluna(tabela, chave, coluna, tipo, lambda valor: interpretar_data(valor, com_hora))
+
+
+def email_unico(cursor):
+    """medico.email: TEXT -> VARCHAR(255) com índice único (vazios viram NULL)."""
+    if _indice_existe(cursor, "medico", "uq_medico_email"):
+        return
+    cursor.execute("UPDATE medico SET email = NULL WHERE TRIM(email) = ''")
+    cursor.execute("""
+        SELECT email, COUNT(*) FROM medico
+        WHERE email IS NOT NULL
+        GROUP BY email HAVING COUNT(*) > 1
+    """)
+    repetidos = [linha[0] for linha in cursor.fetchall()]
+    if repetidos:
+        raise ErroMigracao(f"medico.email repetido: {repetidos[:20]}; corrija e rode a migração de novo")
+    cursor.execute("ALTER TABLE medico MODIFY COLUMN email VARCHAR(255) NULL")
+    cursor.execute("CREATE UNIQUE INDEX uq_medico_email ON medico (email)")
+
+
+# ---------------------------
+# Versões
+# ---------------------------
+MIGRACOES = [
+    (1, "tabelas pessoa, medico e avaliacao_medica", [
+        # Igual ao antigo criar_tabela de cada módulo: em bancos existentes não muda nada
+        """
+        CREATE TABLE IF NOT EXISTS pessoa (
+            id INTEGER AUTO_INCREMENT PRIMARY KEY,
+            cpf VARCHAR(11) NOT NULL UNIQUE,
+            nome TEXT NOT NULL,
+            data_nascimento TEXT NOT NULL,
+            peso REAL,
+            raca TEXT,
+            profissao TEXT,
+            telefone TEXT,
+            tipo_corporal TEXT,
+            idade INTEGER,
+            sexo TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS medico (
+            id_medico INTEGER AUTO_INCREMENT PRIMARY KEY,
+            cpf VARCHAR(11) NOT NULL UNIQUE,
+            nome TEXT NOT NULL,
+            data_nascimento TEXT NOT NULL,
+            especialidade TEXT,
+            telefone TEXT,
+            crm TEXT NOT NULL,
+            sexo TEXT,
+            email TEXT,
+            senha TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS avaliacao_medica (
+            id_avaliacao INTEGER AUTO_INCREMENT PRIMARY KEY,
+            id_paciente INTEGER NOT NULL,
+            foto_frontal LONGTEXT,
+            foto_sagital LONGTEXT,
+            medidas_frontal TEXT,
+            medidas_sagital TEXT,
+            angulos_sagital TEXT,
+            altura DOUBLE,
+            resultado_avaliacao TEXT,
+            data_avaliacao TEXT NOT NULL
+        )
+        """,
+    ]),
+    (2, "datas em DATE/DATETIME", [
+        converter_datas("pessoa", "id", "data_nascimento", "DATE"),
+        converter_datas("medico", "id_medico", "data_nascimento", "DATE"),
+        converter_datas("avaliacao_medica", "id_avaliacao", "data_avaliacao", "DATETIME"),
+    ]),
+    (3, "índices do histórico e do login", [
+        # Histórico: filtra por paciente e ordena por data (o id, chave primária, já
+        # faz parte de todo índice secundário no InnoDB e desempata a paginação)
+        criar_indice("avaliacao_medica", "idx_avaliacao_paciente_data",
+                     "INDEX {indice} ON avaliacao_medica (id_paciente, data_avaliacao)"),
+        email_unico,
+    ]),
+    (4, "medidas em colunas JSON", [
+        # Texto JSON ou repr Python (lido antes com eval) vira JSON; texto que não é
+        # nenhum dos dois é guardado como string JSON, sem perder nada
+        converter_coluna("avaliacao_medica", "id_avaliacao", coluna, "JSON", interpretar_json, nula=True)
+        for coluna in ("medidas_frontal", "medidas_sagital", "angulos_sagital")
+    ]),
+]
+
+
+# ---------------------------
+# Execução
+# ---------------------------
+VERSAO_ESPERADA = MIGRACOES[-1][0]
+
+# Última versão conhecida do banco (None até a primeira consulta dar certo)
+_versao_banco = None
+
+
+def versao_atual(cursor):
+    cursor.execute("SHOW TABLES LIKE 'schema_migracoes'")
+    if cursor.fetchone() is None:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_migracoes")
+    return cursor.fetchone()[0]
+
+
+def estado_esquema():
+    """Versão atual do banco, a esperada pelo código e as pendentes."""
+    global _versao_banco
+    conn = get_connection()
+    try:
+        _versao_banco = versao_atual(conn.cursor())
+    finally:
+        conn.close()
+    return {
+        "versao_atual": _versao_banco,
+        "versao_esperada": VERSAO_ESPERADA,
+        "pendentes": [{"versao": v, "descricao": d} for v, d, _ in MIGRACOES if v > _versao_banco],
+    }
+
+
+def aplicar_migracoes(log=print):
+    """Aplica as versões pendentes, em ordem. Retorna a lista de versões aplicadas."""
+    global _versao_banco
+    aplicadas = []
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (_LOCK, DB_MIGRAR_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise ErroMigracao(f"Outro processo está migrando o banco há mais de {DB_MIGRAR_LOCK_TIMEOUT} s")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migracoes (
+                    versao INTEGER PRIMARY KEY,
+                    descricao VARCHAR(255) NOT NULL,
+                    aplicada_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("SELECT versao FROM schema_migracoes")
+            feitas = {linha[0] for linha in cursor.fetchall()}
+            _versao_banco = max(feitas, default=0)
+            for versao, descricao, passos in MIGRACOES:
+                if versao in feitas:
+                    continue
+                log(f"… migração {versao}: {descricao}")
+                for passo in passos:
+                    if callable(passo):
+                        passo(cursor)
+                    else:
+                        cursor.execute(passo)
+                cursor.execute(
+                    "INSERT INTO schema_migracoes (versao, descricao) VALUES (%s, %s)",
+                    (versao, descricao),
+                )
+                conn.commit()
+                aplicadas.append(versao)
+                _versao_banco = versao
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK,))
+    finally:
+        conn.close()
+    log(f"✅ Esquema do banco na versão {VERSAO_ESPERADA}"
+        + (f" (aplicadas: {aplicadas})" if aplicadas else ""))
+    return aplicadas
+
+
+def _banco_inacessivel(erro):
+    """Falha de conexão (erros 2xxx do cliente MySQL, ex.: 2003 "Can't connect") ou pool esgotado."""
+    if isinstance(erro, HTTPException):
+        return erro.status_code == 503
+    return (
+        isinstance(erro, pymysql.OperationalError)
+        and bool(erro.args) and isinstance(erro.args[0], int) and erro.args[0] >= 2000
+    )
+
+
+def migrar_ao_iniciar():
+    """
+    Handler de startup. Com o banco fora do ar, o app sobe mesmo assim (as rotas de imagem
+    não dependem dele); qualquer outra falha da migração interrompe a inicialização.
+    """
+    if not DB_MIGRAR_AO_INICIAR:
+        return
+    try:
+        aplicar_migracoes()
+    except Exception as e:
+        if not _banco_inacessivel(e):
+            print(f"❌ Migração do banco falhou, o app não vai subir: {e}")
+            raise
+        print(f"❌ Banco inacessível, migrações não aplicadas: {e}")
+
+
+@router.get("/banco/esquema")
+def esquema():
+    try:
+        return estado_esquema()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Banco inacessível: {e}")
+
+
+@registrar_coletor
+def metricas_esquema():
+    linhas = [
+        "# TYPE alignme_schema_versao_esperada gauge",
+        f"alignme_schema_versao_esperada {VERSAO_ESPERADA}",
+    ]
+    if _versao_banco is not None:
+        linhas += [
+            "# TYPE alignme_schema_versao gauge",
+            f"alignme_schema_versao {_versao_banco}",
+        ]
+    return linhas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrações do esquema do banco")
+    parser.add_argument("--status", action="store_true", help="só mostra a versão atual e as pendentes")
+    args = parser.parse_args()
+    if args.status:
+        estado = estado_esquema()
+        print(f"versão atual: {estado['versao_atual']}")
+        for pendente in estado["pendentes"]:
+            print(f"pendente: {pendente['versao']} — {pendente['descricao']}")
+    else:
+        aplicar_migracoes()
@@ -1,47 +1,19 @@
 from fastapi import APIRouter, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+import re
+
+import numpy as np
+import orjson
 import pymysql
-import os  # ← ADICIONADO
+from app.banco import (
+    get_connection, executar_db, interpretar_data, transmitir_ndjson, modo_listagem,
+    limite_pagina, codificar_cursor, decodificar_cursor, LISTAGEM_PAGINA, LISTAGEM_PAGINA_MAX,
+)
+from app.cache_listagens import listagem_em_cache, invalidar_listagem
 
 pymysql.install_as_MySQLdb()
 router = APIRouter()
 
-# ✅ NOVA FUNÇÃO DE CONEXÃO (ÚNICA ALTERAÇÃO)
-def get_connection():
-    """Conecta ao banco usando variáveis de ambiente"""
-    try:
-        # Primeiro tenta variáveis de ambiente do Azure App Service
-        host = os.environ.get('DB_HOST')
-        user = os.environ.get('DB_USER')
-        password = os.environ.get('DB_PASSWORD')
-        database = os.environ.get('DB_NAME')
-        port = int(os.environ.get('DB_PORT', 3306))
-        
-        if all([host, user, password, database]):
-            # Conecta ao Azure
-            return pymysql.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                port=port,
-                ssl={'check_hostname': False}
-            )
-        else:
-            # Fallback para desenvolvimento local (.env)
-            from dotenv import load_dotenv
-            load_dotenv()
-            
-            return pymysql.connect(
-                host=os.getenv('LOCAL_DB_HOST', 'localhost'),
-                user=os.getenv('LOCAL_DB_USER', 'root'),
-                password=os.getenv('LOCAL_DB_PASSWORD', 'admin'),
-                database=os.getenv('LOCAL_DB_NAME', 'tccalignme')
-            )
-    except Exception as e:
-        print(f"❌ Erro na conexão: {e}")
-        raise
-
 # ✅ RESTANTE DO CÓDIGO PERMANECE EXATAMENTE IGUAL
 # Validação de CPF
 def validar_cpf(cpf: str) -> bool:
@@ -59,29 +31,30 @@ def validar_cpf(cpf: str) -> bool:
             return False
     return True
 
-# Cria a tabela PESSOA caso não exista, agora com idade e sexo
-def criar_tabela():
-    conn = get_connection()  # ← ALTERADO: usa nova função
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pessoa (
-            id INTEGER AUTO_INCREMENT PRIMARY KEY,
-            cpf VARCHAR(11) NOT NULL UNIQUE,
-            nome TEXT NOT NULL,
-            data_nascimento TEXT NOT NULL,
-            peso REAL,
-            raca TEXT,
-            profissao TEXT,
-            telefone TEXT,
-            tipo_corporal TEXT,
-            idade INTEGER,
-            sexo TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# A mesma regra para muitos CPFs de uma vez (importação em lote): os dígitos viram uma
+# matriz n x 11 e cada dígito verificador sai de um produto com o vetor de pesos.
+_PESOS_CPF = (np.arange(10, 1, -1), np.arange(11, 1, -1))
+
+
+def normalizar_cpf(cpf) -> str:
+    """Só os dígitos; completa com zeros à esquerda perdidos (ex.: CPF lido como número)."""
+    digitos = re.sub(r"[^0-9]", "", str(cpf))
+    return digitos.zfill(11) if digitos else digitos
+
 
-criar_tabela()
+def validar_cpfs(cpfs) -> np.ndarray:
+    """Vetor booleano com validar_cpf de cada CPF já normalizado (normalizar_cpf)."""
+    validos = np.zeros(len(cpfs), bool)
+    onze = np.fromiter((len(c) == 11 for c in cpfs), bool, len(cpfs))
+    if not onze.any():
+        return validos
+    d = np.frombuffer("".join(c for c, ok in zip(cpfs, onze) if ok).encode("ascii"), np.uint8)
+    d = d.reshape(-1, 11).astype(np.int32) - ord("0")
+    v1 = (d[:, :9] @ _PESOS_CPF[0]) * 10 % 11 % 10
+    v2 = (d[:, :10] @ _PESOS_CPF[1]) * 10 % 11 % 10
+    repetidos = (d == d[:, :1]).all(axis=1)
+    validos[onze] = (v1 == d[:, 9]) & (v2 == d[:, 10]) & ~repetidos
+    return validos
 
 @router.post("/cadastrar-paciente")
 async def cadastrar_paciente(request: Request):
@@ -117,21 +90,19 @@ async def cadastrar_paciente(request: Request):
         )
 
     try:
-        conn = get_connection()  # ← ALTERADO: usa nova função
-        cursor = conn.cursor()
+        data_nascimento = interpretar_data(data_nascimento)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_nascimento inválida"
+        )
 
-        cursor.execute("""
-            INSERT INTO pessoa (
-                cpf, nome, data_nascimento, peso, raca, profissao,
-                telefone, tipo_corporal, idade, sexo
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
+    try:
+        await executar_db(inserir_paciente, (
             cpf, nome, data_nascimento, peso, raca, profissao,
             telefone, tipo_corporal, idade, sexo
         ))
-
-        conn.commit()
-        conn.close()
+        await invalidar_listagem("pacientes")
 
         return JSONResponse(content={"mensagem": "Paciente cadastrado com sucesso!"})
 
@@ -140,19 +111,86 @@ async def cadastrar_paciente(request: Request):
             status_code=status.HTTP_409_CONFLICT,
             detail="CPF já cadastrado"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print("ERRO AO CADASTRAR PACIENTE:", e)  # 👈 loga no terminal
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
-        
+
+
+# Consultas (rodam no executor do banco, fora do event loop)
+def inserir_paciente(valores):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO pessoa (
+                cpf, nome, data_nascimento, peso, raca, profissao,
+                telefone, tipo_corporal, idade, sexo
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, valores)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def consultar_pacientes():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nome, idade, sexo FROM pessoa")
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def consultar_pagina_pacientes(limite, apos_id):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, nome, idade, sexo FROM pessoa WHERE id > %s ORDER BY id LIMIT %s",
+            (apos_id, limite + 1),
+        )
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def _paciente(p):
+    return {"id": p[0], "nome": p[1], "idade": p[2], "sexo": p[3]}
+
+
+def listagem_pacientes(limite=None, apos_id=0):
+    """Corpo JSON da lista inteira (limite None) ou de uma página; vai para o cache."""
+    if limite is None:
+        return orjson.dumps([_paciente(p) for p in consultar_pacientes()])
+    pacientes = consultar_pagina_pacientes(limite, apos_id)
+    proximo = codificar_cursor(pacientes[limite - 1][0]) if len(pacientes) > limite else None
+    return orjson.dumps({"pacientes": [_paciente(p) for p in pacientes[:limite]], "proximo": proximo})
+
+
+# Sem parâmetros: a lista inteira, como antes. Com limite/cursor: uma página por vez
+# (paginação por id). Com formato=ndjson (ou Accept: application/x-ndjson): todos os
+# pacientes em streaming, um JSON por linha, para exportação e sincronização (sem cache).
 @router.get("/listar-pacientes")
-def listar_pacientes():
-    conn = get_connection()  # ← ALTERADO: usa nova função
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, nome, idade, sexo FROM pessoa")
-    pacientes = cursor.fetchall()
-    conn.close()
-
-    return [{"id": p[0], "nome": p[1], "idade": p[2], "sexo": p[3]} for p in pacientes]
\ No newline at end of file
+async def listar_pacientes(request: Request, limite: int = None, cursor: str = None, formato: str = None):
+    modo = modo_listagem(request.headers.get("accept"), formato, limite, cursor)
+    if modo == "ndjson":
+        linhas = await transmitir_ndjson("SELECT id, nome, idade, sexo FROM pessoa ORDER BY id")
+        return StreamingResponse(linhas, media_type="application/x-ndjson")
+
+    args = ()
+    if modo == "pagina":
+        try:
+            args = (
+                limite_pagina(limite, LISTAGEM_PAGINA, LISTAGEM_PAGINA_MAX),
+                decodificar_cursor(cursor, 1)[0] if cursor else 0,
+            )
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+    corpo = await listagem_em_cache("pacientes", listagem_pacientes, *args)
+    return Response(content=corpo, media_type="application/json")
@@ -0,0 +1,582 @@
+import asyncio
+import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from app.desenho import desenhar_malha, desenhar_linhas_com_conexoes
+from app.metricas import etapa, cronometrar_pipeline
+from app.atribuicao import atribuir_marcadores, marcadores_incertos
+from app.medidas import (
+    nomes_frontal, conexoes_frontal, nomes_sagital, conexoes_sagital,
+    medidor_frontal, medidor_sagital,
+)
+
+# ---------------------------
+# Configuração do pool de processamento
+# ---------------------------
+# PROCESSAMENTO_WORKERS: número de processos (0 = executa numa thread do próprio worker)
+# OPENCV_THREADS: threads internas do OpenCV em cada processo
+PROCESSAMENTO_WORKERS = int(os.environ.get("PROCESSAMENTO_WORKERS", os.cpu_count() or 1))
+OPENCV_THREADS = int(os.environ.get("OPENCV_THREADS", 1))
+
+_pool = None
+
+
+def _iniciar_worker(threads):
+    cv2.setNumThreads(threads)
+
+
+def get_pool():
+    global _pool
+    if _pool is None and PROCESSAMENTO_WORKERS > 0:
+        _pool = ProcessPoolExecutor(
+            max_workers=PROCESSAMENTO_WORKERS,
+            initializer=_iniciar_worker,
+            initargs=(OPENCV_THREADS,),
+        )
+    return _pool
+
+
+def encerrar_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def executar(fn, *args):
+    """Executa fn(*args) fora do event loop (no pool de processos, se configurado)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), fn, *args)
+
+
+# ---------------------------
+# Decodificação
+# ---------------------------
+def decodificar_imagem(contents):
+    with etapa("decodificacao"):
+        nparr = np.frombuffer(contents, np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+# ---------------------------
+# Brilho médio dentro do marcador (sem máscara do tamanho da imagem)
+# ---------------------------
+_discos = {}
+
+
+def _disco(raio):
+    # Máscara do disco preenchido, igual à desenhada por cv2.circle, guardada por raio
+    disco = _discos.get(raio)
+    if disco is None:
+        disco = np.zeros((2 * raio + 1, 2 * raio + 1), np.uint8)
+        cv2.circle(disco, (raio, raio), raio, 255, -1)
+        _discos[raio] = disco
+    return disco
+
+
+def brilho_medio_disco(gray, cx, cy, raio):
+    h, w = gray.shape[:2]
+    x0, y0 = max(cx - raio, 0), max(cy - raio, 0)
+    x1, y1 = min(cx + raio + 1, w), min(cy + raio + 1, h)
+    if x0 >= x1 or y0 >= y1:
+        return 0.0
+    disco = _disco(raio)
+    # Recortes são views: nenhuma cópia da imagem por candidato
+    roi = gray[y0:y1, x0:x1]
+    mascara = disco[y0 - (cy - raio):y1 - (cy - raio), x0 - (cx - raio):x1 - (cx - raio)]
+    return cv2.mean(roi, mask=mascara)[0]
+
+
+# ---------------------------
+# Detecção de marcadores brancos
+# ---------------------------
+# Limites de tamanho calibrados para imagens com lado maior de LADO_BASE px. Em fotos
+# maiores são multiplicados pela escala (lado maior / LADO_BASE), nos dois modos; até
+# LADO_BASE a detecção é a mesma de sempre.
+LADO_BASE = int(os.environ.get("DETECCAO_LADO_BASE", 1280))
+# "completo": tudo em resolução cheia | "piramide": busca na imagem reduzida e confirma em janelas
+MODO_DETECCAO = os.environ.get("DETECCAO_MODO", "completo")
+
+
+def limites_marcador(escala=1.0):
+    return {
+        "area_min": 20 * escala ** 2,
+        "area_max": 1500 * escala ** 2,
+        "raio_min": 5 * escala,
+        "raio_max": 30 * escala,
+    }
+
+
+def _mascara_marcadores(gray, k_blur=7, k_morf=3, buffers=None):
+    """Máscara binária dos candidatos. Com buffers (dict), guarda nele as etapas intermediárias."""
+    with etapa("filtro"):
+        blur = cv2.GaussianBlur(gray, (k_blur, k_blur), 0)
+        _, limiar = cv2.threshold(blur, 200, 255, cv2.THRESH_BINARY)
+    with etapa("morfologia"):
+        kernel = np.ones((k_morf, k_morf), np.uint8)
+        abertura = cv2.morphologyEx(limiar, cv2.MORPH_OPEN, kernel, iterations=2)
+        thresh = cv2.morphologyEx(abertura, cv2.MORPH_CLOSE, kernel, iterations=1)
+    if buffers is not None:
+        # Cada etapa já é um array próprio: guarda referências, sem copiar
+        buffers.update(blur=blur, limiar=limiar, abertura=abertura, fechamento=thresh)
+    return thresh
+
+
+def _marcadores_validos(contours, gray, limites, circ=(0.7, 1.3), brilho_min=180, rejeitados=None):
+    """
+    Gera (x, y, raio) dos contornos que passam nos filtros de área, forma e brilho.
+    Com rejeitados (lista), acrescenta nela (contorno, motivo, valor) de cada descarte.
+    """
+    for cnt in contours:
+        area = cv2.contourArea(cnt)
+        if area < limites["area_min"] or area > limites["area_max"]:
+            if rejeitados is not None:
+                rejeitados.append((cnt, "area", area))
+            continue
+        (x, y), radius = cv2.minEnclosingCircle(cnt)
+        perimeter = cv2.arcLength(cnt, True)
+        circularidade = 0 if perimeter == 0 else (4 * np.pi * area) / (perimeter ** 2)
+        if circ[0] < circularidade < circ[1] and limites["raio_min"] < radius < limites["raio_max"]:
+            media_brilho = brilho_medio_disco(gray, int(x), int(y), int(radius))
+            if media_brilho > brilho_min:
+                yield x, y, radius
+            elif rejeitados is not None:
+                rejeitados.append((cnt, "brilho", media_brilho))
+        elif rejeitados is not None:
+            if not circ[0] < circularidade < circ[1]:
+                rejeitados.append((cnt, "circularidade", circularidade))
+            else:
+                rejeitados.append((cnt, "raio", radius))
+
+
+def escala_deteccao(img):
+    """Lado maior / LADO_BASE, nunca menor que 1: até LADO_BASE os limites ficam os calibrados."""
+    return max(max(img.shape[:2]) / LADO_BASE, 1.0)
+
+
+def candidatos_marcadores_brancos(img, buffers=None, rejeitados=None):
+    """
+    Candidatos (x, y, raio) em resolução cheia. buffers (dict) e rejeitados (lista)
+    recebem as máscaras intermediárias e os descartes, para o diagnóstico. Os limites de
+    tamanho crescem com a resolução (escala_deteccao), como no modo pirâmide.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if buffers is not None:
+        buffers["cinza"] = gray
+    thresh = _mascara_marcadores(gray, buffers=buffers)
+    with etapa("contornos"):
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return [
+            (int(x), int(y), float(r))
+            for x, y, r in _marcadores_validos(contours, gray, limites_marcador(escala_deteccao(img)), rejeitados=rejeitados)
+        ]
+
+
+def _ordem_vertical(candidatos):
+    return sorted(((x, y) for x, y, _ in candidatos), key=lambda p: (p[1], p[0]))
+
+
+def detectar_marcadores_brancos(img, debug=False):
+    """
+    Detecção em resolução cheia. Com debug=True retorna (pontos, diagnostico): máscaras
+    intermediárias e contornos rejeitados com o motivo (ver diagnostico_deteccao).
+    """
+    buffers = {} if debug else None
+    rejeitados = [] if debug else None
+    pontos = _ordem_vertical(candidatos_marcadores_brancos(img, buffers, rejeitados))
+    if debug:
+        with etapa("debug"):
+            return pontos, diagnostico_deteccao(buffers, rejeitados, pontos)
+    return pontos
+
+
+def candidatos_marcadores_piramide(img, lado_base=None):
+    """
+    Detecção grosso-fino: candidatos na imagem reduzida (lado maior = lado_base),
+    confirmados em janelas pequenas da imagem original. Retorna (x, y, raio) em pixels
+    da imagem original, como candidatos_marcadores_brancos.
+    """
+    lado_base = lado_base or LADO_BASE
+    h, w = img.shape[:2]
+    escala = max(h, w) / lado_base
+    if escala <= 1:
+        return candidatos_marcadores_brancos(img)
+
+    # 1) Busca grosseira, com filtros mais tolerantes (a redução suaviza bordas e brilho).
+    # INTER_LINEAR é bem mais barato que INTER_AREA e basta para blobs do tamanho dos marcadores.
+    reduzida = cv2.resize(img, (round(w / escala), round(h / escala)), interpolation=cv2.INTER_LINEAR)
+    gray_red = cv2.cvtColor(reduzida, cv2.COLOR_BGR2GRAY)
+    contours, _ = cv2.findContours(_mascara_marcadores(gray_red), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    limites_red = limites_marcador()
+    limites_red["area_min"] *= 0.5
+    limites_red["raio_min"] *= 0.7
+    candidatos = list(_marcadores_validos(contours, gray_red, limites_red, circ=(0.5, 1.5), brilho_min=160))
+
+    # 2) Confirmação em resolução cheia, só numa janela ao redor de cada candidato,
+    # dimensionada pelo raio encontrado na imagem reduzida
+    limites = limites_marcador(escala)
+
+    confirmados = []
+    for cx, cy, raio in candidatos:
+        cx, cy = int(cx * escala), int(cy * escala)
+        meia_janela = int(np.ceil((2 * raio + 2) * escala))
+        x0, y0 = max(cx - meia_janela, 0), max(cy - meia_janela, 0)
+        x1, y1 = min(cx + meia_janela + 1, w), min(cy + meia_janela + 1, h)
+        gray = cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        contours, _ = cv2.findContours(_mascara_marcadores(gray), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        melhor = None
+        for x, y, r in _marcadores_validos(contours, gray, limites):
+            d = (x + x0 - cx) ** 2 + (y + y0 - cy) ** 2
+            if melhor is None or d < melhor[0]:
+                melhor = (d, int(x) + x0, int(y) + y0, float(r))
+        if melhor is None:
+            continue
+        _, px, py, r = melhor
+        # Dois candidatos grosseiros podem confirmar o mesmo marcador
+        if all((px - c[0]) ** 2 + (py - c[1]) ** 2 > limites["raio_min"] ** 2 for c in confirmados):
+            confirmados.append((px, py, r))
+    return confirmados
+
+
+def detectar_marcadores_piramide(img, lado_base=None):
+    """Pontos de candidatos_marcadores_piramide, na ordem vertical."""
+    return _ordem_vertical(candidatos_marcadores_piramide(img, lado_base))
+
+
+def detectar_candidatos(img):
+    if MODO_DETECCAO == "piramide":
+        return candidatos_marcadores_piramide(img)
+    return candidatos_marcadores_brancos(img)
+
+
+def detectar_marcadores(img):
+    return _ordem_vertical(detectar_candidatos(img))
+
+
+# ---------------------------
+# Diagnóstico da detecção (debug=true)
+# ---------------------------
+# Só é montado quando pedido: sem debug, a detecção não guarda buffers nem rejeições.
+# As máscaras vão reduzidas (lado maior DEBUG_LADO_MAX) e em PNG com compressão rápida,
+# que já deixa as máscaras binárias com poucos KB; "contornos" sobrepõe à imagem cinza os
+# aceitos (verde) e os rejeitados (vermelho).
+DEBUG_LADO_MAX = int(os.environ.get("DEBUG_LADO_MAX", 640))
+DEBUG_MAX_REJEITADOS = int(os.environ.get("DEBUG_MAX_REJEITADOS", 200))
+
+
+def _png_base64(img):
+    _, img_encoded = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return base64.b64encode(img_encoded).decode("utf-8")
+
+
+def diagnostico_deteccao(buffers, rejeitados, pontos):
+    h, w = buffers["cinza"].shape[:2]
+    fator = max(1, -(-max(h, w) // DEBUG_LADO_MAX))
+
+    # Rejeições em ordem decrescente de área: ruído miúdo fica no fim da lista (e da contagem)
+    descartes = []
+    for cnt, motivo, valor in rejeitados:
+        x, y, larg, alt = cv2.boundingRect(cnt)
+        descartes.append({
+            "x": x + larg // 2,
+            "y": y + alt // 2,
+            "area": float(cv2.contourArea(cnt)),
+            "motivo": motivo,
+            "valor": round(float(valor), 3),
+            "_contorno": cnt,
+        })
+    descartes.sort(key=lambda d: d["area"], reverse=True)
+    por_motivo = {}
+    for d in descartes:
+        por_motivo[d["motivo"]] = por_motivo.get(d["motivo"], 0) + 1
+    descartes = descartes[:DEBUG_MAX_REJEITADOS]
+
+    masks = {nome: _png_base64(reduzir_imagem(buf, DEBUG_LADO_MAX)) for nome, buf in buffers.items()}
+
+    sobreposicao = cv2.cvtColor(reduzir_imagem(buffers["cinza"], DEBUG_LADO_MAX), cv2.COLOR_GRAY2BGR)
+    cv2.drawContours(sobreposicao, [d.pop("_contorno") // fator for d in descartes], -1, (0, 0, 255), 1)
+    for x, y in pontos:
+        cv2.circle(sobreposicao, (x // fator, y // fator), 6, (0, 255, 0), 1)
+    masks["contornos"] = _png_base64(sobreposicao)
+
+    return {
+        "masks": masks,
+        "escala_masks": fator,
+        "aceitos": len(pontos),
+        "rejeitados_por_motivo": por_motivo,
+        "rejeitados": descartes,
+    }
+
+
+# ---------------------------
+# Reordenar pontos (faixas de 50 px; pares ordenados da esquerda para a direita)
+# ---------------------------
+def reordenar_pontos(pontos):
+    grupos = {}
+    for p in pontos:
+        y_key = round(p[1] / 50)
+        if y_key not in grupos:
+            grupos[y_key] = []
+        grupos[y_key].append(p)
+
+    pontos_ordenados = []
+    for _, grupo in sorted(grupos.items()):
+        if len(grupo) == 2:
+            grupo = sorted(grupo, key=lambda x: x[0])
+            pontos_ordenados.extend(grupo)
+        else:
+            pontos_ordenados.extend(grupo)
+    return pontos_ordenados
+
+
+def ordenar_pontos(pontos, vista):
+    # A vista frontal reordena os pares; a sagital usa a ordem da detecção
+    return reordenar_pontos(pontos) if vista == "frontal" else pontos
+
+
+# ---------------------------
+# Rótulos: encaixe no modelo anatômico (app/atribuicao.py)
+# ---------------------------
+# "linhas" (padrão): só a ordem por faixas, sem confiança; cada ponto é sempre [x, y].
+# "modelo": atribuição global com confiança por ponto. Muda o formato da resposta: a lista
+#   tem um item por nome da vista, null nos marcadores não encontrados, e os rótulos não
+#   seguem mais a ordem das linhas. Por isso é opt-in, pelo campo "atribuicao" das rotas
+#   (ou ATRIBUICAO_MODO para mudar o padrão do servidor). Se nenhuma transformação
+#   encaixar (poucos candidatos), cai na ordem por faixas, com confiança 0.
+MODOS_ATRIBUICAO = ("linhas", "modelo")
+ATRIBUICAO_MODO = os.environ.get("ATRIBUICAO_MODO", "linhas")
+
+
+def rotular_marcadores(candidatos, vista, forma, modo=None):
+    """Retorna (pontos na ordem dos nomes da vista, confiancas ou None)."""
+    modo = modo or ATRIBUICAO_MODO
+    if modo == "modelo":
+        pontos, confiancas = atribuir_marcadores(candidatos, vista, forma)
+        if pontos is not None:
+            return pontos, confiancas
+    pontos = ordenar_pontos(_ordem_vertical(candidatos), vista)
+    return pontos, ([0.0] * len(pontos) if modo == "modelo" else None)
+
+
+def campos_confianca(analise, nomes):
+    """Campos de confiança da resposta: por ponto e a lista dos incertos."""
+    confiancas = analise.get("confiancas")
+    if confiancas is None:
+        return {}
+    return {
+        "confianca": dict(zip(nomes, confiancas)),
+        "marcadores_incertos": marcadores_incertos(confiancas, nomes),
+    }
+
+
+# Formatos binários aceitos para a imagem anotada: formato -> (extensão, media type, parâmetro de qualidade)
+FORMATOS_IMAGEM = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+# ---------------------------
+# Opções da imagem de saída, escolhidas por requisição (ver app/respostas.py)
+# ---------------------------
+# imagem: False pula o desenho e a codificação (só medidas)
+# formato / qualidade: jpeg ou webp, qualidade 1-100 (None = padrão do OpenCV)
+# base64: texto no JSON (modo json) ou bytes crus (multipart/url)
+# lado_max: reduz a imagem anotada até este lado maior antes de codificar
+# miniatura: lado maior de uma prévia JPEG pequena, enviada em base64 no campo "miniatura"
+# atribuicao: "linhas" ou "modelo" (ver rotular_marcadores); muda também os pontos da resposta
+SAIDA_PADRAO = {
+    "imagem": True,
+    "formato": "jpeg",
+    "qualidade": None,
+    "base64": True,
+    "lado_max": None,
+    "miniatura": None,
+    "atribuicao": ATRIBUICAO_MODO,
+}
+QUALIDADE_MINIATURA = int(os.environ.get("QUALIDADE_MINIATURA", 70))
+
+
+def precisa_desenho(saida):
+    return saida["imagem"] or bool(saida["miniatura"])
+
+
+def codificar_imagem(img, formato="jpeg", qualidade=None):
+    extensao, _, parametro = FORMATOS_IMAGEM[formato]
+    _, img_encoded = cv2.imencode(extensao, img, [] if qualidade is None else [parametro, int(qualidade)])
+    return img_encoded.tobytes()
+
+
+def reduzir_imagem(img, lado_max):
+    """
+    Reduz por um fator inteiro até o lado maior caber em lado_max. Com fator inteiro
+    (e a imagem recortada para um múltiplo dele) o INTER_AREA usa o caminho rápido do
+    OpenCV, 2-3x mais barato que uma escala fracionária.
+    """
+    h, w = img.shape[:2]
+    fator = -(-max(h, w) // lado_max)
+    if fator <= 1:
+        return img
+    img = img[:h - h % fator, :w - w % fator]
+    return cv2.resize(img, (w // fator, h // fator), interpolation=cv2.INTER_AREA)
+
+
+def saida_imagem(img, saida=None):
+    """Campos de imagem do resultado ("image" e/ou "miniatura") conforme as opções de saída."""
+    saida = saida or SAIDA_PADRAO
+    campos = {}
+    if saida["lado_max"]:
+        with etapa("reducao"):
+            img = reduzir_imagem(img, saida["lado_max"])
+    if saida["imagem"]:
+        with etapa("codificacao"):
+            conteudo = codificar_imagem(img, saida["formato"], saida["qualidade"])
+        if saida["base64"]:
+            with etapa("base64"):
+                conteudo = base64.b64encode(conteudo).decode("utf-8")
+        campos["image"] = conteudo
+    if saida["miniatura"]:
+        with etapa("miniatura"):
+            miniatura = codificar_imagem(reduzir_imagem(img, saida["miniatura"]), "jpeg", QUALIDADE_MINIATURA)
+            campos["miniatura"] = base64.b64encode(miniatura).decode("utf-8")
+    return campos
+
+
+def campos_imagem(analise):
+    return {k: analise[k] for k in ("image", "miniatura") if k in analise}
+
+
+# ---------------------------
+# Pipelines
+# ---------------------------
+# analisar_*: parte cara e independente da escala (decodificação, detecção, desenho e
+#   codificação). Roda no pool e retorna {"pontos", "confiancas", "image", "tempos"} ou None
+#   se a imagem for inválida; "tempos" são as etapas cronometradas no worker (app/metricas.py).
+#   "image"/"miniatura" seguem as opções de saída (ausentes com imagem=False).
+# medir_*: distâncias/ângulos/assimetrias a partir dos pontos e da referência (app/medidas.py);
+#   barato, roda em qualquer lugar.
+# processar_*: os dois juntos, no formato de resposta das rotas.
+@cronometrar_pipeline
+def analisar_frontal(contents, debug=False, saida=None):
+    img = decodificar_imagem(contents)
+    if img is None:
+        return None
+
+    with etapa("deteccao"):
+        if debug:
+            # O diagnóstico usa sempre a detecção em resolução cheia
+            buffers, rejeitados = {}, []
+            candidatos = candidatos_marcadores_brancos(img, buffers, rejeitados)
+        else:
+            candidatos = detectar_candidatos(img)
+    if debug:
+        with etapa("debug"):
+            diagnostico = diagnostico_deteccao(buffers, rejeitados, _ordem_vertical(candidatos))
+
+    saida = saida or SAIDA_PADRAO
+    with etapa("atribuicao"):
+        pontos, confiancas = rotular_marcadores(candidatos, "frontal", img.shape[:2], saida["atribuicao"])
+
+    analise = {"pontos": pontos, "confiancas": confiancas}
+    if precisa_desenho(saida):
+        # As máscaras de debug já foram geradas: a imagem decodificada pode ser anotada sem cópia
+        with etapa("desenho"):
+            desenhar_linhas_com_conexoes(img, pontos, nomes_frontal, conexoes_frontal)
+            desenhar_malha(img, spacing=50)
+        analise.update(saida_imagem(img, saida))
+
+    if debug:
+        analise["debug"] = diagnostico
+
+    return analise
+
+
+def medir_frontal(analise, referencia_pixels):
+    pontos = analise["pontos"]
+    escala_cm_por_pixel = 100 / referencia_pixels
+    medidas = medidor_frontal.medir(pontos, escala_cm_por_pixel)
+
+    result = {
+        **campos_imagem(analise),
+        "distancias": medidas["distancias"],
+        "assimetrias": medidas["assimetrias"],
+        "referencia_pixels": referencia_pixels,
+        "pontos_detectados": pontos,
+        **campos_confianca(analise, nomes_frontal),
+    }
+
+    if "debug" in analise:
+        result["debug"] = analise["debug"]
+
+    return result
+
+
+def processar_frontal(contents, referencia_pixels, debug=False, saida=None):
+    analise = analisar_frontal(contents, debug, saida)
+    if analise is None:
+        return None
+    result = medir_frontal(analise, referencia_pixels)
+    result["tempos"] = analise["tempos"]
+    return result
+
+
+@cronometrar_pipeline
+def analisar_sagital(contents, saida=None):
+    img = decodificar_imagem(contents)
+    if img is None:
+        return None
+
+    with etapa("deteccao"):
+        candidatos = detectar_candidatos(img)
+
+    saida = saida or SAIDA_PADRAO
+    with etapa("atribuicao"):
+        pontos, confiancas = rotular_marcadores(candidatos, "sagital", img.shape[:2], saida["atribuicao"])
+
+    analise = {"pontos": pontos, "confiancas": confiancas}
+    if precisa_desenho(saida):
+        with etapa("desenho"):
+            desenhar_linhas_com_conexoes(img, pontos, nomes_sagital, conexoes_sagital)
+            desenhar_malha(img)
+        analise.update(saida_imagem(img, saida))
+    return analise
+
+
+def medir_sagital(analise, ref_x1, ref_y1, ref_x2, ref_y2, referencia_metros):
+    dist_px_ref = np.sqrt((ref_x2 - ref_x1) ** 2 + (ref_y2 - ref_y1) ** 2)
+    escala_metros_por_pixel = referencia_metros / dist_px_ref
+    escala_cm_por_pixel = escala_metros_por_pixel * 100
+
+    medidas = medidor_sagital.medir(analise["pontos"], escala_cm_por_pixel)
+
+    return {
+        **campos_imagem(analise),
+        "distancias": medidas["distancias"],
+        "angulos": medidas["angulos"],
+        "escala_cm_por_pixel": escala_cm_por_pixel,
+        **campos_confianca(analise, nomes_sagital),
+    }
+
+
+def processar_sagital(contents, ref_x1, ref_y1, ref_x2, ref_y2, referencia_metros, saida=None):
+    analise = analisar_sagital(contents, saida)
+    if analise is None:
+        return None
+    result = medir_sagital(analise, ref_x1, ref_y1, ref_x2, ref_y2, referencia_metros)
+    result["tempos"] = analise["tempos"]
+    return result
+
+
+def localizar_marcadores(contents, vista="frontal", atribuicao=None):
+    """
+    Só decodificação, detecção e rótulos, sem desenho nem codificação (prévia ao vivo).
+    Retorna {"pontos", "confiancas"}, como analisar_*, ou None.
+    """
+    img = decodificar_imagem(contents)
+    if img is None:
+        return None
+    pontos, confiancas = rotular_marcadores(detectar_candidatos(img), vista, img.shape[:2], atribuicao)
+    return {"pontos": pontos, "confiancas": confiancas}
@@ -0,0 +1,200 @@
+import json
+import os
+import secrets
+
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.processamento import FORMATOS_IMAGEM, SAIDA_PADRAO, MODOS_ATRIBUICAO
+from app.cache import CacheLRU
+from app.banco import executar_db
+
+router = APIRouter()
+
+# ---------------------------
+# Negociação do formato de resposta das rotas de processamento
+# ---------------------------
+# "json"      → resposta atual, com a imagem em base64 no campo "image" (padrão)
+# "multipart" → multipart/mixed: parte JSON com as medidas + parte binária com a imagem
+# "url"       → JSON sem a imagem, com "image_url" para buscá-la em /resultado-imagem/{token}
+#               A imagem fica no RESULTADO_IMAGEM_BACKEND. O padrão ("memoria") é a memória
+#               do processo: com vários workers (uvicorn --workers, gunicorn) o GET pode
+#               cair em outro worker e dar 404. Nesse caso use "redis", ou um único worker.
+MODOS_RESPOSTA = ("json", "multipart", "url")
+
+
+def escolher_resposta(accept, resposta=None):
+    """Usa o campo 'resposta' se enviado; senão, o cabeçalho Accept."""
+    if resposta:
+        if resposta not in MODOS_RESPOSTA:
+            raise HTTPException(status_code=400, detail=f"resposta deve ser um de: {', '.join(MODOS_RESPOSTA)}")
+        return resposta
+    if "multipart/mixed" in (accept or ""):
+        return "multipart"
+    return "json"
+
+
+def validar_formato_imagem(formato_imagem):
+    if formato_imagem not in FORMATOS_IMAGEM:
+        raise HTTPException(status_code=400, detail=f"formato_imagem deve ser um de: {', '.join(FORMATOS_IMAGEM)}")
+    return formato_imagem
+
+
+def _inteiro_entre(nome, valor, minimo, maximo):
+    if valor is not None and not minimo <= valor <= maximo:
+        raise HTTPException(status_code=400, detail=f"{nome} deve estar entre {minimo} e {maximo}")
+    return valor
+
+
+def validar_atribuicao(atribuicao):
+    if atribuicao is not None and atribuicao not in MODOS_ATRIBUICAO:
+        raise HTTPException(status_code=400, detail=f"atribuicao deve ser um de: {', '.join(MODOS_ATRIBUICAO)}")
+    return atribuicao
+
+
+def opcoes_saida(modo, formato_imagem, imagem=True, qualidade=None, lado_max=None, miniatura=None, atribuicao=None):
+    """Opções da imagem de saída do pipeline (ver SAIDA_PADRAO em app/processamento.py)."""
+    return {
+        **SAIDA_PADRAO,
+        "imagem": imagem,
+        "formato": validar_formato_imagem(formato_imagem),
+        "qualidade": _inteiro_entre("qualidade", qualidade, 1, 100),
+        # No modo json a imagem vem em base64; nos demais, em bytes crus
+        "base64": modo == "json",
+        "lado_max": _inteiro_entre("lado_max", lado_max, 64, 20000),
+        "miniatura": _inteiro_entre("miniatura", miniatura, 16, 1024),
+        "atribuicao": validar_atribuicao(atribuicao) or SAIDA_PADRAO["atribuicao"],
+    }
+
+
+# ---------------------------
+# Imagens de resultado de vida curta (modo url)
+# ---------------------------
+# Backends (RESULTADO_IMAGEM_BACKEND), como os do cache de listagens:
+# - "memoria" (padrão): CacheLRU do processo; só funciona com um worker (ver MODOS_RESPOSTA).
+# - "redis": compartilhado entre workers e instâncias (pacote redis, não incluído no
+#   requirements.txt); a imagem expira no próprio Redis após RESULTADO_IMAGEM_TTL.
+RESULTADO_IMAGEM_BACKEND = os.environ.get("RESULTADO_IMAGEM_BACKEND", "memoria")
+RESULTADO_IMAGEM_TTL = int(os.environ.get("RESULTADO_IMAGEM_TTL", 300))
+RESULTADO_IMAGEM_MAX = int(os.environ.get("RESULTADO_IMAGEM_MAX", 256))
+RESULTADO_IMAGEM_REDIS_URL = os.environ.get("RESULTADO_IMAGEM_REDIS_URL", "redis://localhost:6379/0")
+
+
+class ImagensMemoria:
+    bloqueante = False  # chamado direto no event loop
+
+    def __init__(self):
+        self._cache = CacheLRU(max_itens=RESULTADO_IMAGEM_MAX, ttl=RESULTADO_IMAGEM_TTL)
+
+    def guardar(self, token, media_type, conteudo):
+        self._cache.set(token, (media_type, conteudo), tamanho=len(conteudo))
+
+    def obter(self, token):
+        return self._cache.get(token)
+
+
+class ImagensRedis:
+    bloqueante = True  # E/S de rede: chamado numa thread do executor do banco
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESULTADO_IMAGEM_BACKEND=redis precisa do pacote redis (pip install redis)")
+        self._redis = redis.Redis.from_url(RESULTADO_IMAGEM_REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def guardar(self, token, media_type, conteudo):
+        # Tipo e bytes num só valor: "<media type>\n<imagem>"
+        self._redis.set(f"alignme:resultado-imagem:{token}", media_type.encode() + b"\n" + conteudo, ex=RESULTADO_IMAGEM_TTL)
+
+    def obter(self, token):
+        valor = self._redis.get(f"alignme:resultado-imagem:{token}")
+        if valor is None:
+            return None
+        media_type, _, conteudo = valor.partition(b"\n")
+        return media_type.decode(), conteudo
+
+
+BACKENDS_IMAGEM = {
+    "memoria": ImagensMemoria,
+    "redis": ImagensRedis,
+}
+
+_imagens = None
+
+
+def get_imagens():
+    global _imagens
+    if _imagens is None:
+        if RESULTADO_IMAGEM_BACKEND not in BACKENDS_IMAGEM:
+            raise RuntimeError(f"RESULTADO_IMAGEM_BACKEND desconhecido: {RESULTADO_IMAGEM_BACKEND}")
+        _imagens = BACKENDS_IMAGEM[RESULTADO_IMAGEM_BACKEND]()
+    return _imagens
+
+
+async def guardar_imagem(conteudo, media_type):
+    token = secrets.token_urlsafe(16)
+    imagens = get_imagens()
+    try:
+        if imagens.bloqueante:
+            await executar_db(imagens.guardar, token, media_type, conteudo)
+        else:
+            imagens.guardar(token, media_type, conteudo)
+    except Exception as e:
+        print(f"⚠️ Armazenamento das imagens de resultado indisponível: {e}")
+        raise HTTPException(status_code=503, detail="Armazenamento de imagens indisponível, tente resposta=json")
+    return token
+
+
+def obter_imagem(token):
+    return get_imagens().obter(token)
+
+
+@router.get("/resultado-imagem/{token}")
+def resultado_imagem(token: str):
+    item = obter_imagem(token)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Imagem expirada ou inexistente")
+    media_type, conteudo = item
+    return Response(content=conteudo, media_type=media_type, headers={"Cache-Control": "private, max-age=60"})
+
+
+# ---------------------------
+# Montagem da resposta
+# ---------------------------
+def _multipart(medidas, imagem, media_type):
+    boundary = secrets.token_hex(16)
+    corpo_json = json.dumps(jsonable_encoder(medidas), ensure_ascii=False).encode("utf-8")
+    partes = [
+        f"--{boundary}\r\nContent-Type: application/json; charset=utf-8\r\n"
+        f"Content-Disposition: inline; name=\"medidas\"\r\n\r\n".encode("utf-8"),
+        corpo_json,
+        f"\r\n--{boundary}\r\nContent-Type: {media_type}\r\n"
+        f"Content-Disposition: inline; name=\"image\"\r\n\r\n".encode("utf-8"),
+        imagem,
+        f"\r\n--{boundary}--\r\n".encode("utf-8"),
+    ]
+    return Response(content=b"".join(partes), media_type=f"multipart/mixed; boundary={boundary}")
+
+
+async def separar_imagem(result, modo, formato_imagem):
+    """Para o modo url: troca os bytes da imagem por image_url (usado também no lote)."""
+    if modo != "url" or not isinstance(result.get("image"), bytes):
+        return result
+    medidas = dict(result)
+    imagem = medidas.pop("image")
+    medidas["image_url"] = f"/resultado-imagem/{await guardar_imagem(imagem, FORMATOS_IMAGEM[formato_imagem][1])}"
+    return medidas
+
+
+async def montar_resposta(result, modo, formato_imagem):
+    if modo == "json":
+        return result
+    if "image" not in result:
+        # imagem=False: só as medidas, em JSON, qualquer que seja o modo
+        return JSONResponse(content=jsonable_encoder(result))
+    if modo == "url":
+        return JSONResponse(content=jsonable_encoder(await separar_imagem(result, modo, formato_imagem)))
+    medidas = dict(result)
+    imagem = medidas.pop("image")
+    return _multipart(medidas, imagem, FORMATOS_IMAGEM[formato_imagem][1])
@@ -0,0 +1,107 @@
+import os
+
+from fastapi import HTTPException, UploadFile, status
+
+# ---------------------------
+# Leitura limitada dos uploads de imagem (e de vídeo)
+# ---------------------------
+# O arquivo é lido em blocos direto para um único buffer, que cresce até o limite
+# configurado. O conteúdo é conferido pelos primeiros bytes (assinatura do formato)
+# antes de o restante ser lido, e o buffer é entregue ao decodificador sem cópia
+# (np.frombuffer aceita bytearray).
+UPLOAD_MAX_MB = float(os.environ.get("UPLOAD_MAX_MB", 25))
+UPLOAD_MAX_BYTES = int(UPLOAD_MAX_MB * 1024 * 1024)
+UPLOAD_BLOCO_BYTES = 1024 * 1024
+# Vídeos (app/video.py) não passam pela memória: vão em blocos para um arquivo temporário
+VIDEO_MAX_MB = float(os.environ.get("VIDEO_MAX_MB", 100))
+VIDEO_MAX_BYTES = int(VIDEO_MAX_MB * 1024 * 1024)
+
+# Assinaturas dos formatos que o OpenCV decodifica e o frontend envia
+_ASSINATURAS = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+
+
+def identificar_formato(cabecalho):
+    for assinatura, formato in _ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return formato
+    if cabecalho[:4] == b"RIFF" and cabecalho[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def identificar_formato_video(cabecalho):
+    # MP4/MOV: caixa "ftyp" logo no início; WebM/MKV: cabeçalho EBML; AVI: RIFF....AVI
+    if cabecalho[4:8] == b"ftyp":
+        return "mp4"
+    if cabecalho.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if cabecalho[:4] == b"RIFF" and cabecalho[8:12] == b"AVI ":
+        return "avi"
+    return None
+
+
+def identificar_texto(cabecalho):
+    # Planilhas e exportações (app/importacao.py): texto não tem bytes nulos
+    return None if b"\x00" in cabecalho else "texto"
+
+
+# tipo -> (identificador pela assinatura, nome e descrição usados nas mensagens de erro)
+_TIPOS = {
+    "imagem": (identificar_formato, "imagem", "uma imagem suportada (JPEG, PNG, WebP, BMP ou TIFF)"),
+    "video": (identificar_formato_video, "vídeo", "um vídeo suportado (MP4, MOV, WebM/MKV ou AVI)"),
+    "texto": (identificar_texto, "arquivo", "um arquivo de texto (CSV ou JSONL)"),
+}
+
+
+def _muito_grande(nome, limite):
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"{nome.capitalize()} maior que o limite de {limite / (1024 * 1024):g} MB",
+    )
+
+
+async def _blocos(file: UploadFile, limite, tipo):
+    """Gera os blocos do upload, conferindo a assinatura no primeiro e o tamanho acumulado."""
+    identificar, nome, descricao = _TIPOS[tipo]
+
+    # Tamanho já conhecido pelo parser do multipart: recusa sem ler nada
+    if file.size is not None and file.size > limite:
+        raise _muito_grande(nome, limite)
+
+    lidos = 0
+    while True:
+        bloco = await file.read(UPLOAD_BLOCO_BYTES)
+        if not bloco:
+            break
+        if not lidos and identificar(bloco[:16]) is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Arquivo enviado não é {descricao}",
+            )
+        lidos += len(bloco)
+        if lidos > limite:
+            raise _muito_grande(nome, limite)
+        yield bloco
+
+    if not lidos:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Arquivo de {nome} vazio")
+
+
+async def ler_upload(file: UploadFile, limite=None, tipo="imagem"):
+    """Lê o upload em blocos até o limite; recusa (413/415) arquivos grandes ou de outro tipo."""
+    buffer = bytearray()
+    async for bloco in _blocos(file, limite or UPLOAD_MAX_BYTES, tipo):
+        buffer += bloco
+    return buffer
+
+
+async def gravar_upload(file: UploadFile, destino, limite=None):
+    """Como ler_upload, mas para vídeos: grava os blocos em destino (arquivo aberto em modo binário)."""
+    async for bloco in _blocos(file, limite or VIDEO_MAX_BYTES, "video"):
+        destino.write(bloco)
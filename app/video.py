@@ -0,0 +1,262 @@
+import os
+import tempfile
+
+import cv2
+import numpy as np
+from fastapi import APIRouter, File, UploadFile, Form, Request
+from fastapi.responses import JSONResponse
+from app.desenho import desenhar_malha, desenhar_linhas_com_conexoes
+from app.medidas import nomes_frontal, conexoes_frontal, nomes_sagital, conexoes_sagital
+from app.metricas import etapa, cronometrar_pipeline
+from app.processamento import (
+    executar, escala_deteccao, limites_marcador, _mascara_marcadores, _marcadores_validos,
+    detectar_candidatos, rotular_marcadores, saida_imagem, precisa_desenho, SAIDA_PADRAO,
+)
+from app.cache import registrar_tempos_pool
+from app.lote import preparar_item, CAMPOS_SAGITAL
+from app.upload import gravar_upload
+from app.respostas import escolher_resposta, opcoes_saida, montar_resposta
+
+router = APIRouter()
+
+# ---------------------------
+# Vídeo: detecção no primeiro frame e rastreamento nos seguintes
+# ---------------------------
+# Depois da detecção completa, cada marcador é procurado só numa janela pequena ao
+# redor da posição prevista (posição anterior + deslocamento do último frame). Se algum
+# marcador se perde, o frame volta para a detecção completa. Os rótulos e a confiança
+# vêm da detecção (encaixe no modelo) e são mantidos enquanto o rastreamento segue.
+VIDEO_MAX_FRAMES = int(os.environ.get("VIDEO_MAX_FRAMES", 300))
+# Meia janela de busca em múltiplos do raio do marcador: cobre o disco e o movimento entre frames
+VIDEO_JANELA_RAIOS = float(os.environ.get("VIDEO_JANELA_RAIOS", 3))
+
+_VISTAS = {
+    "frontal": (nomes_frontal, conexoes_frontal),
+    "sagital": (nomes_sagital, conexoes_sagital),
+}
+
+
+# Colunas zeradas entre as janelas no mosaico: mais largas que o alcance do blur e da morfologia
+_SEPARACAO_JANELAS = 8
+
+
+def rastrear_marcadores(img, previstos, raios, escala):
+    """
+    Procura cada marcador numa janela ao redor da posição prevista.
+    Retorna (pontos, raios) na mesma ordem de previstos, ou None se algum se perdeu.
+
+    As janelas são postas lado a lado num único mosaico em tons de cinza, filtrado e
+    segmentado de uma vez: em recortes pequenos o custo fixo de cada chamada do OpenCV
+    domina, e faixas largas são bem mais rápidas que colunas altas.
+    """
+    h, w = img.shape[:2]
+    limites = limites_marcador(escala)
+    meias = [int(np.ceil(VIDEO_JANELA_RAIOS * raio)) for raio in raios]
+    lado = 2 * max(meias, default=0) + 1
+    passo = lado + _SEPARACAO_JANELAS
+
+    gray = np.zeros((lado, passo * len(previstos)), np.uint8)
+    origens = []
+    for i, ((px, py), meia_janela) in enumerate(zip(previstos, meias)):
+        x0, y0 = max(px - meia_janela, 0), max(py - meia_janela, 0)
+        x1, y1 = min(px + meia_janela + 1, w), min(py + meia_janela + 1, h)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        gray[:y1 - y0, i * passo:i * passo + x1 - x0] = cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        # Posição no mosaico -> posição no frame
+        origens.append((x0 - i * passo, y0))
+
+    contours, _ = cv2.findContours(_mascara_marcadores(gray), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    melhores = [None] * len(previstos)
+    for x, y, r in _marcadores_validos(contours, gray, limites):
+        i = int(x) // passo
+        dx, dy = origens[i]
+        px, py = previstos[i]
+        d = (x + dx - px) ** 2 + (y + dy - py) ** 2
+        if melhores[i] is None or d < melhores[i][0]:
+            melhores[i] = (d, int(x) + dx, int(y) + dy, r)
+
+    if any(m is None for m in melhores):
+        return None
+    pontos = [m[1:3] for m in melhores]
+    # Dois marcadores próximos não podem cair no mesmo blob
+    if any(
+        (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 <= limites["raio_min"] ** 2
+        for i, a in enumerate(pontos) for b in pontos[i + 1:]
+    ):
+        return None
+    return pontos, [m[3] for m in melhores]
+
+
+def _movimento(anteriores, pontos):
+    """Deslocamento médio (px) entre frames consecutivos, nos marcadores presentes nos dois."""
+    if not anteriores or len(anteriores) != len(pontos):
+        return None
+    pares = [(a, b) for a, b in zip(anteriores, pontos) if a is not None and b is not None]
+    if not pares:
+        return None
+    a, b = np.asarray(pares, np.float64).transpose(1, 0, 2)
+    return round(float(np.hypot(*(b - a).T).mean()), 2)
+
+
+def _redetectar(img, vista, escala, atribuicao=None):
+    """Detecção completa + rótulos; o raio de cada ponto vem do candidato atribuído."""
+    candidatos = detectar_candidatos(img)
+    pontos, confiancas = rotular_marcadores(candidatos, vista, img.shape[:2], atribuicao)
+    raio_padrao = limites_marcador(escala)["raio_max"] / 2
+    raio_de = {(x, y): r for x, y, r in candidatos}
+    raios = [None if p is None else raio_de.get(tuple(p), raio_padrao) for p in pontos]
+    return pontos, raios, confiancas
+
+
+@cronometrar_pipeline
+def analisar_video(caminho, vista="frontal", passo=1, saida=None):
+    """
+    Analisa até VIDEO_MAX_FRAMES frames (um a cada `passo`). Retorna os pontos de cada
+    frame e, como nas fotos, {"pontos", "image"} do frame mais estável, ou None se o
+    vídeo não puder ser lido.
+    """
+    saida = saida or SAIDA_PADRAO
+    cap = cv2.VideoCapture(caminho)
+    if not cap.isOpened():
+        return None
+
+    frames = []
+    melhor = None  # (chave de ordenação, índice do frame, imagem, pontos, confiancas)
+    pontos, raios, confiancas, velocidade = [], [], None, None
+    redeteccoes = 0
+    indice = -1
+    try:
+        while len(frames) < VIDEO_MAX_FRAMES:
+            with etapa("decodificacao"):
+                # Pula os frames entre um analisado e o próximo (grab não converte a imagem)
+                for _ in range(passo - 1 if frames else 0):
+                    if not cap.grab():
+                        break
+                    indice += 1
+                ok, img = cap.read()
+            if not ok:
+                break
+            indice += 1
+            # Mesma escala da detecção: abaixo de LADO_BASE (ex.: 720p) ficam os limites calibrados
+            escala = escala_deteccao(img)
+
+            # Só os pontos do modelo encontrados na última detecção são rastreados
+            presentes = [i for i, p in enumerate(pontos) if p is not None]
+            rastreado = None
+            if presentes:
+                with etapa("rastreamento"):
+                    previstos = [
+                        pontos[i] if velocidade is None else
+                        (pontos[i][0] + velocidade[i][0], pontos[i][1] + velocidade[i][1])
+                        for i in presentes
+                    ]
+                    rastreado = rastrear_marcadores(img, previstos, [raios[i] for i in presentes], escala)
+
+            if rastreado is not None:
+                novos, raios = list(pontos), list(raios)
+                for i, ponto, raio in zip(presentes, *rastreado):
+                    novos[i], raios[i] = ponto, raio
+                origem = "rastreamento"
+            else:
+                with etapa("deteccao"):
+                    novos, raios, confiancas = _redetectar(img, vista, escala, saida["atribuicao"])
+                origem = "deteccao"
+                redeteccoes += bool(frames)
+
+            movimento = _movimento(pontos, novos)
+            velocidade = None if origem == "deteccao" or movimento is None else [
+                None if a is None else (b[0] - a[0], b[1] - a[1]) for b, a in zip(novos, pontos)
+            ]
+            pontos = novos
+            frames.append({
+                "indice": indice,
+                "tempo_ms": round(cap.get(cv2.CAP_PROP_POS_MSEC), 1),
+                "origem": origem,
+                "pontos": pontos,
+                "movimento_px": movimento,
+            })
+
+            # Frame mais estável: mais marcadores encontrados e menor deslocamento
+            encontrados = sum(p is not None for p in pontos)
+            chave = (-encontrados, np.inf if movimento is None else movimento)
+            if melhor is None or chave < melhor[0]:
+                melhor = (chave, indice, img, pontos, confiancas)
+    finally:
+        cap.release()
+
+    if melhor is None:
+        return None
+
+    _, indice_melhor, img, pontos_melhor, confiancas_melhor = melhor
+    analise = {"pontos": pontos_melhor, "confiancas": confiancas_melhor}
+    if precisa_desenho(saida):
+        nomes, conexoes = _VISTAS[vista]
+        with etapa("desenho"):
+            desenhar_linhas_com_conexoes(img, pontos_melhor, nomes, conexoes)
+            desenhar_malha(img, spacing=50)
+        analise.update(saida_imagem(img, saida))
+
+    return {
+        **analise,
+        "melhor_frame": indice_melhor,
+        "frames_analisados": len(frames),
+        "redeteccoes": redeteccoes,
+        "frames": frames,
+    }
+
+
+# ---------------------------
+# Rota: vídeo curto -> pontos por frame + medidas do frame mais estável
+# ---------------------------
+@router.post("/process-video")
+async def process_video(
+    request: Request,
+    file: UploadFile = File(...),
+    vista: str = Form("frontal"),
+    passo: int = Form(1),  # analisa 1 a cada `passo` frames
+    referencia_pixels: float = Form(None),  # vista frontal
+    ref_x1: float = Form(None),  # vista sagital (ref_x1..ref_y2 e referencia_metros)
+    ref_y1: float = Form(None),
+    ref_x2: float = Form(None),
+    ref_y2: float = Form(None),
+    referencia_metros: float = Form(None),
+    resposta: str = Form(None),  # json (padrão) | multipart | url — ver app/respostas.py
+    formato_imagem: str = Form("jpeg"),  # jpeg | webp
+    imagem: bool = Form(True),  # false: só as medidas, sem desenhar nem codificar a imagem
+    qualidade: int = Form(None),  # qualidade jpeg/webp, 1-100 (padrão do OpenCV: 95)
+    lado_max: int = Form(None),  # reduz a imagem anotada até este lado maior (px)
+    miniatura: int = Form(None),  # lado maior (px) de uma prévia em base64 no campo "miniatura"
+    atribuicao: str = Form(None),  # linhas (padrão) | modelo: rótulos pelo modelo anatômico, com confiança
+):
+    modo = escolher_resposta(request.headers.get("accept"), resposta)
+    saida = opcoes_saida(modo, formato_imagem, imagem, qualidade, lado_max, miniatura, atribuicao)
+    if passo < 1:
+        return JSONResponse(content={"error": "passo deve ser maior ou igual a 1"}, status_code=400)
+
+    parametros = {"vista": vista, "referencia_pixels": referencia_pixels}
+    parametros.update((c, v) for c, v in zip(CAMPOS_SAGITAL, (ref_x1, ref_y1, ref_x2, ref_y2, referencia_metros)))
+    try:
+        vista, medir, args = preparar_item(parametros)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    # O OpenCV lê vídeo de arquivo: o upload vai em blocos para um temporário
+    destino = tempfile.NamedTemporaryFile(suffix=".video", delete=False)
+    try:
+        with etapa("upload"), destino:
+            await gravar_upload(file, destino)
+        with etapa("pool"):
+            analise = await executar(analisar_video, destino.name, vista, passo, saida)
+    finally:
+        os.remove(destino.name)
+
+    if analise is None:
+        return JSONResponse(content={"error": "Erro ao processar vídeo"}, status_code=400)
+    registrar_tempos_pool(analise.pop("tempos"))
+
+    with etapa("medidas"):
+        result = medir(analise, *args)
+    result["video"] = {k: analise[k] for k in ("melhor_frame", "frames_analisados", "redeteccoes", "frames")}
+    with etapa("resposta"):
+        return await montar_resposta(result, modo, formato_imagem)
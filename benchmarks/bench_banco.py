@@ -0,0 +1,122 @@
+"""
+Benchmark das rotas com banco sob carga concorrente.
+
+Troca pymysql.connect por um banco simulado em memória em que cada consulta leva
+--latencia ms (como um round-trip até o Azure) e dispara --concorrencia requisições
+ao mesmo tempo contra o app, sem servidor HTTP (httpx + ASGI). Enquanto isso, mede a
+latência de uma rota sem banco (/cache-analises/estatisticas): se o event loop estiver
+preso numa consulta, ela sobe junto. O cache das listagens é desligado
+(CACHE_LISTAGENS=0) para que toda requisição passe pelo executor e pelo pool.
+
+Uso:
+    python -m benchmarks.bench_banco
+    python -m benchmarks.bench_banco --latencia 50 --concorrencia 1 10 40
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+import numpy as np
+import pymysql
+
+
+class _CursorSimulado:
+    def __init__(self, latencia):
+        self.latencia = latencia
+
+    def execute(self, query, args=None):
+        time.sleep(self.latencia)  # bloqueia a thread, como o pymysql
+        return 0
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConexaoSimulada:
+    open = True
+    server_status = 0
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        time.sleep(3 * latencia)  # handshake TLS
+
+    def cursor(self, cursor=None):
+        return _CursorSimulado(self.latencia)
+
+    def ping(self, reconnect=False):
+        time.sleep(self.latencia)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+async def rodada(app, rotas, concorrencia, total):
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        fila = iter(range(total))
+        latencias_sem_banco = []
+
+        async def trabalhador():
+            for i in fila:
+                r = await cliente.get(rotas[i % len(rotas)])
+                assert r.status_code == 200, r.text
+
+        async def sonda(parar):
+            while not parar.is_set():
+                t = time.perf_counter()
+                await cliente.get("/cache-analises/estatisticas")
+                latencias_sem_banco.append(time.perf_counter() - t)
+                await asyncio.sleep(0.005)
+
+        parar = asyncio.Event()
+        tarefa_sonda = asyncio.create_task(sonda(parar))
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        await tarefa_sonda
+    return total / duracao, float(np.percentile(latencias_sem_banco, 95)) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia", type=float, default=20.0, help="ms por consulta")
+    parser.add_argument("--concorrencia", nargs="+", type=int, default=[1, 5, 10, 20])
+    parser.add_argument("--requisicoes", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    latencia = args.latencia / 1000
+    pymysql.connect = lambda **kw: ConexaoSimulada(latencia)
+    os.environ["CACHE_LISTAGENS"] = "0"
+    from app.main import app  # sem lifespan no ASGITransport: as migrações não rodam
+
+    rotas = ["/listar-pacientes", "/listar-medicos", "/historico/1"]
+    print(f"consulta simulada: {args.latencia:g} ms")
+    print(f"{'concorrência':>12}{'req/s':>9}{'p95 rota sem banco (ms)':>26}")
+    for c in args.concorrencia:
+        vazao, p95 = asyncio.run(rodada(app, rotas, c, args.requisicoes))
+        print(f"{c:>12}{vazao:>9.1f}{p95:>26.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark da pontuação de brilho dos candidatos em detectar_marcadores_brancos.
+
+Compara a versão antiga (máscara do tamanho da imagem por candidato) com
+brilho_medio_disco (recorte limitado ao disco) em imagens sintéticas com
+quantidade crescente de candidatos, e confere que os pontos são os mesmos.
+
+Uso:
+    python -m benchmarks.bench_brilho_marcadores
+"""
+import time
+
+import cv2
+import numpy as np
+
+from app.processamento import brilho_medio_disco
+
+
+def gerar_imagem(largura, altura, n_candidatos, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((altura, largura, 3), 60, np.uint8)
+    for _ in range(n_candidatos):
+        x = int(rng.integers(0, largura))
+        y = int(rng.integers(0, altura))
+        r = int(rng.integers(6, 20))
+        # Metade dos blobs fica abaixo do limiar de brilho para exercitar a rejeição
+        cor = int(rng.choice([170, 255]))
+        cv2.circle(img, (x, y), r, (cor, cor, cor), -1)
+    return img
+
+
+def candidatos(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (7, 7), 0)
+    _, thresh = cv2.threshold(blur, 150, 255, cv2.THRESH_BINARY)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    circulos = []
+    for cnt in contours:
+        (x, y), radius = cv2.minEnclosingCircle(cnt)
+        circulos.append((int(x), int(y), int(radius)))
+    return gray, circulos
+
+
+def pontuar_mascara_cheia(gray, circulos):
+    pontos = []
+    for x, y, r in circulos:
+        mask = np.zeros_like(gray)
+        cv2.circle(mask, (x, y), r, 255, -1)
+        if cv2.mean(gray, mask=mask)[0] > 180:
+            pontos.append((x, y))
+    return pontos
+
+
+def pontuar_disco(gray, circulos):
+    pontos = []
+    for x, y, r in circulos:
+        if brilho_medio_disco(gray, x, y, r) > 180:
+            pontos.append((x, y))
+    return pontos
+
+
+def medir(fn, *args, repeticoes=3):
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = fn(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    largura, altura = 4000, 3000  # ~12 MP
+    print(f"Imagem {largura}x{altura}")
+    print(f"{'candidatos':>10} {'mascara cheia (ms)':>20} {'disco (ms)':>12} {'ganho':>8}")
+    for n in (10, 50, 100, 200, 400):
+        img = gerar_imagem(largura, altura, n)
+        gray, circulos = candidatos(img)
+        t_antigo, p_antigo = medir(pontuar_mascara_cheia, gray, circulos)
+        t_novo, p_novo = medir(pontuar_disco, gray, circulos)
+        assert p_antigo == p_novo, "pontuação divergente"
+        print(f"{len(circulos):>10} {t_antigo * 1000:>20.1f} {t_novo * 1000:>12.2f} "
+              f"{t_antigo / t_novo:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark do desenho da imagem anotada (malha + pontos/conexões).
+
+Compara a forma antiga (cópia da imagem + uma chamada cv2.line por linha da malha)
+com app.desenho (anotação direto na imagem + malha por faixas em cache), conferindo
+que as duas produzem exatamente os mesmos pixels.
+
+Uso:
+    python -m benchmarks.bench_desenho
+"""
+import time
+
+import cv2
+import numpy as np
+
+from app.desenho import desenhar_malha, desenhar_linhas_com_conexoes
+from app.processamento import nomes_frontal, conexoes_frontal
+
+
+def malha_antiga(img, spacing=50, color=(200, 200, 200), thickness=1):
+    h, w = img.shape[:2]
+    for x in range(0, w, spacing):
+        cv2.line(img, (x, 0), (x, h), color, thickness)
+    for y in range(0, h, spacing):
+        cv2.line(img, (0, y), (w, y), color, thickness)
+    return img
+
+
+def anotar_antigo(img, pontos):
+    out_img = img.copy()
+    desenhar_linhas_com_conexoes(out_img, pontos, nomes_frontal, conexoes_frontal)
+    return malha_antiga(out_img, spacing=50)
+
+
+def anotar_novo(img, pontos):
+    desenhar_linhas_com_conexoes(img, pontos, nomes_frontal, conexoes_frontal)
+    return desenhar_malha(img, spacing=50)
+
+
+def medir(fn, img, pontos, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        entrada = img.copy()  # fora da medição: cada rodada parte da imagem limpa
+        inicio = time.perf_counter()
+        fn(entrada, pontos)
+        tempos.append(time.perf_counter() - inicio)
+    return float(np.median(tempos))
+
+
+def main():
+    print(f"{'resolução':>11} {'antigo (ms)':>12} {'novo (ms)':>10} {'ganho':>7}")
+    for largura, altura in ((960, 1280), (3000, 4000), (4284, 5712)):
+        img = np.random.default_rng(0).integers(0, 255, (altura, largura, 3), dtype=np.uint8)
+        pontos = [(int(largura * (0.4 + 0.2 * (i % 2))), int(altura * (0.05 + 0.13 * (i // 2))))
+                  for i in range(len(nomes_frontal))]
+        for thickness in (1, 3):
+            a = malha_antiga(img.copy(), thickness=thickness)
+            b = desenhar_malha(img.copy(), thickness=thickness)
+            assert np.array_equal(a, b), f"malha divergente (espessura {thickness})"
+        assert np.array_equal(anotar_antigo(img, pontos), anotar_novo(img.copy(), pontos))
+        t_antigo = medir(anotar_antigo, img, pontos)
+        t_novo = medir(anotar_novo, img, pontos)
+        print(f"{largura:>5}x{altura:<5} {t_antigo * 1000:>12.1f} {t_novo * 1000:>10.1f} {t_antigo / t_novo:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark da montagem da resposta do histórico: medidas em texto lidas com eval() e
+serializadas pelo caminho padrão do FastAPI (jsonable_encoder + json.dumps) contra
+colunas JSON lidas com orjson e enviadas com ORJSONResponse. Usa medidas reais do
+Medidor, sem fotos (como no resumo paginado); melhor de 3 execuções.
+
+Uso:
+    python -m benchmarks.bench_historico
+"""
+from datetime import datetime, timedelta
+import json
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.banco import ler_json, interpretar_json
+from app.medidas import medidor_frontal, medidor_sagital
+
+
+def linhas(n, rng):
+    inicio = datetime(2024, 1, 1)
+    for i in range(n):
+        frontal = medidor_frontal.medir(rng.integers(0, 4000, (medidor_frontal.n_pontos, 2)).tolist(), 0.1)
+        sagital = medidor_sagital.medir(rng.integers(0, 4000, (medidor_sagital.n_pontos, 2)).tolist(), 0.1)
+        yield {
+            "id_avaliacao": i,
+            "id_paciente": 1,
+            "medidas_frontal": interpretar_json(frontal),
+            "medidas_sagital": interpretar_json(sagital),
+            "angulos_sagital": interpretar_json(sagital.get("angulos", [])),
+            "altura": 1.7,
+            "resultado_avaliacao": "Desvio postural discreto",
+            "data_avaliacao": inicio + timedelta(days=i),
+        }
+
+
+def antes(resultados):
+    for r in resultados:
+        for campo in ("medidas_frontal", "medidas_sagital", "angulos_sagital"):
+            r[campo] = eval(r[campo].replace("true", "True").replace("false", "False").replace("null", "None"))
+    return JSONResponse(jsonable_encoder(resultados)).body
+
+
+def depois(resultados):
+    for r in resultados:
+        for campo in ("medidas_frontal", "medidas_sagital", "angulos_sagital"):
+            r[campo] = ler_json(r[campo])
+    return ORJSONResponse(resultados).body
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'avaliações':>10} {'eval + encoder (ms)':>20} {'json + orjson (ms)':>19} {'ganho':>7}")
+    for n in (30, 300, 3000):
+        base = list(linhas(n, rng))
+        tempos = []
+        for fn in (antes, depois):
+            melhor = float("inf")
+            for _ in range(3):
+                copia = [dict(r) for r in base]
+                inicio = time.perf_counter()
+                corpo = fn(copia)
+                melhor = min(melhor, time.perf_counter() - inicio)
+            assert json.loads(corpo)[0]["id_avaliacao"] == 0
+            tempos.append(melhor)
+        print(f"{n:>10} {tempos[0] * 1000:>20.1f} {tempos[1] * 1000:>19.1f} {tempos[0] / tempos[1]:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Benchmark do cálculo de medidas: Medidor.medir (um conjunto por vez) contra
+Medidor.medir_lote (todos os conjuntos empilhados numa única passada NumPy),
+como numa reanálise de avaliações antigas.
+
+Uso:
+    python -m benchmarks.bench_medidas
+"""
+import time
+
+import numpy as np
+
+from app.medidas import medidor_frontal, medidor_sagital
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'vista':>8} {'conjuntos':>10} {'um a um (ms)':>13} {'lote (ms)':>10} {'ganho':>7}")
+    for nome, medidor in (("frontal", medidor_frontal), ("sagital", medidor_sagital)):
+        for n in (100, 1000, 10000):
+            conjuntos = [rng.integers(0, 4000, (medidor.n_pontos, 2)).tolist() for _ in range(n)]
+            escalas = rng.uniform(0.05, 0.5, n)
+
+            inicio = time.perf_counter()
+            um_a_um = [medidor.medir(c, e) for c, e in zip(conjuntos, escalas)]
+            t_um = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            lote = medidor.medir_lote(medidor.empilhar(conjuntos), escalas)
+            t_lote = time.perf_counter() - inicio
+
+            esperado = [[d["distancia_cm"] for d in m["distancias"]] for m in um_a_um]
+            assert np.array_equal(np.array(esperado), lote["distancias_cm"])
+            print(f"{nome:>8} {n:>10} {t_um * 1000:>13.1f} {t_lote * 1000:>10.1f} {t_um / t_lote:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark da detecção em pirâmide (detectar_marcadores_piramide) contra a detecção
+em resolução cheia (detectar_marcadores_brancos) em fotos sintéticas de celular.
+
+Os marcadores têm tamanho proporcional à resolução, como numa foto real tirada à
+mesma distância. Para cada resolução mostra o tempo médio e quantos dos marcadores
+verdadeiros cada modo encontrou (erro máximo de 3 px por marcador).
+
+Uso:
+    python -m benchmarks.bench_piramide
+"""
+import time
+
+import cv2
+import numpy as np
+
+from app.processamento import LADO_BASE, detectar_marcadores_brancos, detectar_marcadores_piramide
+
+
+def gerar_imagem(largura, altura, n_marcadores=14, seed=0):
+    rng = np.random.default_rng(seed)
+    escala = max(largura, altura) / LADO_BASE
+    img = rng.integers(40, 90, (altura, largura, 3), dtype=np.uint8)
+    raio = int(12 * escala)
+    marcadores = []
+    for i in range(n_marcadores):
+        x = int(largura * (0.35 + 0.3 * (i % 2)))
+        y = int(altura * (0.05 + 0.9 * (i // 2) / (n_marcadores // 2)))
+        cv2.circle(img, (x, y), raio, (255, 255, 255), -1, cv2.LINE_AA)
+        marcadores.append((x, y))
+    return img, marcadores
+
+
+def acertos(encontrados, verdade, tolerancia=3):
+    total = 0
+    for x, y in verdade:
+        if any(abs(x - px) <= tolerancia and abs(y - py) <= tolerancia for px, py in encontrados):
+            total += 1
+    return total
+
+
+def medir(fn, img, repeticoes=5):
+    tempos = []
+    pontos = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        pontos = fn(img)
+        tempos.append(time.perf_counter() - inicio)
+    return float(np.median(tempos)), pontos
+
+
+def main():
+    print(f"{'resolução':>11} {'cheia (ms)':>11} {'acertos':>8} {'pirâmide (ms)':>14} {'acertos':>8}")
+    for largura, altura in ((960, 1280), (2268, 4032), (3000, 4000), (4284, 5712)):
+        img, verdade = gerar_imagem(largura, altura)
+        t_cheia, p_cheia = medir(detectar_marcadores_brancos, img)
+        t_pir, p_pir = medir(detectar_marcadores_piramide, img)
+        print(f"{largura:>5}x{altura:<5} {t_cheia * 1000:>11.1f} {acertos(p_cheia, verdade):>5}/{len(verdade)}"
+              f" {t_pir * 1000:>14.1f} {acertos(p_pir, verdade):>5}/{len(verdade)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark do modo vídeo: rastreamento em janelas (app/video.py) contra a detecção
+completa em todos os frames, num vídeo sintético com os marcadores balançando.
+
+Mostra o tempo médio por frame de cada estratégia (sem contar a decodificação do
+vídeo, igual nas duas), quantos frames precisaram voltar à detecção completa e o
+erro médio dos pontos rastreados.
+
+Uso:
+    python -m benchmarks.bench_video
+"""
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from app.processamento import LADO_BASE, detectar_marcadores, reordenar_pontos
+from app.video import rastrear_marcadores
+from app.processamento import limites_marcador
+from benchmarks.sintetico import gerar_video
+
+
+def ler_frames(caminho):
+    cap = cv2.VideoCapture(caminho)
+    frames = []
+    while True:
+        ok, img = cap.read()
+        if not ok:
+            break
+        frames.append(img)
+    cap.release()
+    return frames
+
+
+def medir(largura, altura, n_frames=60):
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "balanco.avi")
+        verdade = gerar_video(caminho, "frontal", largura, altura, n_frames)
+        frames = ler_frames(caminho)
+    escala = max(largura, altura) / LADO_BASE
+
+    t = time.perf_counter()
+    for img in frames:
+        reordenar_pontos(detectar_marcadores(img))
+    t_completo = (time.perf_counter() - t) / len(frames)
+
+    t = time.perf_counter()
+    pontos = reordenar_pontos(detectar_marcadores(frames[0]))
+    raios = [limites_marcador(escala)["raio_max"] / 2] * len(pontos)
+    redeteccoes, erros = 0, []
+    for img, certos in zip(frames[1:], verdade[1:]):
+        rastreado = rastrear_marcadores(img, pontos, raios, escala)
+        if rastreado is None:
+            redeteccoes += 1
+            pontos = reordenar_pontos(detectar_marcadores(img))
+            raios = [limites_marcador(escala)["raio_max"] / 2] * len(pontos)
+            continue
+        pontos, raios = rastreado
+        erros.append(np.mean([np.hypot(x - cx, y - cy) for (x, y), (cx, cy) in zip(pontos, certos)]))
+    t_rastreio = (time.perf_counter() - t) / len(frames)
+
+    return t_completo, t_rastreio, redeteccoes, float(np.mean(erros)) if erros else float("nan")
+
+
+def main():
+    cv2.setNumThreads(1)
+    print(f"{'resolução':<11}{'completo ms':>12}{'rastreio ms':>12}{'razão':>7}{'redet.':>7}{'erro px':>8}")
+    for largura, altura in [(720, 1280), (1080, 1920)]:
+        t_completo, t_rastreio, redeteccoes, erro = medir(largura, altura)
+        print(f"{largura}x{altura:<6}{t_completo * 1000:>12.2f}{t_rastreio * 1000:>12.2f}"
+              f"{t_rastreio / t_completo:>7.2f}{redeteccoes:>7}{erro:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
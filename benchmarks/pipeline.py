@@ -0,0 +1,214 @@
+"""
+Suíte de benchmark do pipeline de marcadores (frontal e sagital).
+
+Gera fotos sintéticas (benchmarks/sintetico.py) variando resolução, ruído e
+distratores, e cronometra cada etapa do pipeline como as rotas executam:
+decodificação, detecção, atribuição dos rótulos, medidas, desenho, codificação JPEG
+e base64. Para cada cenário mostra p50/p95 por etapa, throughput (imagens/s em um
+núcleo), a precisão da detecção contra as posições verdadeiras dos marcadores e a
+fração de rótulos corretos ("modelo": encaixe no modelo anatômico; "linhas": ordem
+por faixas de altura). A precisão é a média de --corpos fotos, cada uma com um corpo
+sorteado independentemente do modelo (ver benchmarks/sintetico.py).
+
+Uso:
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --resolucoes 960x1280 3024x4032 --modos completo piramide
+    python -m benchmarks.pipeline --min-recall 0.95 --json resultado.json
+    python -m benchmarks.pipeline --atribuicoes modelo linhas --falsos 0 5 100
+
+Com --min-recall o comando termina com código 1 se algum cenário detectar menos
+marcadores do que o mínimo, para que otimizações não degradem a detecção sem aviso.
+"""
+import argparse
+import base64
+import itertools
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from app.desenho import desenhar_malha, desenhar_linhas_com_conexoes
+from app.medidas import medidor_frontal, medidor_sagital, nomes_frontal, nomes_sagital
+from app.medidas import conexoes_frontal, conexoes_sagital
+from app.processamento import (
+    LADO_BASE, codificar_imagem, decodificar_imagem, candidatos_marcadores_brancos,
+    candidatos_marcadores_piramide, ordenar_pontos,
+)
+from app.atribuicao import atribuir_marcadores
+from benchmarks.sintetico import avaliar_deteccao, avaliar_rotulos, gerar_foto
+
+ETAPAS = ("decodificacao", "deteccao", "atribuicao", "medidas", "desenho", "codificacao", "base64")
+
+DETECTORES = {
+    "completo": candidatos_marcadores_brancos,
+    "piramide": candidatos_marcadores_piramide,
+}
+
+
+def _rotular_linhas(candidatos, vista, forma):
+    pontos = sorted(((x, y) for x, y, _ in candidatos), key=lambda p: (p[1], p[0]))
+    return ordenar_pontos(pontos, vista)
+
+
+def _rotular_modelo(candidatos, vista, forma):
+    pontos, _ = atribuir_marcadores(candidatos, vista, forma)
+    return pontos if pontos is not None else _rotular_linhas(candidatos, vista, forma)
+
+
+ATRIBUICOES = {
+    "modelo": _rotular_modelo,
+    "linhas": _rotular_linhas,
+}
+
+VISTAS = {
+    "frontal": (medidor_frontal, nomes_frontal, conexoes_frontal),
+    "sagital": (medidor_sagital, nomes_sagital, conexoes_sagital),
+}
+
+
+def executar_pipeline(contents, vista, modo, atribuicao="modelo"):
+    """Executa o pipeline uma vez; retorna (tempos por etapa em s, pontos detectados, pontos ordenados)."""
+    medidor, nomes, conexoes = VISTAS[vista]
+    tempos = {}
+
+    t = time.perf_counter()
+    img = decodificar_imagem(contents)
+    tempos["decodificacao"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    candidatos = DETECTORES[modo](img)
+    tempos["deteccao"] = time.perf_counter() - t
+    pontos = [(x, y) for x, y, _ in candidatos]
+
+    t = time.perf_counter()
+    ordenados = ATRIBUICOES[atribuicao](candidatos, vista, img.shape[:2])
+    tempos["atribuicao"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    medidor.medir(ordenados, 0.2)
+    tempos["medidas"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    desenhar_linhas_com_conexoes(img, ordenados, nomes, conexoes)
+    desenhar_malha(img, spacing=50)
+    tempos["desenho"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    jpeg = codificar_imagem(img, "jpeg")
+    tempos["codificacao"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    base64.b64encode(jpeg)
+    tempos["base64"] = time.perf_counter() - t
+
+    return tempos, pontos, ordenados
+
+
+def rodar_cenario(vista, resolucao, ruido, distratores, falsos, modo, atribuicao, repeticoes, corpos=1, seed=0):
+    largura, altura = resolucao
+    fotos = [
+        gerar_foto(vista, largura, altura, ruido=ruido, distratores=distratores, falsos=falsos, seed=seed + i)
+        for i in range(corpos)
+    ]
+    contents, verdade = fotos[0]
+    tolerancia = max(3.0, 3.0 * max(largura, altura) / LADO_BASE)
+
+    executar_pipeline(contents, vista, modo, atribuicao)  # aquecimento (caches, alocações)
+    amostras = {etapa: [] for etapa in ETAPAS}
+    totais = []
+    for _ in range(repeticoes):
+        tempos, pontos, ordenados = executar_pipeline(contents, vista, modo, atribuicao)
+        for etapa in ETAPAS:
+            amostras[etapa].append(tempos[etapa])
+        totais.append(sum(tempos.values()))
+
+    # Precisão: média entre os corpos sorteados (a primeira foto é a cronometrada)
+    avaliacoes = []
+    for i, (conteudo, verdade) in enumerate(fotos):
+        if i:
+            _, pontos, ordenados = executar_pipeline(conteudo, vista, modo, atribuicao)
+        avaliacao = avaliar_deteccao(pontos, verdade, tolerancia)
+        avaliacao["rotulos"] = avaliar_rotulos(ordenados, verdade, tolerancia)
+        avaliacoes.append(avaliacao)
+    precisao = {
+        chave: None if any(a[chave] is None for a in avaliacoes) else float(np.mean([a[chave] for a in avaliacoes]))
+        for chave in avaliacoes[0]
+    }
+    precisao["rotulos_min"] = min(a["rotulos"] for a in avaliacoes)
+
+    def ms(valores, p):
+        return round(float(np.percentile(valores, p)) * 1000, 2)
+
+    return {
+        "vista": vista,
+        "resolucao": f"{largura}x{altura}",
+        "ruido": ruido,
+        "distratores": distratores,
+        "falsos": falsos,
+        "corpos": corpos,
+        "modo": modo,
+        "atribuicao": atribuicao,
+        "etapas_ms": {e: {"p50": ms(amostras[e], 50), "p95": ms(amostras[e], 95)} for e in ETAPAS},
+        "total_ms": {"p50": ms(totais, 50), "p95": ms(totais, 95)},
+        "imagens_por_segundo": round(1 / float(np.mean(totais)), 2),
+        "precisao": precisao,
+    }
+
+
+def imprimir(resultados):
+    cabecalho = (f"{'vista':<8}{'resolução':<11}{'ruído':>6}{'dist':>5}{'falsos':>7} {'modo':<9}{'rótulos':<8}"
+                 f"{'det p50':>8}{'atrib':>7}{'desenho':>8}{'jpeg':>7}{'total p50':>10}{'p95':>8}{'img/s':>7}"
+                 f"{'recall':>7}{'prec':>6}{'rótulos':>8}")
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for r in resultados:
+        e, p = r["etapas_ms"], r["precisao"]
+        print(f"{r['vista']:<8}{r['resolucao']:<11}{r['ruido']:>6g}{r['distratores']:>5}{r['falsos']:>7} {r['modo']:<9}"
+              f"{r['atribuicao']:<8}{e['deteccao']['p50']:>8.1f}{e['atribuicao']['p50']:>7.1f}{e['desenho']['p50']:>8.1f}{e['codificacao']['p50']:>7.1f}"
+              f"{r['total_ms']['p50']:>10.1f}{r['total_ms']['p95']:>8.1f}{r['imagens_por_segundo']:>7.1f}"
+              f"{p['recall']:>7.2f}{p['precisao']:>6.2f}{p['rotulos']:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vistas", nargs="+", default=["frontal", "sagital"], choices=list(VISTAS))
+    parser.add_argument("--resolucoes", nargs="+", default=["960x1280", "3024x4032"])
+    parser.add_argument("--ruidos", nargs="+", type=float, default=[4.0, 16.0])
+    parser.add_argument("--distratores", nargs="+", type=int, default=[0, 40])
+    parser.add_argument("--falsos", nargs="+", type=int, default=[0])
+    parser.add_argument("--modos", nargs="+", default=["completo", "piramide"], choices=list(DETECTORES))
+    parser.add_argument("--atribuicoes", nargs="+", default=["modelo"], choices=list(ATRIBUICOES))
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--corpos", type=int, default=5, help="fotos (corpos sorteados) na média da precisão")
+    parser.add_argument("--min-recall", type=float, default=None)
+    parser.add_argument("--json", default=None, help="grava os resultados completos neste arquivo")
+    args = parser.parse_args(argv)
+
+    cv2.setNumThreads(1)  # mesmo cenário dos workers do pool (OPENCV_THREADS=1)
+    resolucoes = [tuple(int(v) for v in r.lower().split("x")) for r in args.resolucoes]
+
+    resultados = [
+        rodar_cenario(vista, resolucao, ruido, distratores, falsos, modo, atribuicao, args.repeticoes, args.corpos)
+        for vista, resolucao, ruido, distratores, falsos, modo, atribuicao in itertools.product(
+            args.vistas, resolucoes, args.ruidos, args.distratores, args.falsos, args.modos, args.atribuicoes
+        )
+    ]
+    imprimir(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    if args.min_recall is not None:
+        falhas = [r for r in resultados if r["precisao"]["recall"] < args.min_recall]
+        for r in falhas:
+            print(f"❌ recall {r['precisao']['recall']:.2f} < {args.min_recall} em "
+                  f"{r['vista']} {r['resolucao']} ruído={r['ruido']:g} distratores={r['distratores']} {r['modo']}")
+        return 1 if falhas else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Gerador de fotos posturais sintéticas com posição conhecida dos marcadores.
+
+Os marcadores são discos brancos com tamanho proporcional à resolução, como numa foto
+tirada à mesma distância. As posições vêm de um corpo gerado aqui mesmo (CORPOS),
+independente do modelo usado na atribuição dos rótulos (VISTAS[...]["modelo"] em
+app/medidas.py): cada foto sorteia as proporções dos segmentos, a largura de ombros,
+quadril e joelhos, uma pequena assimetria entre os lados, a razão de aspecto da câmera e
+a inclinação do corpo. Assim a precisão dos rótulos mede o encaixe em corpos que o
+modelo não descreve exatamente.
+Ruído gaussiano, compressão JPEG e distratores (manchas claras não circulares,
+pontos pequenos e discos cinza) simulam fundos difíceis; marcadores falsos (discos
+brancos iguais aos marcadores, como reflexos) passam por todos os filtros da detecção
+e só podem ser descartados na atribuição dos rótulos.
+"""
+import cv2
+import numpy as np
+
+from app.medidas import nomes_frontal, nomes_sagital
+from app.processamento import LADO_BASE
+
+
+# Corpo sintético de cada vista, um item por marcador na ordem dos nomes:
+# (distância vertical até o marcador anterior, deslocamento horizontal a partir do eixo),
+# cada um como faixa (mín, máx) sorteada por foto. As distâncias são normalizadas para o
+# corpo ir de 0 a 1; na frontal, o deslocamento é a meia largura (o lado direito da
+# pessoa fica à esquerda da imagem) e os dois lados de cada par compartilham o sorteio.
+CORPOS = {
+    "frontal": [
+        ((0.00, 0.00), (0.10, 0.16)),  # acrômios
+        ((0.19, 0.30), (0.06, 0.10)),  # espinhas ilíacas
+        ((0.03, 0.09), (0.13, 0.20)),  # rádios
+        ((0.04, 0.10), (0.09, 0.13)),  # trocânteres
+        ((0.24, 0.34), (0.05, 0.09)),  # epicôndilos do fêmur
+        ((0.04, 0.08), (0.05, 0.09)),  # cabeças da fíbula
+        ((0.23, 0.33), (0.04, 0.07)),  # maléolos
+    ],
+    "sagital": [
+        ((0.00, 0.00), (-0.08, -0.04)),  # PEC7
+        ((0.02, 0.05), (-0.02, 0.02)),   # ACD
+        ((0.08, 0.12), (-0.10, -0.06)),  # PET7
+        ((0.09, 0.13), (-0.02, 0.03)),   # ELUD
+        ((0.04, 0.08), (0.01, 0.05)),    # CUD
+        ((0.02, 0.05), (-0.09, -0.05)),  # PEL4
+        ((0.02, 0.05), (0.04, 0.08)),    # PERD
+        ((0.03, 0.06), (0.05, 0.09)),    # EAD
+        ((0.03, 0.06), (-0.10, -0.06)),  # CCX
+        ((0.02, 0.05), (-0.02, 0.02)),   # TFD
+        ((0.22, 0.30), (-0.01, 0.03)),   # ELFD
+        ((0.03, 0.06), (-0.03, 0.01)),   # CFD
+        ((0.20, 0.28), (-0.02, 0.02)),   # MLD
+    ],
+}
+
+
+def _sortear(faixas, rng):
+    faixas = np.asarray(faixas, np.float64)
+    if rng is None:
+        return faixas.mean(axis=-1)
+    return rng.uniform(faixas[..., 0], faixas[..., 1])
+
+
+def posicoes_corpo(vista, largura, altura, n_marcadores, rng=None, espelhar=False):
+    """
+    Posições dos marcadores de um corpo sorteado (CORPOS). Sem rng, o corpo médio, de
+    pé, centralizado e ocupando 78% da altura; com rng, também variam a razão de aspecto
+    (0.85-1.15), a inclinação (até 3°), a altura ocupada (70-85%) e a posição.
+    """
+    segmentos = np.array(CORPOS[vista], np.float64)
+    passos, lateral = _sortear(segmentos[:, 0], rng), _sortear(segmentos[:, 1], rng)
+    v = np.cumsum(passos) / passos.sum()
+    if vista == "frontal":
+        # Pares direito/esquerdo; cada lado com até 1% de desnível (assimetria postural)
+        v = np.repeat(v, 2)
+        u = np.stack([-lateral, lateral], axis=1).ravel()
+        if rng is not None:
+            v = v + rng.uniform(-0.01, 0.01, v.shape)
+    else:
+        u = lateral
+    v, u = v[:n_marcadores], u[:n_marcadores]
+    if espelhar:
+        u = -u
+
+    aspecto, inclinacao, ocupada, centro = 1.0, 0.0, 0.78, 0.5
+    if rng is not None:
+        aspecto = rng.uniform(0.85, 1.15)
+        inclinacao = np.radians(rng.uniform(-3, 3))
+        ocupada = rng.uniform(0.70, 0.85)
+        centro = rng.uniform(0.4, 0.6)
+    comprimento = ocupada * altura
+    u, v = u * aspecto, v - 0.5
+    cos, sen = np.cos(inclinacao), np.sin(inclinacao)
+    x = largura * centro + comprimento * (u * cos - v * sen)
+    y = altura * (0.12 + ocupada / 2) + comprimento * (u * sen + v * cos)
+    return [(int(a), int(b)) for a, b in zip(x, y)]
+
+
+def posicoes_frontal(largura, altura, n_marcadores, rng=None):
+    return posicoes_corpo("frontal", largura, altura, n_marcadores, rng)
+
+
+def posicoes_sagital(largura, altura, n_marcadores, rng=None):
+    return posicoes_corpo("sagital", largura, altura, n_marcadores, rng)
+
+
+def gerar_foto(vista="frontal", largura=960, altura=1280, n_marcadores=None,
+               ruido=8.0, distratores=0, qualidade_jpeg=92, seed=0, falsos=0, espelhar=False):
+    """
+    Retorna (bytes_jpeg, pontos_verdadeiros). Os pontos estão na ordem anatômica
+    da vista, ou seja, o índice i corresponde ao rótulo nomes[i].
+    """
+    rng = np.random.default_rng(seed)
+    escala = max(largura, altura) / LADO_BASE
+    if n_marcadores is None:
+        n_marcadores = len(nomes_frontal if vista == "frontal" else nomes_sagital)
+
+    # Fundo com gradiente suave + ruído
+    gradiente = np.linspace(45, 95, altura, dtype=np.float32)[:, None, None]
+    img = np.repeat(np.repeat(gradiente, largura, axis=1), 3, axis=2)
+    if ruido:
+        img += rng.normal(0, ruido, img.shape).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+
+    # Distratores: manchas claras alongadas, pontos pequenos e discos escuros demais
+    for _ in range(distratores):
+        x, y = int(rng.integers(0, largura)), int(rng.integers(0, altura))
+        tipo = rng.integers(0, 3)
+        if tipo == 0:
+            eixos = (int(rng.integers(20, 60) * escala), int(rng.integers(3, 6) * escala))
+            cv2.ellipse(img, (x, y), eixos, float(rng.uniform(0, 180)), 0, 360, (250, 250, 250), -1)
+        elif tipo == 1:
+            cv2.circle(img, (x, y), max(1, int(2 * escala)), (255, 255, 255), -1)
+        else:
+            cv2.circle(img, (x, y), int(12 * escala), (150, 150, 150), -1)
+
+    pontos = posicoes_corpo(vista, largura, altura, n_marcadores, rng, espelhar)
+    raio = max(6, int(12 * escala))
+    for x, y in pontos:
+        cv2.circle(img, (x, y), raio, (255, 255, 255), -1, cv2.LINE_AA)
+
+    # Marcadores falsos longe dos verdadeiros (não encostam nem se fundem com eles)
+    colocados = 0
+    while colocados < falsos:
+        x, y = int(rng.integers(raio, largura - raio)), int(rng.integers(raio, altura - raio))
+        if all((x - px) ** 2 + (y - py) ** 2 > (4 * raio) ** 2 for px, py in pontos):
+            cv2.circle(img, (x, y), raio, (255, 255, 255), -1, cv2.LINE_AA)
+            colocados += 1
+
+    _, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, qualidade_jpeg])
+    return buf.tobytes(), pontos
+
+
+def avaliar_deteccao(encontrados, verdade, tolerancia):
+    """Casa cada marcador verdadeiro com o ponto detectado mais próximo dentro da tolerância."""
+    restantes = list(encontrados)
+    acertos, erros = 0, []
+    for x, y in verdade:
+        if not restantes:
+            break
+        d = [np.hypot(x - px, y - py) for px, py in restantes]
+        k = int(np.argmin(d))
+        if d[k] <= tolerancia:
+            acertos += 1
+            erros.append(d[k])
+            restantes.pop(k)
+    return {
+        "recall": acertos / len(verdade) if verdade else 1.0,
+        "precisao": acertos / len(encontrados) if encontrados else (1.0 if not verdade else 0.0),
+        "erro_medio_px": float(np.mean(erros)) if erros else None,
+    }
+
+
+def avaliar_rotulos(ordenados, verdade, tolerancia):
+    """Fração dos rótulos (posição na lista) que caíram no marcador verdadeiro correspondente."""
+    certos = sum(
+        1 for i, (x, y) in enumerate(verdade)
+        if i < len(ordenados) and ordenados[i] is not None
+        and np.hypot(x - ordenados[i][0], y - ordenados[i][1]) <= tolerancia
+    )
+    return certos / len(verdade) if verdade else 1.0
+
+
+def gerar_video(caminho, vista="frontal", largura=720, altura=1280, n_frames=60,
+                amplitude=6.0, ruido=6.0, fps=30, seed=0, raio=None):
+    """
+    Grava em caminho (MJPG/AVI) um vídeo curto de uma pessoa balançando levemente: os
+    marcadores oscilam até `amplitude` px (na escala LADO_BASE) e o fundo fica parado.
+    `raio` fixa o raio dos marcadores em px (padrão: proporcional à resolução, como nas
+    fotos). Retorna os pontos verdadeiros de cada frame, na ordem anatômica da vista.
+    """
+    rng = np.random.default_rng(seed)
+    escala = max(largura, altura) / LADO_BASE
+    n_marcadores = len(nomes_frontal if vista == "frontal" else nomes_sagital)
+    posicoes = posicoes_frontal if vista == "frontal" else posicoes_sagital
+    base = np.array(posicoes(largura, altura, n_marcadores), np.float64)
+    raio = raio or max(6, int(12 * escala))
+
+    gradiente = np.linspace(45, 95, altura, dtype=np.float32)[:, None, None]
+    fundo = np.repeat(np.repeat(gradiente, largura, axis=1), 3, axis=2)
+    fundo = np.clip(fundo + rng.normal(0, ruido, fundo.shape), 0, 255).astype(np.uint8)
+
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*"MJPG"), fps, (largura, altura))
+    verdade = []
+    for i in range(n_frames):
+        # Balanço lateral mais amplo que o vertical, com fase crescendo do pé à cabeça
+        fase = 2 * np.pi * i / 45 + np.linspace(0, 0.6, n_marcadores)
+        desloc = np.stack([np.sin(fase), 0.3 * np.cos(fase)], axis=1) * amplitude * escala
+        pontos = [(int(x), int(y)) for x, y in base + desloc]
+        img = fundo.copy()
+        for x, y in pontos:
+            cv2.circle(img, (x, y), raio, (255, 255, 255), -1, cv2.LINE_AA)
+        escritor.write(img)
+        verdade.append(pontos)
+    escritor.release()
+    return verdade
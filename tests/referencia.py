@@ -0,0 +1,128 @@
+"""
+Cópia do código original (antes das otimizações) usada como referência nos testes:
+a saída atual precisa continuar igual a esta onde o comportamento não mudou de propósito.
+"""
+import cv2
+import numpy as np
+
+
+# ---------------------------
+# Detecção original (app/main.py e app/sagital.py)
+# ---------------------------
+def detectar_marcadores_brancos(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, (7, 7), 0)
+    _, thresh = cv2.threshold(blur, 200, 255, cv2.THRESH_BINARY)
+    kernel = np.ones((3, 3), np.uint8)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=1)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    pontos = []
+    for cnt in contours:
+        area = cv2.contourArea(cnt)
+        if area < 20 or area > 1500:
+            continue
+        (x, y), radius = cv2.minEnclosingCircle(cnt)
+        perimeter = cv2.arcLength(cnt, True)
+        circularidade = 0 if perimeter == 0 else (4 * np.pi * area) / (perimeter ** 2)
+        if 0.7 < circularidade < 1.3 and 5 < radius < 30:
+            mask = np.zeros_like(gray)
+            cv2.circle(mask, (int(x), int(y)), int(radius), 255, -1)
+            media_brilho = cv2.mean(gray, mask=mask)[0]
+            if media_brilho > 180:
+                pontos.append((int(x), int(y)))
+
+    pontos = sorted(pontos, key=lambda p: (p[1], p[0]))
+    return pontos
+
+
+def brilho_medio(gray, x, y, raio):
+    mask = np.zeros_like(gray)
+    cv2.circle(mask, (x, y), raio, 255, -1)
+    return cv2.mean(gray, mask=mask)[0]
+
+
+# ---------------------------
+# Medidas originais: laços de process_image (app/main.py) e process_image_sagital (app/sagital.py)
+# ---------------------------
+nomes_frontal = [
+    "ACD", "ACE", "EAD", "EAE", "PERD", "PERE",
+    "TFD", "TFE", "ELFD", "ELFE", "CFD", "CFE",
+    "MLD", "MLE"
+]
+conexoes_frontal = [
+    (0, 2), (1, 3), (2, 3), (0, 1), (6, 8), (7, 9), (8, 10),
+    (9, 11), (10, 12), (11, 13), (2, 6), (3, 7), (0, 4), (1, 5),
+]
+nomes_sagital = [
+    "PEC7", "ACD", "PET7", "ELUD", "CUD", "PEL4", "PERD",
+    "EAD", "CCX", "TFD", "ELFD", "CFD", "MLD"
+]
+conexoes_sagital = [
+    (0, 1), (0, 2), (1, 3), (6, 4), (2, 5),
+    (5, 7), (7, 9), (9, 10), (10, 11),
+    (5, 8), (11, 12)
+]
+
+
+def calcular_angulo(p1, p2, p3):
+    a = np.array(p1)
+    b = np.array(p2)
+    c = np.array(p3)
+    ba = a - b
+    bc = c - b
+    cos_ang = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
+    cos_ang = np.clip(cos_ang, -1.0, 1.0)
+    angulo = np.degrees(np.arccos(cos_ang))
+    return round(angulo, 2)
+
+
+def _distancias(pontos, nomes, conexoes, escala_cm_por_pixel):
+    # Só o que a resposta compara: as descrições vêm das mesmas tabelas
+    distancias_cm = []
+    for i, j in conexoes:
+        if i < len(pontos) and j < len(pontos):
+            x1, y1 = pontos[i]
+            x2, y2 = pontos[j]
+            dist_px = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+            dist_cm = round(dist_px * escala_cm_por_pixel, 2)
+            distancias_cm.append({
+                "ponto1": nomes[i] if i < len(nomes) else f"P{i}",
+                "ponto2": nomes[j] if j < len(nomes) else f"P{j}",
+                "distancia_cm": dist_cm,
+            })
+    return distancias_cm
+
+
+def medidas_frontal(pontos, referencia_pixels):
+    escala_cm_por_pixel = 100 / referencia_pixels
+    return {"distancias": _distancias(pontos, nomes_frontal, conexoes_frontal, escala_cm_por_pixel)}
+
+
+def medidas_sagital(pontos, ref_x1, ref_y1, ref_x2, ref_y2, referencia_metros):
+    angulos_resultados = []
+    if len(pontos) > 8:
+        angulo_tronco = calcular_angulo(pontos[6], pontos[5], pontos[8])
+        angulos_resultados.append({
+            "nome": "PET7 - PEL4 - EAD",
+            "pontos": ("2", "5", "7"),
+            "angulo_graus": angulo_tronco
+        })
+
+        angulo_cotovelo = calcular_angulo(pontos[2], pontos[5], pontos[7])
+        angulos_resultados.append({
+            "nome": "PET7 - PEL4 - CCX",
+            "pontos": ("2", "5", "8"),
+            "angulo_graus": angulo_cotovelo
+        })
+
+    dist_px_ref = np.sqrt((ref_x2 - ref_x1) ** 2 + (ref_y2 - ref_y1) ** 2)
+    escala_metros_por_pixel = referencia_metros / dist_px_ref
+    escala_cm_por_pixel = escala_metros_por_pixel * 100
+
+    return {
+        "distancias": _distancias(pontos, nomes_sagital, conexoes_sagital, escala_cm_por_pixel),
+        "angulos": angulos_resultados,
+        "escala_cm_por_pixel": escala_cm_por_pixel,
+    }
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import ao_vivo
+from app.ao_vivo import configurar
+from app.lote import preparar_item
+from benchmarks.sintetico import gerar_foto
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    falhas = []
+
+    async def executar(fn, *args):
+        # Inline, sem o pool de processos; os frames em `falhas` levantam erro
+        if falhas:
+            raise falhas.pop(0)
+        return fn(*args)
+
+    monkeypatch.setattr(ao_vivo, "executar", executar)
+    app = FastAPI()
+    app.include_router(ao_vivo.router)
+    c = TestClient(app)
+    c.falhas = falhas
+    return c
+
+
+FOTO, _ = gerar_foto("frontal", seed=3)
+
+
+def test_frame_com_erro_nao_encerra_a_previa(cliente):
+    cliente.falhas.append(RuntimeError("worker caiu"))
+    with cliente.websocket_connect("/ws/preview?vista=frontal&referencia_pixels=250") as ws:
+        ws.send_bytes(FOTO)
+        assert ws.receive_json() == {"frame": 1, "error": "Erro ao processar frame: worker caiu"}
+        ws.send_bytes(FOTO)
+        mensagem = ws.receive_json()
+        assert mensagem["frame"] == 2 and len(mensagem["pontos"]) == 14
+        assert "distancias" in mensagem["medidas"]
+
+
+def test_frame_que_nao_decodifica(cliente):
+    with cliente.websocket_connect("/ws/preview") as ws:
+        ws.send_bytes(b"\xff\xd8\xff" + b"\x00" * 100)
+        assert ws.receive_json() == {"frame": 1, "error": "Erro ao processar imagem"}
+        ws.send_bytes(FOTO)
+        assert len(ws.receive_json()["pontos"]) == 14
+
+
+@pytest.mark.parametrize("query", ["referencia_pixels=0", "referencia_pixels=-5", "referencia_pixels=abc"])
+def test_referencia_invalida_na_conexao(cliente, query):
+    with cliente.websocket_connect(f"/ws/preview?{query}") as ws:
+        assert ws.receive_json()["error"]
+
+
+def test_referencia_invalida_na_reconfiguracao(cliente):
+    with cliente.websocket_connect("/ws/preview?referencia_pixels=250") as ws:
+        ws.send_text('{"referencia_pixels": 0}')
+        assert ws.receive_json() == {"error": "Configuração inválida: referencia_pixels deve ser um número maior que 0"}
+        # A configuração anterior continua valendo
+        ws.send_bytes(FOTO)
+        assert ws.receive_json()["medidas"]["referencia_pixels"] == 250
+
+
+def test_configurar_sem_referencia_envia_so_os_pontos():
+    assert configurar({})["medir"] is None
+    assert configurar({"vista": "sagital", "ref_x1": "0", "ref_y1": "0"})["medir"] is None
+    assert configurar({"referencia_pixels": "250"})["args"] == (250.0,)
+
+
+@pytest.mark.parametrize("item, mensagem", [
+    ({"referencia_pixels": 0}, "referencia_pixels deve ser um número maior que 0"),
+    ({"referencia_pixels": "nan"}, "referencia_pixels deve ser um número maior que 0"),
+    ({"vista": "sagital", "ref_x1": 1, "ref_y1": 1, "ref_x2": 1, "ref_y2": 1, "referencia_metros": 1},
+     "Os pontos de referência (ref_x1, ref_y1) e (ref_x2, ref_y2) devem ser diferentes"),
+    ({"vista": "sagital", "ref_x1": 0, "ref_y1": 0, "ref_x2": 0, "ref_y2": 400, "referencia_metros": 0},
+     "referencia_metros deve ser um número maior que 0"),
+])
+def test_preparar_item_recusa_referencias_sem_medida(item, mensagem):
+    with pytest.raises(ValueError) as erro:
+        preparar_item(item)
+    assert str(erro.value) == mensagem
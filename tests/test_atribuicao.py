@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from app import atribuicao
+from app.atribuicao import MODELOS, atribuir_marcadores, marcadores_incertos
+from app.medidas import nomes_frontal, nomes_sagital
+from app.processamento import campos_confianca, decodificar_imagem, detectar_candidatos, rotular_marcadores
+from benchmarks.sintetico import avaliar_rotulos, gerar_foto
+
+FORMA = (1280, 960)
+
+
+def _modelo_exato(vista="frontal", espelho=1.0):
+    # Candidatos exatamente nas posições do modelo: corpo de 900 px a partir de (480, 200)
+    previstos = MODELOS[vista].prever(480.0, 200.0, 900.0, espelho)
+    return [(float(x), float(y), 12.0) for x, y in previstos]
+
+
+def _pontos(candidatos):
+    return [(int(x), int(y)) for x, y, _ in candidatos]
+
+
+@pytest.mark.parametrize("vista, espelho", [("frontal", 1.0), ("sagital", 1.0), ("sagital", -1.0)])
+def test_encaixe_exato_tem_confianca_total(vista, espelho):
+    candidatos = _modelo_exato(vista, espelho)
+    pontos, confiancas = atribuir_marcadores(candidatos, vista, FORMA)
+    assert pontos == _pontos(candidatos)
+    assert confiancas == [1.0] * len(candidatos)
+
+
+def test_candidato_concorrente_deixa_o_ponto_incerto():
+    candidatos = _modelo_exato()
+    # Um blob 20 px ao lado do ACD (tolerância: 4% de 900 px = 36 px)
+    x, y, _ = candidatos[0]
+    pontos, confiancas = atribuir_marcadores(candidatos + [(x + 20, y, 12.0)], "frontal", FORMA)
+    assert pontos == _pontos(candidatos)
+    assert confiancas[0] == pytest.approx(1 - np.exp(-0.5 * (20 / 36) ** 2), abs=1e-3)
+    assert confiancas[1:] == [1.0] * (len(candidatos) - 1)
+    assert marcadores_incertos(confiancas, nomes_frontal) == ["ACD"]
+
+
+def test_marcador_ausente_fica_none_e_incerto():
+    candidatos = _modelo_exato()
+    del candidatos[4]  # PERD
+    pontos, confiancas = atribuir_marcadores(candidatos, "frontal", FORMA)
+    assert pontos[4] is None and confiancas[4] == 0.0
+    assert pontos[:4] + pontos[5:] == _pontos(candidatos)
+    assert marcadores_incertos(confiancas, nomes_frontal) == ["PERD"]
+
+
+def test_centenas_de_candidatos_longe_do_corpo():
+    candidatos = _modelo_exato()
+    previstos = np.array(candidatos)[:, :2]
+    rng = np.random.default_rng(0)
+    extras = []
+    while len(extras) < 300:
+        x, y = rng.uniform(0, FORMA[1]), rng.uniform(0, FORMA[0])
+        if np.hypot(*(previstos - (x, y)).T).min() > 150:
+            extras.append((x, y, 12.0))
+    pontos, confiancas = atribuir_marcadores(candidatos + extras, "frontal", FORMA)
+    assert pontos == _pontos(candidatos)
+    assert marcadores_incertos(confiancas, nomes_frontal) == []
+
+
+def test_poucos_candidatos_sem_transformacao():
+    assert atribuir_marcadores([(100.0, 100.0, 12.0)], "frontal", FORMA) == (None, None)
+    # O modo modelo cai na ordem por faixas, com confiança 0 em todos os pontos
+    pontos, confiancas = rotular_marcadores([(100, 100, 12.0)], "frontal", FORMA, "modelo")
+    assert pontos == [(100, 100)] and confiancas == [0.0]
+
+
+@pytest.mark.parametrize("vista, largura, seed, espelhar", [
+    ("frontal", 960, 4, False),
+    ("sagital", 720, 2, False),
+    ("sagital", 720, 3, True),
+])
+def test_fotos_sinteticas_com_marcadores_falsos(vista, largura, seed, espelhar):
+    contents, verdade = gerar_foto(vista=vista, largura=largura, seed=seed, falsos=3, espelhar=espelhar)
+    img = decodificar_imagem(contents)
+    nomes = nomes_frontal if vista == "frontal" else nomes_sagital
+    pontos, confiancas = rotular_marcadores(detectar_candidatos(img), vista, img.shape[:2], "modelo")
+    assert avaliar_rotulos(pontos, verdade, 2) == 1.0
+    assert marcadores_incertos(confiancas, nomes) == []
+
+
+def test_modo_linhas_sem_confianca():
+    candidatos = _modelo_exato()
+    pontos, confiancas = rotular_marcadores(candidatos, "frontal", FORMA, "linhas")
+    assert confiancas is None and len(pontos) == len(candidatos)
+    assert campos_confianca({"pontos": pontos, "confiancas": None}, nomes_frontal) == {}
+
+
+def test_campos_confianca_e_limite(monkeypatch):
+    confiancas = [0.9, 0.6, 0.2] + [1.0] * 11
+    campos = campos_confianca({"confiancas": confiancas}, nomes_frontal)
+    assert campos["confianca"]["ACD"] == 0.9 and campos["confianca"]["EAD"] == 0.2
+    assert campos["marcadores_incertos"] == ["EAD"]
+    monkeypatch.setattr(atribuicao, "ATRIBUICAO_CONFIANCA_MIN", 0.7)
+    assert marcadores_incertos(confiancas, nomes_frontal) == ["ACE", "EAD"]
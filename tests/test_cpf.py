@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.pacientes import normalizar_cpf, validar_cpf, validar_cpfs
+
+
+def _com_digitos(base):
+    """CPF válido a partir dos 9 primeiros dígitos."""
+    for pesos in (range(10, 1, -1), range(11, 1, -1)):
+        soma = sum(int(d) * p for d, p in zip(base, pesos))
+        base += str(soma * 10 % 11 % 10)
+    return base
+
+
+def test_validar_cpfs_igual_a_validar_cpf_em_cpfs_aleatorios():
+    rng = np.random.default_rng(0)
+    aleatorios = ["".join(map(str, rng.integers(0, 10, 11))) for _ in range(2000)]
+    validos = [_com_digitos("".join(map(str, rng.integers(0, 10, 9)))) for _ in range(2000)]
+    cpfs = aleatorios + validos
+    esperado = [validar_cpf(c) for c in cpfs]
+    assert validar_cpfs(cpfs).tolist() == esperado
+    assert sum(esperado) >= 2000
+
+
+@pytest.mark.parametrize("cpf", [
+    "52998224725",           # válido
+    "529.982.247-25",        # válido, formatado
+    "52998224724",           # dígito verificador errado
+    "00000000000",           # repetidos
+    "11111111111",
+    "99999999999",
+    "00000000191",           # válido com zeros à esquerda
+    191,                     # o mesmo lido como número
+    "5299822472",            # 10 dígitos
+    "529982247250",          # 12 dígitos
+    "",
+    "abc",
+])
+def test_validar_cpfs_casos_limite(cpf):
+    normalizado = normalizar_cpf(cpf)
+    assert validar_cpfs([normalizado]).tolist() == [validar_cpf(normalizado)]
+
+
+def test_validar_cpfs_mistura_tamanhos_e_lista_vazia():
+    cpfs = ["52998224725", "123", "", "11144477735", "11144477734"]
+    assert validar_cpfs(cpfs).tolist() == [True, False, False, True, False]
+    assert validar_cpfs([]).tolist() == []
+
+
+def test_normalizar_cpf():
+    assert normalizar_cpf("529.982.247-25") == "52998224725"
+    assert normalizar_cpf(191) == "00000000191"
+    assert normalizar_cpf("sem dígitos") == ""
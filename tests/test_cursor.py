@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.banco import codificar_cursor, decodificar_cursor, limite_pagina
+
+
+def _cursor(valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("valores", [
+    (42,),
+    (0,),
+    ("2025-02-01 13:45:00", 17),
+    (None, 3),
+    (1.5, "á é ç"),
+])
+def test_ida_e_volta(valores):
+    cursor = codificar_cursor(*valores)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decodificar_cursor(cursor, len(valores)) == list(valores)
+
+
+def test_datas_viram_texto():
+    cursor = codificar_cursor(datetime(2025, 2, 1, 13, 45), 17)
+    assert decodificar_cursor(cursor, 2) == ["2025-02-01 13:45:00", 17]
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!!",
+    "nao-e-base64-json",
+    codificar_cursor(42)[:-2],           # truncado
+    codificar_cursor(42) + "x",          # caractere a mais
+    _cursor({"id": 42}),                 # não é lista
+    _cursor("42"),
+    _cursor([[42]]),                     # valor composto iria para o SQL
+    _cursor([{"id": 42}]),
+    _cursor([True]),
+])
+def test_rejeita_cursor_adulterado(cursor):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decodificar_cursor(cursor, 1)
+
+
+def test_rejeita_quantidade_errada():
+    with pytest.raises(ValueError):
+        decodificar_cursor(codificar_cursor("2025-02-01", 17), 1)
+    with pytest.raises(ValueError):
+        decodificar_cursor(codificar_cursor(17), 2)
+
+
+def test_limite_pagina():
+    assert limite_pagina(None, 50, 500) == 50
+    assert limite_pagina(10, 50, 500) == 10
+    assert limite_pagina(10_000, 50, 500) == 500
+    with pytest.raises(ValueError):
+        limite_pagina(0, 50, 500)
@@ -0,0 +1,38 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.banco import interpretar_data
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("2025-02-01", datetime(2025, 2, 1)),
+    ("2025-02-01T13:45:10", datetime(2025, 2, 1, 13, 45, 10)),
+    ("2025-02-01 13:45:10", datetime(2025, 2, 1, 13, 45, 10)),
+    ("2025-02-01T13:45:10Z", datetime(2025, 2, 1, 13, 45, 10)),
+    ("2025-02-01T13:45:10-03:00", datetime(2025, 2, 1, 16, 45, 10)),
+    ("2025-02-01T23:30:00-03:00", datetime(2025, 2, 2, 2, 30)),  # muda o dia em UTC
+    ("01/02/2025", datetime(2025, 2, 1)),
+    ("01-02-2025", datetime(2025, 2, 1)),
+    ("01/02/2025 13:45", datetime(2025, 2, 1, 13, 45)),
+    ("01/02/2025 13:45:10", datetime(2025, 2, 1, 13, 45, 10)),
+    ("01/02/2025, 13:45:10", datetime(2025, 2, 1, 13, 45, 10)),  # toLocaleString("pt-BR")
+    ("  01/02/2025  ", datetime(2025, 2, 1)),
+])
+def test_interpretar_data_formatos(texto, esperado):
+    assert interpretar_data(texto, com_hora=True) == esperado
+    assert interpretar_data(texto) == esperado.date()
+
+
+def test_interpretar_data_objetos():
+    assert interpretar_data(date(2025, 2, 1)) == date(2025, 2, 1)
+    assert interpretar_data(date(2025, 2, 1), com_hora=True) == datetime(2025, 2, 1)
+    assert interpretar_data(datetime(2025, 2, 1, 13, 45), com_hora=True) == datetime(2025, 2, 1, 13, 45)
+    fuso = timezone(timedelta(hours=-3))
+    assert interpretar_data(datetime(2025, 2, 1, 22, 0, tzinfo=fuso), com_hora=True) == datetime(2025, 2, 2, 1, 0)
+
+
+@pytest.mark.parametrize("valor", ["", "ontem", "31/02/2025", "2025/02/01", "01/02/25", "13:45", None])
+def test_interpretar_data_invalida(valor):
+    with pytest.raises(ValueError):
+        interpretar_data(valor)
@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+import pytest
+
+from app import processamento
+from app.processamento import (
+    brilho_medio_disco, decodificar_imagem, detectar_marcadores_brancos, detectar_marcadores_piramide,
+)
+from benchmarks.sintetico import avaliar_deteccao, gerar_foto
+from tests import referencia
+
+
+def _foto(**kwargs):
+    contents, verdade = gerar_foto(**kwargs)
+    return decodificar_imagem(contents), verdade
+
+
+@pytest.mark.parametrize("vista, largura, altura, distratores, seed", [
+    ("frontal", 960, 1280, 0, 0),
+    ("frontal", 960, 1280, 40, 1),
+    ("sagital", 720, 1280, 40, 2),
+    ("frontal", 1280, 960, 80, 3),
+    ("sagital", 480, 640, 20, 4),
+])
+def test_mesmos_pontos_da_deteccao_original(vista, largura, altura, distratores, seed):
+    img, _ = _foto(vista=vista, largura=largura, altura=altura, distratores=distratores, seed=seed, falsos=2)
+    esperados = referencia.detectar_marcadores_brancos(img)
+    assert len(esperados) >= 14 if vista == "frontal" else len(esperados) >= 13
+    assert detectar_marcadores_brancos(img) == esperados
+    pontos, _ = detectar_marcadores_brancos(img, debug=True)
+    assert pontos == esperados
+
+
+def test_muitos_candidatos_mesmos_pontos():
+    # Fundo ruidoso e 300 distratores, vários encostando nos marcadores
+    img, _ = _foto(ruido=40.0, distratores=300, seed=5)
+    assert detectar_marcadores_brancos(img) == referencia.detectar_marcadores_brancos(img)
+
+
+def test_brilho_do_disco_igual_ao_da_mascara_cheia():
+    rng = np.random.default_rng(0)
+    gray = cv2.GaussianBlur(rng.integers(0, 256, (120, 160), dtype=np.uint8), (5, 5), 0)
+    # Inclui discos cortados pelas bordas da imagem
+    for x, y, raio in [(0, 0, 6), (159, 119, 10), (80, 60, 29), (3, 100, 12), (150, 5, 8)]:
+        assert brilho_medio_disco(gray, x, y, raio) == pytest.approx(referencia.brilho_medio(gray, x, y, raio))
+    for _ in range(50):
+        x, y, raio = int(rng.integers(0, 160)), int(rng.integers(0, 120)), int(rng.integers(5, 30))
+        assert brilho_medio_disco(gray, x, y, raio) == pytest.approx(referencia.brilho_medio(gray, x, y, raio))
+
+
+def test_disco_fora_da_imagem_tem_brilho_zero():
+    gray = np.full((20, 20), 255, np.uint8)
+    assert brilho_medio_disco(gray, 40, 40, 5) == 0.0
+
+
+
+def test_limites_calibrados_ate_o_lado_base():
+    assert processamento.limites_marcador() == {"area_min": 20, "area_max": 1500, "raio_min": 5, "raio_max": 30}
+    assert processamento.escala_deteccao(np.zeros((640, 480, 3), np.uint8)) == 1.0
+    assert processamento.escala_deteccao(np.zeros((1280, 960, 3), np.uint8)) == 1.0
+    assert processamento.escala_deteccao(np.zeros((4032, 3024, 3), np.uint8)) == pytest.approx(3.15)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_piramide_igual_a_original_ate_o_lado_base(seed):
+    img, _ = _foto(distratores=40, seed=seed, falsos=1)
+    assert detectar_marcadores_piramide(img) == referencia.detectar_marcadores_brancos(img)
+
+
+@pytest.mark.parametrize("vista, seed", [("frontal", 0), ("sagital", 1), ("frontal", 2)])
+def test_foto_grande_encontra_os_marcadores(vista, seed):
+    # Mudança intencional: com os limites fixos de 1280 px, a detecção original não acha
+    # nenhum marcador numa foto de 12 MP; os dois modos agora escalam os limites
+    img, verdade = _foto(vista=vista, largura=3024, altura=4032, distratores=20, seed=seed)
+    assert avaliar_deteccao(referencia.detectar_marcadores_brancos(img), verdade, 10)["recall"] == 0
+
+    completo = detectar_marcadores_brancos(img)
+    piramide = detectar_marcadores_piramide(img)
+    for pontos in (completo, piramide):
+        avaliacao = avaliar_deteccao(pontos, verdade, 10)
+        assert avaliacao["recall"] == 1 and avaliacao["precisao"] == 1
+    # A pirâmide devolve pixels da imagem original, nos mesmos pontos do modo completo
+    assert sorted(piramide) == sorted(completo)
+
+
+def test_modo_configurado_escolhe_o_detector(monkeypatch):
+    img, _ = _foto(largura=1512, altura=2016, distratores=10, seed=3)
+    monkeypatch.setattr(processamento, "MODO_DETECCAO", "piramide")
+    assert processamento.detectar_marcadores(img) == detectar_marcadores_piramide(img)
+    monkeypatch.setattr(processamento, "MODO_DETECCAO", "completo")
+    assert processamento.detectar_marcadores(img) == detectar_marcadores_brancos(img)
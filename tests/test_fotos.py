@@ -0,0 +1,79 @@
+import base64
+import hashlib
+import os
+
+import pytest
+
+from app import banco, fotos
+from app.fotos import (
+    ArmazenamentoLocal, FotoInvalida, decodificar_foto, guardar_foto, migrar_fotos, sistema_de_arquivos,
+)
+
+JPEG = b"\xff\xd8\xff\xe0" + os.urandom(1000)
+
+
+@pytest.fixture
+def local(monkeypatch, tmp_path):
+    armazenamento = ArmazenamentoLocal(str(tmp_path))
+    monkeypatch.setattr(fotos, "_armazenamento", armazenamento)
+    return armazenamento
+
+
+def test_fotos_dir_e_absoluto():
+    assert os.path.isabs(fotos.FOTOS_DIR)
+
+
+def test_guardar_e_ler(local):
+    referencia = guardar_foto(base64.b64encode(JPEG).decode())
+    chave = hashlib.sha256(JPEG).hexdigest()
+    assert referencia == "sha256:" + chave
+    assert local.existe(chave) and local.tamanho(chave) == len(JPEG)
+    assert b"".join(local.ler_blocos(chave, 100)) == JPEG
+    # Mesma foto de novo: mesma referência, nenhum arquivo novo
+    assert guardar_foto("data:image/jpeg;base64," + base64.b64encode(JPEG).decode()) == referencia
+    assert guardar_foto(referencia) == referencia
+    assert sum(len(arquivos) for _, _, arquivos in os.walk(local.raiz)) == 1
+
+
+@pytest.mark.parametrize("valor", ["abc", "", "data:image/png;base64,"])
+def test_decodificar_foto_invalida(valor):
+    with pytest.raises(FotoInvalida):
+        decodificar_foto(valor)
+
+
+def test_sistema_de_arquivos(tmp_path):
+    montagens = tmp_path / "mounts"
+    montagens.write_text(
+        "overlay / overlay rw 0 0\n"
+        "tmpfs /tmp tmpfs rw 0 0\n"
+        "/dev/sdb1 /dados ext4 rw 0 0\n"
+        "/dev/sdc1 /meus\\040dados xfs rw 0 0\n"
+    )
+    assert sistema_de_arquivos("/dados/fotos", str(montagens)) == "ext4"
+    assert sistema_de_arquivos("/dadosx/fotos", str(montagens)) == "overlay"
+    assert sistema_de_arquivos("/tmp/fotos", str(montagens)) == "tmpfs"
+    assert sistema_de_arquivos("/meus dados/fotos", str(montagens)) == "xfs"
+    assert sistema_de_arquivos("/dados", str(tmp_path / "nao-existe")) is None
+
+
+def test_migracao_exige_fotos_dir_configurado(monkeypatch):
+    monkeypatch.delenv("FOTOS_DIR", raising=False)
+    monkeypatch.setattr(fotos, "_armazenamento", ArmazenamentoLocal())
+    monkeypatch.setattr(banco, "get_connection", lambda *a: pytest.fail("não deveria abrir o banco"))
+    with pytest.raises(RuntimeError, match="Defina FOTOS_DIR"):
+        migrar_fotos(log=lambda *_: None)
+
+
+@pytest.mark.parametrize("tipo", ["tmpfs", "overlay"])
+def test_migracao_recusa_armazenamento_efemero(monkeypatch, local, tipo):
+    monkeypatch.setenv("FOTOS_DIR", local.raiz)
+    monkeypatch.setattr(fotos, "sistema_de_arquivos", lambda caminho: tipo)
+    monkeypatch.setattr(banco, "get_connection", lambda *a: pytest.fail("não deveria abrir o banco"))
+    with pytest.raises(RuntimeError, match=tipo):
+        migrar_fotos(log=lambda *_: None)
+
+
+def test_armazenamento_persistente_passa(monkeypatch, local):
+    monkeypatch.setenv("FOTOS_DIR", local.raiz)
+    monkeypatch.setattr(fotos, "sistema_de_arquivos", lambda caminho: "ext4")
+    local.verificar_persistente()
@@ -0,0 +1,70 @@
+import base64
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import fotos, historico
+from app.fotos import ArmazenamentoLocal
+
+JPEG = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def armazenamento(monkeypatch, tmp_path):
+    local = ArmazenamentoLocal(str(tmp_path))
+    monkeypatch.setattr(fotos, "_armazenamento", local)
+    return local
+
+
+@pytest.fixture
+def cliente():
+    app = FastAPI()
+    app.include_router(historico.router)
+    return TestClient(app)
+
+
+def _coluna(monkeypatch, valor):
+    monkeypatch.setattr(historico, "consultar_foto", lambda id_avaliacao, coluna: valor)
+
+
+def test_foto_no_armazenamento(monkeypatch, cliente, armazenamento):
+    chave = armazenamento.guardar(JPEG)
+    _coluna(monkeypatch, "sha256:" + chave)
+    resposta = cliente.get("/avaliacoes/1/fotos/frontal")
+    assert resposta.status_code == 200
+    assert resposta.content == JPEG
+    assert resposta.headers["content-type"] == "image/jpeg"
+    assert resposta.headers["etag"] == f'"{chave}"'
+
+    resposta = cliente.get("/avaliacoes/1/fotos/frontal", headers={"If-None-Match": f'"{chave}"'})
+    assert resposta.status_code == 304
+
+
+def test_referencia_sem_arquivo(monkeypatch, cliente, armazenamento):
+    _coluna(monkeypatch, "sha256:" + "0" * 64)
+    assert cliente.get("/avaliacoes/1/fotos/sagital").status_code == 404
+
+
+@pytest.mark.parametrize("valor", [
+    base64.b64encode(JPEG).decode(),
+    "data:image/jpeg;base64," + base64.b64encode(JPEG).decode(),
+])
+def test_foto_antiga_em_base64(monkeypatch, cliente, valor):
+    _coluna(monkeypatch, valor)
+    resposta = cliente.get("/avaliacoes/1/fotos/frontal")
+    assert resposta.status_code == 200 and resposta.content == JPEG
+
+
+@pytest.mark.parametrize("valor", ["abc", "@@@@", "data:image/jpeg;base64,"])
+def test_base64_corrompido_e_422(monkeypatch, cliente, valor):
+    _coluna(monkeypatch, valor)
+    resposta = cliente.get("/avaliacoes/1/fotos/frontal")
+    assert resposta.status_code == 422
+    assert resposta.json()["error"].startswith("Foto gravada está corrompida")
+
+
+def test_sem_foto_e_vista_invalida(monkeypatch, cliente):
+    _coluna(monkeypatch, None)
+    assert cliente.get("/avaliacoes/1/fotos/frontal").status_code == 404
+    assert cliente.get("/avaliacoes/1/fotos/costas").status_code == 400
@@ -0,0 +1,197 @@
+from datetime import date
+
+import pytest
+
+import pymysql
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import importacao
+from app.importacao import _mensagem_integridade, preparar_registro, validar_importacao
+
+VALIDO = {"cpf": "529.982.247-25", "nome": "Ana", "data_nascimento": "01/02/1990"}
+
+
+def test_preparar_registro_valido():
+    valores = preparar_registro({**VALIDO, "peso": "72,5", "idade": "35", "sexo": " F ", "raca": ""})
+    assert valores["cpf"] == "52998224725"
+    assert valores["data_nascimento"] == date(1990, 2, 1)
+    assert valores["peso"] == 72.5 and valores["idade"] == 35
+    assert valores["sexo"] == "F" and valores["raca"] is None
+    assert valores["telefone"] is None
+
+
+@pytest.mark.parametrize("campos, mensagem", [
+    ({"cpf": None}, "Campos obrigatórios faltando: cpf"),
+    ({"nome": "   ", "data_nascimento": ""}, "Campos obrigatórios faltando: nome, data_nascimento"),
+    ({"data_nascimento": "31/02/1990"}, "data_nascimento inválida"),
+    ({"data_nascimento": "ontem"}, "data_nascimento inválida"),
+    ({"peso": "setenta"}, "peso ou idade não numérico"),
+    ({"idade": "35.5"}, "peso ou idade não numérico"),
+    ({"idade": "trinta"}, "peso ou idade não numérico"),
+    ({"nome": ["Ana", "Maria"]}, "Campos devem ser texto ou número: nome"),
+    ({"peso": {"kg": 70}, "telefone": []}, "Campos devem ser texto ou número: peso, telefone"),
+])
+def test_preparar_registro_malformado(campos, mensagem):
+    with pytest.raises(ValueError) as erro:
+        preparar_registro({**VALIDO, **campos})
+    assert str(erro.value) == mensagem
+
+
+def test_campos_extras_sao_ignorados():
+    assert "observacao" not in preparar_registro({**VALIDO, "observacao": "x"})
+
+
+def test_validar_importacao_jsonl():
+    conteudo = "\n".join([
+        '{"cpf": "52998224725", "nome": "Ana", "data_nascimento": "1990-02-01"}',
+        '',
+        'não é json',
+        '[1, 2]',
+        '{"cpf": "52998224724", "nome": "Bia", "data_nascimento": "1990-02-01"}',
+        '{"cpf": 52998224725, "nome": "Ana 2", "data_nascimento": "1990-02-01"}',
+        '{"cpf": ["52998224725"], "nome": "Caio", "data_nascimento": "1990-02-01"}',
+        '{"cpf": "111.444.777-35", "nome": "Duda", "data_nascimento": "1990-02-01", "peso": {"kg": 1}}',
+    ]).encode()
+    total, registros, erros = validar_importacao(conteudo, "jsonl")
+    assert total == 7
+    assert [linha for linha, _ in registros] == [1]
+    assert [(e["linha"], e["cpf"], e["error"]) for e in sorted(erros, key=lambda e: e["linha"])] == [
+        (3, None, "JSON inválido"),
+        (4, None, "Cada linha deve ser um objeto JSON"),
+        (5, "52998224724", "CPF inválido"),
+        (6, "52998224725", "CPF repetido no arquivo (linha 1)"),
+        (7, None, "Campos devem ser texto ou número: cpf"),
+        (8, "111.444.777-35", "Campos devem ser texto ou número: peso"),
+    ]
+
+
+def test_validar_importacao_csv_do_excel():
+    conteudo = "\ufeffCPF;Nome;Data_Nascimento;Peso\n529.982.247-25;Ana;01/02/1990;72,5\n111.444.777-35;Bia;;\n".encode()
+    total, registros, erros = validar_importacao(conteudo, "csv")
+    assert total == 2
+    assert registros[0][0] == 2 and registros[0][1]["peso"] == 72.5
+    assert erros == [{"linha": 3, "cpf": "111.444.777-35", "error": "Campos obrigatórios faltando: data_nascimento"}]
+
+
+@pytest.mark.parametrize("erro, mensagem", [
+    (pymysql.IntegrityError(1062, "Duplicate entry '52998224725' for key 'pessoa.cpf'"), "CPF já cadastrado"),
+    (pymysql.IntegrityError(1062, "Duplicate entry '52998224725' for key 'cpf'"), "CPF já cadastrado"),
+    (pymysql.IntegrityError(1062, "Duplicate entry '9' for key 'pessoa.telefone'"),
+     "Valor recusado pelo banco: Duplicate entry '9' for key 'pessoa.telefone'"),
+    (pymysql.IntegrityError(1048, "Column 'nome' cannot be null"),
+     "Valor recusado pelo banco: Column 'nome' cannot be null"),
+])
+def test_mensagem_integridade(erro, mensagem):
+    assert _mensagem_integridade(erro) == mensagem
+
+
+# ---------------------------
+# Inserção com o banco falhando no meio
+# ---------------------------
+class CursorFalso:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def execute(self, query, args=None):
+        self.resultado = []
+        if query.startswith("SELECT"):
+            self.resultado = [(cpf,) for cpf in args if cpf in self.banco.cpfs]
+
+    def fetchall(self):
+        return self.resultado
+
+    def executemany(self, query, linhas):
+        self.banco.lotes += 1
+        if self.banco.lotes == self.banco.cair_no_lote:
+            raise pymysql.OperationalError(2013, "Lost connection to MySQL server during query")
+        self.banco.pendentes = [linha[0] for linha in linhas]
+
+
+class BancoFalso:
+    def __init__(self, cair_no_lote=None):
+        self.cpfs, self.pendentes = set(), []
+        self.lotes, self.cair_no_lote = 0, cair_no_lote
+        self.fechada = False
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.cpfs.update(self.pendentes)
+        self.pendentes = []
+
+    def rollback(self):
+        self.pendentes = []
+
+    def close(self):
+        self.fechada = True
+
+
+def _cpf(n):
+    base = f"{n:09d}"
+    for pesos in (range(10, 1, -1), range(11, 1, -1)):
+        base += str(sum(int(d) * p for d, p in zip(base, pesos)) * 10 % 11 % 10)
+    return base
+
+
+def _jsonl(n):
+    return "\n".join(
+        f'{{"cpf": "{_cpf(100 + i)}", "nome": "P{i}", "data_nascimento": "1990-01-01"}}' for i in range(n)
+    ).encode()
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    invalidadas = []
+
+    async def invalidar(lista):
+        invalidadas.append(lista)
+
+    monkeypatch.setattr(importacao, "invalidar_listagem", invalidar)
+    monkeypatch.setattr(importacao, "IMPORTACAO_LOTE", 2)
+    app = FastAPI()
+    app.include_router(importacao.router)
+    c = TestClient(app, raise_server_exceptions=False)
+    c.invalidadas = invalidadas
+    return c
+
+
+def _enviar(cliente, conteudo):
+    return cliente.post("/importar-pacientes", files={"file": ("p.jsonl", conteudo, "application/jsonl")})
+
+
+def test_queda_do_banco_no_meio_mantem_o_que_entrou(cliente, monkeypatch):
+    banco = BancoFalso(cair_no_lote=2)
+    monkeypatch.setattr(importacao, "get_connection", lambda: banco)
+    resposta = _enviar(cliente, _jsonl(5))
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert (corpo["total"], corpo["inseridos"], corpo["recusados"]) == (5, 2, 3)
+    assert corpo["erro_banco"] == "Erro no banco: Lost connection to MySQL server during query"
+    assert [e["linha"] for e in corpo["erros"]] == [3, 4, 5]
+    assert all(e["error"].startswith("Não importado: ") for e in corpo["erros"])
+    assert len(banco.cpfs) == 2 and banco.fechada
+    assert cliente.invalidadas == ["pacientes"]
+
+
+def test_importacao_completa(cliente, monkeypatch):
+    banco = BancoFalso()
+    monkeypatch.setattr(importacao, "get_connection", lambda: banco)
+    corpo = _enviar(cliente, _jsonl(5)).json()
+    assert (corpo["inseridos"], corpo["recusados"], corpo["erro_banco"]) == (5, 0, None)
+    assert cliente.invalidadas == ["pacientes"]
+
+
+def test_sem_nada_confirmado_o_erro_sobe(cliente, monkeypatch):
+    def esgotado():
+        raise HTTPException(status_code=503, detail="Banco de dados ocupado, tente novamente",
+                            headers={"Retry-After": "1"})
+    monkeypatch.setattr(importacao, "get_connection", esgotado)
+    resposta = _enviar(cliente, _jsonl(3))
+    assert resposta.status_code == 503 and resposta.headers["retry-after"] == "1"
+
+    banco = BancoFalso(cair_no_lote=1)
+    monkeypatch.setattr(importacao, "get_connection", lambda: banco)
+    assert _enviar(cliente, _jsonl(3)).status_code == 500
+    assert banco.fechada
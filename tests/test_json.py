@@ -0,0 +1,34 @@
+import numpy as np
+import orjson
+import pytest
+
+from app.banco import interpretar_json, ler_json
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ({"ombro": 1.5, "quadril": None}, {"ombro": 1.5, "quadril": None}),
+    ([1, 2, 3], [1, 2, 3]),
+    ('{"ombro": 1.5}', {"ombro": 1.5}),
+    (b'{"ombro": 1.5}', {"ombro": 1.5}),
+    ("{'ombro': 1.5, 'ok': True, 'nada': None}", {"ombro": 1.5, "ok": True, "nada": None}),  # repr antigo
+    ("(1, 2)", [1, 2]),
+    ("texto livre", "texto livre"),
+    ("__import__('os')", "__import__('os')"),  # nunca é executado
+    ({1: "a"}, {"1": "a"}),
+    ({"v": np.float32(0.5)}, {"v": 0.5}),
+    ("{1, 2}", "{1, 2}"),  # set de um repr antigo vira texto
+])
+def test_interpretar_json(valor, esperado):
+    assert orjson.loads(interpretar_json(valor)) == esperado
+
+
+@pytest.mark.parametrize("valor", [None, ""])
+def test_interpretar_json_vazio(valor):
+    assert interpretar_json(valor) is None
+
+
+def test_ler_json():
+    assert ler_json('{"a": [1, 2]}') == {"a": [1, 2]}
+    assert ler_json("{'a': (1, 2)}") == {"a": (1, 2)}
+    assert ler_json("não é json") == "não é json"
+    assert ler_json(None) is None and ler_json("") is None
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from app.medidas import medidor_frontal, medidor_sagital, nomes_frontal, nomes_sagital
+from app.processamento import medir_frontal, medir_sagital
+from benchmarks.sintetico import posicoes_corpo
+from tests import referencia
+
+REF_SAGITAL = (100.0, 200.0, 100.0, 650.0, 1.0)
+
+
+def _conjuntos(vista, n):
+    # Corpos sorteados em várias resoluções, mais um conjunto fixo com pontos colineares
+    rng = np.random.default_rng(7)
+    conjuntos = [
+        posicoes_corpo(vista, int(rng.integers(480, 3024)), int(rng.integers(640, 4032)), n, rng)
+        for _ in range(30)
+    ]
+    conjuntos.append([(100, 100 + 50 * i) for i in range(n)])
+    return conjuntos
+
+
+def _sem_descricao(distancias):
+    return [{k: d[k] for k in ("ponto1", "ponto2", "distancia_cm")} for d in distancias]
+
+
+@pytest.mark.parametrize("n", [len(nomes_frontal), 9, 3])
+def test_distancias_frontais_iguais_as_originais(n):
+    for pontos in _conjuntos("frontal", n):
+        for referencia_pixels in (57.3, 250.0):
+            result = medir_frontal({"pontos": pontos}, referencia_pixels)
+            esperado = referencia.medidas_frontal(pontos, referencia_pixels)
+            assert _sem_descricao(result["distancias"]) == esperado["distancias"]
+
+
+@pytest.mark.parametrize("n", [len(nomes_sagital), 9, 8, 4])
+def test_distancias_e_angulos_sagitais_iguais_aos_originais(n):
+    for pontos in _conjuntos("sagital", n):
+        result = medir_sagital({"pontos": pontos}, *REF_SAGITAL)
+        esperado = referencia.medidas_sagital(pontos, *REF_SAGITAL)
+        assert _sem_descricao(result["distancias"]) == esperado["distancias"]
+        assert result["angulos"] == esperado["angulos"]
+        assert result["escala_cm_por_pixel"] == esperado["escala_cm_por_pixel"]
+
+
+def test_angulos_de_pontos_fixos():
+    pontos = [(0, 0)] * 13
+    # Vértice em PEL4 (5): PERD (6) a 90° de CCX (8); PET7 (2) oposto a EAD (7)
+    pontos[5], pontos[6], pontos[8] = (100, 100), (200, 100), (100, 0)
+    pontos[2], pontos[7] = (100, 0), (100, 250)
+    angulos = medidor_sagital.medir(pontos, 1.0)["angulos"]
+    assert [a["angulo_graus"] for a in angulos] == [90.0, 180.0]
+    assert [a["pontos"] for a in angulos] == [("2", "5", "7"), ("2", "5", "8")]
+
+
+def test_lote_igual_a_medir_um_a_um():
+    conjuntos = _conjuntos("frontal", len(nomes_frontal))
+    escalas = [100 / r for r in np.linspace(50, 300, len(conjuntos))]
+    lote = medidor_frontal.medir_lote(medidor_frontal.empilhar(conjuntos), escalas)
+    for b, (pontos, escala) in enumerate(zip(conjuntos, escalas)):
+        um = medidor_frontal.medir(pontos, escala)
+        assert lote["distancias_cm"][b].tolist() == [d["distancia_cm"] for d in um["distancias"]]
+
+
+def test_pontos_ausentes_ficam_de_fora():
+    pontos = [(100, 100 + 40 * i) for i in range(len(nomes_frontal))]
+    pontos[2] = None  # EAD não encontrado
+    medidas = medidor_frontal.medir(pontos, 1.0)
+    assert all("EAD" not in (d["ponto1"], d["ponto2"]) for d in medidas["distancias"])
+    assert len(medidas["distancias"]) == 14 - 3
+    assert "Espinhas ilíacas ântero-superiores" not in [n["descricao"] for n in medidas["assimetrias"]["niveis"]]
+
+
+def test_assimetrias_frontais():
+    pontos = posicoes_corpo("frontal", 960, 1280, len(nomes_frontal))
+    simetricos = medidor_frontal.medir(pontos, 0.5)["assimetrias"]
+    assert all(n["diferenca_altura_cm"] == 0 and n["inclinacao_graus"] == 0 for n in simetricos["niveis"])
+
+    # Acrômio direito (à esquerda da imagem) 20 px mais baixo
+    pontos[0] = (pontos[0][0], pontos[0][1] + 20)
+    niveis = medidor_frontal.medir(pontos, 0.5)["assimetrias"]["niveis"]
+    acromios = niveis[0]
+    largura = pontos[1][0] - pontos[0][0]
+    assert acromios["pontos"] == ["ACD", "ACE"]
+    assert acromios["diferenca_altura_cm"] == 10.0
+    assert acromios["inclinacao_graus"] == round(float(np.degrees(np.arctan2(20, largura))), 2)
+    assert all(n["diferenca_altura_cm"] == 0 for n in niveis[1:])
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pymysql
+import pytest
+from pymysql.constants import SERVER_STATUS
+
+from fastapi import HTTPException
+
+from app import banco
+from app.banco import PoolConexoes, PoolEsgotado
+
+
+class ConexaoFalsa:
+    """Só o que o pool usa de uma conexão do pymysql."""
+
+    def __init__(self):
+        self.open = True
+        self.server_status = 0
+        self.rollbacks = 0
+        self.pings = 0
+        self.falhar_ping = False
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.falhar_ping:
+            raise pymysql.err.OperationalError(2013, "Lost connection")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status &= ~SERVER_STATUS.SERVER_STATUS_IN_TRANS
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def abertas():
+    return []
+
+
+@pytest.fixture
+def criar(abertas):
+    def criar():
+        conn = ConexaoFalsa()
+        abertas.append(conn)
+        return conn
+    return criar
+
+
+@pytest.fixture
+def pool(criar):
+    return PoolConexoes(criar, tamanho=2, timeout=0.05)
+
+
+def test_esgota_e_libera(pool, abertas):
+    a, b = pool.obter(), pool.obter()
+    with pytest.raises(PoolEsgotado):
+        pool.obter()
+    assert pool.estatisticas()["esgotamentos"] == 1
+    assert pool.estatisticas()["em_uso"] == 2
+
+    a.close()
+    c = pool.obter()
+    assert c._conn is abertas[0]  # reaproveita a ociosa em vez de abrir outra
+    assert pool.estatisticas()["criadas"] == 2
+    b.close()
+    c.close()
+    stats = pool.estatisticas()
+    assert (stats["em_uso"], stats["ociosas"], stats["esperando"]) == (0, 2, 0)
+
+
+def test_close_duas_vezes_nao_libera_duas_vagas(pool):
+    a = pool.obter()
+    a.close()
+    a.close()
+    assert pool.estatisticas()["em_uso"] == 0
+    with pytest.raises(pymysql.err.InterfaceError):
+        a.server_status
+
+
+def test_quem_espera_recebe_a_conexao_devolvida():
+    pool = PoolConexoes(ConexaoFalsa, tamanho=1, timeout=2.0)
+    a = pool.obter()
+    obtidas = []
+    t = threading.Thread(target=lambda: obtidas.append(pool.obter()))
+    t.start()
+    while pool.estatisticas()["esperando"] == 0:
+        time.sleep(0.001)
+    a.close()
+    t.join(2.0)
+    assert len(obtidas) == 1 and pool.estatisticas()["esgotamentos"] == 0
+    obtidas[0].close()
+
+
+def test_descartar_fecha_e_libera_a_vaga(pool, abertas):
+    a, b = pool.obter(), pool.obter()
+    a.descartar()
+    assert not abertas[0].open
+    c = pool.obter()
+    assert c._conn is not abertas[0]
+    stats = pool.estatisticas()
+    assert (stats["descartadas"], stats["criadas"], stats["ociosas"]) == (1, 3, 0)
+    b.close()
+    c.close()
+
+
+def test_transacao_aberta_e_desfeita_na_devolucao(pool, abertas):
+    a = pool.obter()
+    abertas[0].server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    a.close()
+    assert abertas[0].rollbacks == 1 and abertas[0].open
+    assert pool.estatisticas()["ociosas"] == 1
+
+
+def test_conexao_fechada_nao_volta_ao_pool(pool, abertas):
+    a = pool.obter()
+    abertas[0].open = False
+    a.close()
+    assert pool.estatisticas()["ociosas"] == 0
+    assert pool.estatisticas()["descartadas"] == 1
+
+
+def test_ping_falho_abre_outra_conexao(criar, abertas):
+    pool = PoolConexoes(criar, tamanho=1, timeout=0.05, ping_apos=0)
+    pool.obter().close()
+    abertas[0].falhar_ping = True
+    b = pool.obter()
+    assert b._conn is abertas[1] and not abertas[0].open
+    assert pool.estatisticas()["falhas_ping"] == 1
+    b.close()
+
+
+def test_conexao_antiga_e_reciclada(criar, abertas):
+    pool = PoolConexoes(criar, tamanho=1, timeout=0.05, reciclar=0)
+    pool.obter().close()
+    b = pool.obter()
+    assert b._conn is abertas[1] and not abertas[0].open
+    assert pool.estatisticas()["recicladas"] == 1
+    b.close()
+
+
+def test_falha_ao_conectar_libera_a_vaga():
+    def criar():
+        raise pymysql.err.OperationalError(2003, "Can't connect")
+    pool = PoolConexoes(criar, tamanho=1, timeout=0.05)
+    for _ in range(3):
+        with pytest.raises(pymysql.err.OperationalError):
+            pool.obter()
+    assert pool.estatisticas()["em_uso"] == 0
+
+
+def test_pool_esgotado_vira_503_com_retry_after(monkeypatch, criar):
+    monkeypatch.setattr(banco, "pool", PoolConexoes(criar, tamanho=1, timeout=0.01))
+    conn = banco.get_connection()
+    with pytest.raises(HTTPException) as erro:
+        banco.get_connection()
+    assert erro.value.status_code == 503
+    assert erro.value.headers == {"Retry-After": "1"}
+    conn.close()
+    banco.get_connection().close()
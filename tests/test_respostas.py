@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import respostas
+from app.respostas import ImagensMemoria, ImagensRedis, escolher_resposta, montar_resposta, opcoes_saida
+
+
+class RedisFalso:
+    """Um servidor Redis compartilhado: set/get com expiração ignorada."""
+
+    def __init__(self):
+        self.dados = {}
+
+    def set(self, chave, valor, ex=None):
+        assert ex == respostas.RESULTADO_IMAGEM_TTL
+        self.dados[chave] = valor
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+
+def _redis(servidor):
+    imagens = ImagensRedis.__new__(ImagensRedis)  # sem o pacote redis: só troca o cliente
+    imagens._redis = servidor
+    return imagens
+
+
+RESULTADO = {"pontos": [[1, 2]], "image": b"\xff\xd8\xffimagem"}
+
+
+def _link(monkeypatch, imagens):
+    monkeypatch.setattr(respostas, "_imagens", imagens)
+    resposta = asyncio.run(montar_resposta(dict(RESULTADO), "url", "jpeg"))
+    return resposta.body
+
+
+def _baixar(monkeypatch, imagens, url):
+    monkeypatch.setattr(respostas, "_imagens", imagens)
+    app = FastAPI()
+    app.include_router(respostas.router)
+    return TestClient(app).get(url)
+
+
+def _url(corpo):
+    return json.loads(corpo)["image_url"]
+
+
+def test_modo_url_no_mesmo_worker(monkeypatch):
+    imagens = ImagensMemoria()
+    url = _url(_link(monkeypatch, imagens))
+    resposta = _baixar(monkeypatch, imagens, url)
+    assert resposta.status_code == 200
+    assert resposta.content == RESULTADO["image"]
+    assert resposta.headers["content-type"] == "image/jpeg"
+
+
+def test_memoria_nao_e_compartilhada_entre_workers(monkeypatch):
+    url = _url(_link(monkeypatch, ImagensMemoria()))
+    assert _baixar(monkeypatch, ImagensMemoria(), url).status_code == 404
+
+
+def test_redis_e_compartilhado_entre_workers(monkeypatch):
+    servidor = RedisFalso()
+    url = _url(_link(monkeypatch, _redis(servidor)))
+    resposta = _baixar(monkeypatch, _redis(servidor), url)
+    assert resposta.status_code == 200 and resposta.content == RESULTADO["image"]
+    assert resposta.headers["content-type"] == "image/jpeg"
+    assert _baixar(monkeypatch, _redis(servidor), "/resultado-imagem/outro").status_code == 404
+
+
+def test_redis_fora_do_ar_vira_503(monkeypatch):
+    class Fora(RedisFalso):
+        def set(self, *a, **k):
+            raise ConnectionError("Connection refused")
+
+    with pytest.raises(HTTPException) as erro:
+        _link(monkeypatch, _redis(Fora()))
+    assert erro.value.status_code == 503
+
+
+def test_multipart_e_json(monkeypatch):
+    resposta = asyncio.run(montar_resposta(dict(RESULTADO), "multipart", "webp"))
+    assert resposta.media_type.startswith("multipart/mixed; boundary=")
+    assert b"Content-Type: image/webp" in resposta.body and RESULTADO["image"] in resposta.body
+    assert asyncio.run(montar_resposta(RESULTADO, "json", "jpeg")) is RESULTADO
+
+
+@pytest.mark.parametrize("accept, campo, modo", [
+    (None, None, "json"),
+    ("multipart/mixed", None, "multipart"),
+    ("multipart/mixed", "url", "url"),
+    ("application/json", "multipart", "multipart"),
+])
+def test_escolher_resposta(accept, campo, modo):
+    assert escolher_resposta(accept, campo) == modo
+
+
+@pytest.mark.parametrize("campos", [
+    {"resposta": "xml"}, {"formato_imagem": "gif"}, {"qualidade": 0}, {"lado_max": 10}, {"atribuicao": "x"},
+])
+def test_opcoes_invalidas_sao_400(campos):
+    with pytest.raises(HTTPException) as erro:
+        escolher_resposta(None, campos.pop("resposta", None))
+        opcoes_saida("json", campos.pop("formato_imagem", "jpeg"), **campos)
+    assert erro.value.status_code == 400
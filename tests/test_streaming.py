@@ -0,0 +1,93 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app import banco
+from app.banco import modo_listagem, transmitir_ndjson
+
+
+class CursorFalso:
+    def __init__(self, linhas):
+        self.linhas = list(linhas)
+        self.executados = []
+
+    def execute(self, query, args=None):
+        self.executados.append(query)
+
+    def fetchmany(self, n):
+        lote, self.linhas = self.linhas[:n], self.linhas[n:]
+        return lote
+
+
+class ConexaoFalsa:
+    def __init__(self, linhas):
+        self.cursor_ = CursorFalso(linhas)
+        self.fim = None
+
+    def cursor(self):
+        return self.cursor_
+
+    def close(self):
+        self.fim = "devolvida"
+
+    def descartar(self):
+        self.fim = "descartada"
+
+
+@pytest.fixture
+def conexao(monkeypatch):
+    conn = ConexaoFalsa({"id": i} for i in range(5))
+    monkeypatch.setattr(banco, "get_connection", lambda cursorclass=None: conn)
+    return conn
+
+
+async def _ler(limite=None, **kwargs):
+    gerador = await transmitir_ndjson("SELECT id FROM pessoa ORDER BY id", **kwargs)
+    blocos = []
+    async for bloco in gerador:
+        blocos.append(bloco)
+        if limite is not None and len(blocos) == limite:
+            await gerador.aclose()
+            break
+    return blocos
+
+
+def test_transmissao_completa_restaura_a_sessao_e_devolve(conexao):
+    blocos = asyncio.run(_ler(lote=2))
+    assert [len(b.splitlines()) for b in blocos] == [2, 2, 1]
+    assert [orjson.loads(l) for b in blocos for l in b.splitlines()] == [{"id": i} for i in range(5)]
+    executados = conexao.cursor_.executados
+    assert executados[0] == "SET SESSION net_write_timeout = %s"
+    assert executados[-1] == "SET SESSION net_write_timeout = DEFAULT"
+    assert conexao.fim == "devolvida"
+
+
+def test_transmissao_interrompida_descarta_a_conexao(conexao):
+    async def ler():
+        blocos = await _ler(limite=1, lote=2)
+        await asyncio.sleep(0.05)  # o descarte espera o lote em andamento na thread
+        return blocos
+
+    assert len(asyncio.run(ler())) == 1
+    assert "SET SESSION net_write_timeout = DEFAULT" not in conexao.cursor_.executados
+    assert conexao.fim == "descartada"
+
+
+@pytest.mark.parametrize("accept, formato, limite, cursor, modo", [
+    (None, None, None, None, "completa"),
+    ("application/x-ndjson", None, None, None, "ndjson"),
+    ("application/x-ndjson", "json", None, None, "completa"),
+    (None, "ndjson", 10, None, "ndjson"),
+    (None, None, 10, None, "pagina"),
+    (None, "json", None, "abc", "pagina"),
+])
+def test_modo_listagem(accept, formato, limite, cursor, modo):
+    assert modo_listagem(accept, formato, limite, cursor) == modo
+
+
+def test_modo_listagem_formato_invalido():
+    with pytest.raises(HTTPException) as erro:
+        modo_listagem(None, "csv")
+    assert erro.value.status_code == 400
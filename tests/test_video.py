@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from app import video
+from app.medidas import nomes_frontal
+from benchmarks.sintetico import gerar_video
+
+
+def _analisar(tmp_path, **kwargs):
+    caminho = str(tmp_path / "video.avi")
+    verdade = gerar_video(caminho, n_frames=12, **kwargs)
+    return video.analisar_video(caminho, "frontal", 1), verdade
+
+
+def _erro_max(pontos, verdade):
+    return max(np.hypot(p[0] - v[0], p[1] - v[1]) for p, v in zip(sorted(pontos), sorted(verdade)))
+
+
+@pytest.mark.parametrize("largura, altura", [(720, 1280), (1280, 720)])
+def test_rastreia_todos_os_frames(tmp_path, largura, altura):
+    analise, verdade = _analisar(tmp_path, largura=largura, altura=altura)
+    assert analise["frames_analisados"] == 12 and analise["redeteccoes"] == 0
+    assert [f["origem"] for f in analise["frames"]] == ["deteccao"] + ["rastreamento"] * 11
+    for frame, pontos in zip(analise["frames"], verdade):
+        assert len(frame["pontos"]) == len(nomes_frontal)
+        assert _erro_max(frame["pontos"], pontos) <= 2
+
+
+def test_video_pequeno_usa_os_limites_calibrados(tmp_path):
+    # 480x640 com marcadores do tamanho calibrado (raio 12 px): com os limites reduzidos
+    # pela metade o rastreamento os recusaria e cada frame voltaria para a detecção
+    analise, verdade = _analisar(tmp_path, largura=480, altura=640, raio=12)
+    assert analise["redeteccoes"] == 0
+    assert len(analise["frames"][-1]["pontos"]) == len(nomes_frontal)
+    assert _erro_max(analise["frames"][-1]["pontos"], verdade[-1]) <= 2